@@ -1,5 +1,7 @@
 """The main app."""
 
+from datetime import timedelta, timezone
+from http import HTTPStatus
 import locale
 from typing import Any
 
@@ -7,19 +9,64 @@ import flask
 
 import kha.api
 from kha import settings
-from kha.format import formatter_for
+from kha.format import formatter_for, page_expires_at, page_key, \
+    render_page
+from kha.http_caching import validators_for
+from kha.reference_instant import ReferenceInstant
+from kha.rendered_page_cache import RenderedPageCache
+from kha.store_snapshot import SnapshotSource
 
 
 locale.setlocale(locale.LC_ALL, settings.USER_LOCALE)
 app = flask.Flask('kha')
+rendered_page_cache = RenderedPageCache()
 
 
 @app.route('/')
-def main() -> str:
+def main() -> flask.Response:
     """Main page."""
-    formatter = formatter_for(kha.api.check())
-    return flask.render_template('main.template.html',
-                                 **formatter.to_context())
+    snapshot, flask.g.snapshot_source = \
+        kha.api.bounded_snapshot_from_store()
+    reference = ReferenceInstant()
+    response = kha.api.check(now=reference,
+                             timeline=snapshot.timeline,
+                             transitions=snapshot.transitions)
+    key = page_key(response, snapshot.version, reference)
+    expires_at = page_expires_at(response, reference)
+    validators = validators_for(key, snapshot, reference, expires_at,
+                                flask.g.snapshot_source)
+    now = reference.local(timezone.utc)
+    if flask.g.snapshot_source is not SnapshotSource.STORE:
+        # Lets clients and CDNs pick up the store once it is back
+        validators.expires_at = min(
+            validators.expires_at,
+            now + timedelta(seconds=settings.STORE_CACHE_TTL_SECONDS))
+
+    if validators.not_modified(flask.request):
+        return validators.apply(
+            flask.Response(status=HTTPStatus.NOT_MODIFIED), now)
+    if flask.request.method == 'HEAD':  # pylint: disable=magic-value-comparison
+        head_response = flask.Response(content_type='text/html')
+        head_response.automatically_set_content_length = False
+        return validators.apply(head_response, now)
+
+    formatter = formatter_for(response)
+    if (page := rendered_page_cache.get(key, now)) is None:
+        page = rendered_page_cache.put(
+            key, render_page(formatter, reference, expires_at), now)
+    return validators.apply(
+        flask.Response(page.filled_in(formatter.random_reaction(),
+                                      formatter.iso_sd_date_published)),
+        now,
+    )
+
+
+@app.after_request
+def add_snapshot_source(response: flask.Response) -> flask.Response:
+    """Tells which source the store snapshot has come from."""
+    if (source := flask.g.get('snapshot_source')) is not None:
+        response.headers['X-Kha-Snapshot-Source'] = source.value
+    return response
 
 
 @app.route('/site.webmanifest')
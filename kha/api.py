@@ -1,26 +1,108 @@
 """API entry point of the kha package."""
 
-from datetime import datetime, timezone
+from datetime import date, datetime, time, timedelta
+import functools
 import json
+import logging
 import operator
 import os
-from collections.abc import Callable, Iterable
-from typing import Any, cast
-
-import boto3
-from mypy_boto3_s3.client import S3Client
-
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import closing
+from pathlib import Path
+import threading
+from typing import TYPE_CHECKING, Any, cast
+
+from .binary_snapshot import lists_transitions, load_events
 from .episode import Episode, EpisodeDict
 from .episode_check_response import EpisodeCheckResponse, \
     EpisodePresentResponse, EpisodeUnknownResponse
-from .local_types import EventsDict, IsoDatetimeStr
+from .episode_patchers.patcher import Patcher
+from .episode_table import EpisodeTable
+from .episode_timeline import EpisodeTimeline
+from .events_stream import META_PROPERTY_TYPE, EpisodePredicate, \
+    episode_from_dict, stream_episodes
+from .local_types import EventsDict, EventsManifestDict, \
+    IsoDatetimeStr, TransitionsDict, Uuid
+from .reference_instant import ReferenceInstant
 from .settings \
-    import EVENTS_JSON_BUCKET_DEV, EVENTS_JSON_BUCKET_PROD, \
-    EVENTS_JSON_FILENAME, USER_TIMEZONE
+    import BUNDLED_STORE_PATH, EVENTS_BINARY_FILENAME, \
+    EVENTS_JSON_BUCKET_DEV, EVENTS_JSON_BUCKET_PROD, EVENTS_JSON_FILENAME, \
+    EVENTS_MANIFEST_FILENAME, LOCAL_STORAGE_BACKEND, LOCAL_STORE_PATH, \
+    MEMORY_STORAGE_BACKEND, S3_STORAGE_BACKEND, SHARDED_STORE_LAYOUT, \
+    STORAGE_BACKEND, STORE_CACHE_TTL_SECONDS, STORE_LAYOUT, \
+    STORE_MAX_STALENESS_SECONDS, STORE_READ_DEADLINE_SECONDS, \
+    STORE_REFRESH_INTERVAL_SECONDS, TRANSITIONS_JSON_FILENAME, \
+    USER_TIMEZONE
+from .sharded_store import shards_to_load, upload_shards
+from .storage_backends import LocalFileBackend, MemoryBackend, \
+    ObjectVersion, StorageBackend, StoredObject
+from .store_cache import SnapshotFetcher, StoreCache, StoreKey
+from .store_snapshot import SnapshotSource, StoreSnapshot
+from .transition_table import TransitionTable
 from .verdict import Verdict
 
-EPISODE_SCHEMA_TYPE = 'Episode'
-META_PROPERTY_TYPE = '@type'
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+store_cache = StoreCache(
+    ttl_seconds=STORE_CACHE_TTL_SECONDS,
+    max_staleness_seconds=STORE_MAX_STALENESS_SECONDS,
+    refresh_interval_seconds=STORE_REFRESH_INTERVAL_SECONDS,
+)
+
+_storage_backend: StorageBackend | None = None  # pylint: disable=invalid-name
+_storage_backend_lock = threading.Lock()
+
+_snapshot_sources: Counter[SnapshotSource] = Counter()
+_snapshot_sources_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def storage_backend() -> StorageBackend:
+    """
+    Returns the storage backend of the process.
+
+    Unless one has been set with `set_storage_backend`, the backend
+    is created on first use as configured in `STORAGE_BACKEND`, and
+    then kept for the lifetime of the process.
+    Raises ValueError if the configured backend is unknown.
+    """
+    global _storage_backend  # pylint: disable=global-statement
+    with _storage_backend_lock:
+        if _storage_backend is None:
+            _storage_backend = _configured_backend(STORAGE_BACKEND)
+        return _storage_backend
+
+
+def set_storage_backend(backend: StorageBackend | None) -> None:
+    """
+    Makes the given backend the storage backend of the process,
+    e.g. for tests and benchmarks. With None, the next call to
+    `storage_backend` creates the configured backend again.
+    """
+    global _storage_backend  # pylint: disable=global-statement
+    with _storage_backend_lock:
+        _storage_backend = backend
+
+
+def s3_backend(bucket: str,
+               client: 'S3Client | None' = None) -> StorageBackend:
+    """Returns a backend for the given S3 bucket."""
+    # Imported late, so the other backends work without boto3
+    from .s3_clients import S3Backend  # pylint: disable=import-outside-toplevel
+    return S3Backend(bucket, client)
+
+
+def _configured_backend(kind: str) -> StorageBackend:
+    if kind == S3_STORAGE_BACKEND:
+        return s3_backend(os.environ['KHA_DATA_S3_BUCKET'])
+    if kind == LOCAL_STORAGE_BACKEND:
+        return _local_backend(LOCAL_STORE_PATH)
+    if kind == MEMORY_STORAGE_BACKEND:
+        return MemoryBackend()
+    raise ValueError(f'Unknown storage backend `{kind}`')
 
 
 def check_episode() -> str:
@@ -38,56 +120,100 @@ def check_episode() -> str:
 def check(
     episodes: Iterable[Episode] | None = None,
     now: Callable[..., datetime] = datetime.now,
+    timeline: EpisodeTimeline | None = None,
+    transitions: TransitionTable | None = None,
 ) -> EpisodeCheckResponse:
     """
     Checks whether an episode runs today. What today means
     is derived from a given point in time, the *reference point*.
 
     Uses the current system time as a reference point, unless
-    a Callable is given that produces a datetime.
+    a Callable is given that produces a datetime. The reference
+    point is resolved only once per call, or not at all if a
+    ReferenceInstant is given.
     An episode is considered to *run today* if its start date is
     on the same day as the reference point, considering the user’s
     assumed timezone of `Europe/Berlin`.
 
-    This function uses the given episode list. If none is given,
-    it loads episodes from the file `events.kha.json`, merges it
-    with episodes found online and uses the result.
+    This function uses the given transition table, timeline or
+    episode list. If none is given, it uses the transition table of
+    the current store snapshot, or its timeline if the store
+    provides no transition table.
     """
-    if (episode := next_episode(episodes=episodes, after=now)) is None:
+    reference = ReferenceInstant.of(now)
+    if transitions is None and timeline is None and not episodes:
+        snapshot = snapshot_from_store()
+        transitions = snapshot.transitions
+        timeline = snapshot.timeline
+    if transitions is not None:
+        return _check_transitions(transitions, reference)
+
+    iso_reference_date = _iso_local(reference())
+    timeline = _timeline(episodes, timeline)
+    iso_valid_from, iso_valid_until = (
+        None if instant is None else _iso_local(instant)
+        for instant in timeline.answer_validity(reference)
+    )
+
+    if (episode := timeline.current_or_next(reference)) is None:
         return EpisodeUnknownResponse(
-            sd_date_published=IsoDatetimeStr(
-                now()
-                .astimezone(USER_TIMEZONE)
-                .isoformat(timespec='seconds')
-            )
+            sd_date_published=iso_reference_date,
+            valid_from=iso_valid_from,
+            valid_until=iso_valid_until,
         )
 
+    runs_today = episode.runs_today(now=reference)
+    return EpisodePresentResponse(
+        verdict=Verdict.YES if runs_today else Verdict.NO,
+        reference_date=iso_reference_date,
+        start_date=_iso_local(episode.date_published),
+        sd_date_published=iso_reference_date,
+        runs_today=runs_today,
+        episode_name=episode.name,
+        episode_number=episode.episode_number,
+        valid_from=iso_valid_from,
+        valid_until=iso_valid_until,
+    )
+
+
+def _check_transitions(transitions: TransitionTable,
+                       reference: ReferenceInstant) \
+        -> EpisodeCheckResponse:
+    iso_reference_date = _iso_local(reference())
+    transition, valid_until = transitions.lookup(reference)
+    iso_valid_from, iso_valid_until = (
+        None if instant is None else _iso_local(instant)
+        for instant in (transition.instant, valid_until)
+    )
+    if (episode := transition.episode) is None:
+        return EpisodeUnknownResponse(
+            sd_date_published=iso_reference_date,
+            valid_from=iso_valid_from,
+            valid_until=iso_valid_until,
+        )
+    runs_today = transition.verdict == Verdict.YES
     return EpisodePresentResponse(
-        verdict=Verdict.YES if episode.runs_today() else Verdict.NO,
-        reference_date=IsoDatetimeStr(
-            now()
-            .astimezone(USER_TIMEZONE)
-            .isoformat(timespec='seconds')
-        ),
-        start_date=IsoDatetimeStr(
-            episode.date_published
-            .astimezone(USER_TIMEZONE)
-            .isoformat(timespec='seconds')
-        ),
-        sd_date_published=IsoDatetimeStr(
-            now()
-            .astimezone(USER_TIMEZONE)
-            .isoformat(timespec='seconds')
-        ),
-        runs_today=episode.runs_today(),
+        verdict=Verdict.YES if runs_today else Verdict.NO,
+        reference_date=iso_reference_date,
+        start_date=_iso_local(episode.date_published),
+        sd_date_published=iso_reference_date,
+        runs_today=runs_today,
         episode_name=episode.name,
         episode_number=episode.episode_number,
+        valid_from=iso_valid_from,
+        valid_until=iso_valid_until,
     )
 
 
+def _iso_local(instant: datetime) -> IsoDatetimeStr:
+    return IsoDatetimeStr(
+        instant.astimezone(USER_TIMEZONE).isoformat(timespec='seconds'))
+
+
 def next_episode(
     episodes: Iterable[Episode] | None = None,
     after: Callable[..., datetime] = datetime.now,
+    timeline: EpisodeTimeline | None = None,
 ) -> Episode | None:
     """
     Returns the current or next episode that is broadcast
@@ -101,67 +227,47 @@ def next_episode(
     the episode is still current if the reference point is past the
     broadcast time (but not past midnight).
 
-    This function uses the given episode list. If none is given,
-    it loads episodes from the file `events.kha.json`, merges it
-    with episodes found online and uses the result.
+    This function uses the given timeline or episode list. If none
+    is given, it uses the timeline of the current store snapshot,
+    so the lookup costs the same regardless of the store size.
     """
-    unfiltered_episodes = episodes if episodes \
-        else all_episodes_from_store()
+    return _timeline(episodes, timeline).current_or_next(after)
 
-    filtered_sorted_episodes = sorted(
-        [
-            episode
-            for episode
-            in filter_eligible_episodes(unfiltered_episodes)
-            if episode.runs_today_or_later(now=after)
-        ],
-        key=operator.attrgetter('date_published'),
-    )
 
-    if not filtered_sorted_episodes:
-        return None
-    return next(iter(filtered_sorted_episodes))
+def _timeline(episodes: Iterable[Episode] | None,
+              timeline: EpisodeTimeline | None) -> EpisodeTimeline:
+    if timeline is not None:
+        return timeline
+    return episode_timeline(episodes) if episodes \
+        else snapshot_from_store().timeline
+
+
+def episode_timeline(episodes: Iterable[Episode]) -> EpisodeTimeline:
+    """
+    Builds a timeline of the eligible episodes among the given
+    episodes.
+    """
+    return EpisodeTimeline(filter_eligible_episodes(episodes))
 
 
 def filter_eligible_episodes(
         unfiltered_episodes: Iterable[Episode]) \
-        -> Iterable[Episode]:
+        -> EpisodeTable:
     """
     From a given list of unfiltered episodes, return eligible
     episodes. An episode is eligible if and only if:
     1. it is not a rerun;
     2. it is not a spinoff, or it is followed only by spinoffs.
-    Returns a list, sorted by start date.
-    """
-    def last_published_date_ignoring_spinoffs() \
-            -> datetime | None:
-        """
-        Of all start dates of known episodes, return the latest one,
-        ignoring spin-off episodes.
-        Return None if no such episode exists.
-        """
-        start_dates = [
-            episode.date_published
-            for episode in unfiltered_episodes
-            if not (episode.is_rerun or episode.is_spinoff)
-        ]
-        if not start_dates:
-            return None
-        return max(start_dates)
+    Returns an EpisodeTable, which behaves like a list, sorted by
+    start date.
 
-    pivot_date = last_published_date_ignoring_spinoffs()
-    spinoff_episodes_wanted = not pivot_date
-
-    for episode in unfiltered_episodes:
-        if episode.is_rerun:
-            continue
-        if pivot_date and episode.date_published >= pivot_date:
-            spinoff_episodes_wanted = True
-        if spinoff_episodes_wanted or not episode.is_spinoff:
-            yield episode
+    Iterates over `unfiltered_episodes` only once, so any
+    iterable will do.
+    """
+    return EpisodeTable.from_episodes(unfiltered_episodes).eligible()
 
 
-def all_episodes_from_store(client: S3Client | None = None) \
+def all_episodes_from_store(backend: StorageBackend | None = None) \
         -> list[Episode]:
     """
     Loads all episodes from the backing store and returns them,
@@ -169,7 +275,7 @@ def all_episodes_from_store(client: S3Client | None = None) \
     """
     return sorted(
         cast(Iterable[Episode],
-             events_dict_from_store(client)['episodes'].values()),
+             events_dict_from_store(backend)['episodes'].values()),
         key=operator.attrgetter('date_published'),
     )
 
@@ -177,44 +283,414 @@ def all_episodes_from_store(client: S3Client | None = None) \
 def _deserialize_events_dict(obj: dict[str, Any]) \
         -> dict[str, Any] | Episode:
     if META_PROPERTY_TYPE in obj:
-        if obj[META_PROPERTY_TYPE] == EPISODE_SCHEMA_TYPE:
-            episode_dict = cast(EpisodeDict, obj)
-            return Episode(
-                episode_dict['episodeNumber'],
-                name=episode_dict['name'],
-                date_published=datetime
-                .fromisoformat(episode_dict['datePublished'])
-                .astimezone(timezone.utc),
-                sd_date_published=datetime
-                .fromisoformat(episode_dict['sdDatePublished'])
-                .astimezone(timezone.utc),
-                is_rerun=episode_dict['isRerun'],
-                is_spinoff=episode_dict['isSpinoff'],
-                timezone=USER_TIMEZONE,
-            )
-        raise RuntimeError(f'Unknown type `{obj["@type"]}`')
+        return episode_from_dict(cast(EpisodeDict, obj))
     return obj
 
 
-def events_dict_from_store(client: S3Client | None = None) \
+def events_dict_from_store(backend: StorageBackend | None = None) \
         -> EventsDict:
     """
     Loads an EventsDict from the backing store and returns it,
     sorted by start date.
     """
-    s3_client = client or boto3.client('s3')
-    response = s3_client.get_object(
-        Bucket=os.environ['KHA_DATA_S3_BUCKET'],
-        Key=EVENTS_JSON_FILENAME
+    return snapshot_from_store(backend).events_dict
+
+
+def stream_episodes_from_store(
+    predicate: EpisodePredicate | None = None,
+    backend: StorageBackend | None = None,
+) -> Iterator[tuple[Uuid, Episode]]:
+    """
+    Streams the events JSON from the backing store, and yields the
+    UUID and the Episode of each episode as soon as it has arrived.
+    Memory use stays bounded however large the store grows.
+
+    If a predicate is given, such as `published_on_or_after` or
+    `not_rerun` from `kha.events_stream`, episodes for which it
+    returns False are skipped before an Episode is created.
+    Bypasses `store_cache`.
+    """
+    stored = (backend or storage_backend()).get_existing(
+        EVENTS_JSON_FILENAME)
+    with closing(stored.body):
+        yield from stream_episodes(stored.body, predicate)
+
+
+def snapshot_from_store(backend: StorageBackend | None = None,
+                        timeout: float | None = None) -> StoreSnapshot:
+    """
+    Returns a snapshot of the backing store, which is the given
+    storage backend or else the one configured for the process.
+    Serves the snapshot from `store_cache` if possible, and loads
+    or revalidates it otherwise.
+    If a timeout is given, raises TimeoutError if loading takes
+    longer than that.
+
+    If the store has the sharded layout, as configured in
+    `STORE_LAYOUT`, the snapshot only contains the episodes that
+    are needed to answer for the day it was loaded and later days.
+    """
+    store_key, fetch = _cached_store(backend or storage_backend())
+    return store_cache.get(store_key, fetch, timeout)
+
+
+def patch_store_snapshot(patcher: Patcher,
+                         backend: StorageBackend | None = None) \
+        -> StoreSnapshot:
+    """
+    Applies the given patch to the snapshot of the backing store in
+    `store_cache`, loading it first if needed, and returns the
+    patched snapshot, which requests get from then on.
+    The backing store itself is left as it is; once it changes, its
+    new contents replace the patched snapshot.
+    """
+    store_key, fetch = _cached_store(backend or storage_backend())
+    store_cache.get(store_key, fetch)
+    return store_cache.patch(store_key, patcher)
+
+
+def _cached_store(backend: StorageBackend) \
+        -> tuple[StoreKey, SnapshotFetcher]:
+    """
+    Returns the key of the given store in `store_cache`, and the
+    function that loads it, for the configured layout.
+    """
+    if STORE_LAYOUT == SHARDED_STORE_LAYOUT:
+        return (
+            (backend.name, EVENTS_MANIFEST_FILENAME),
+            lambda etag: _fetch_sharded_snapshot(backend, etag),
+        )
+    return (
+        (backend.name, EVENTS_JSON_FILENAME),
+        lambda etag: _fetch_snapshot(backend, etag),
+    )
+
+
+def bounded_snapshot_from_store(
+    backend: StorageBackend | None = None,
+    deadline_seconds: float = STORE_READ_DEADLINE_SECONDS,
+) -> tuple[StoreSnapshot, SnapshotSource]:
+    """
+    Returns a snapshot of the backing store like
+    `snapshot_from_store`, but waits at most `deadline_seconds`
+    for it, e.g. while a request is being served.
+
+    If loading takes longer or fails, falls back to the last
+    snapshot in `store_cache`, however old, or else to the snapshot
+    bundled with the deployment package in `BUNDLED_STORE_PATH`.
+    A load that takes too long goes on in the background, so later
+    calls get its result.
+    Returns the snapshot along with the source it came from, which
+    is counted in `snapshot_source_counts`, and logged unless it is
+    the backing store.
+    Raises the error of the load if there is no fallback.
+    """
+    backend = backend or storage_backend()
+    try:
+        snapshot = snapshot_from_store(backend, timeout=deadline_seconds)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        if (fallback := _fallback_snapshot(backend)) is None:
+            raise
+        snapshot, source = fallback
+        logger.warning('Serving the %s snapshot %s, as store %s failed: %r',
+                       source.value, snapshot.version, backend.name, error)
+    else:
+        source = SnapshotSource.STORE
+    with _snapshot_sources_lock:
+        _snapshot_sources[source] += 1
+    return snapshot, source
+
+
+def _fallback_snapshot(backend: StorageBackend) \
+        -> tuple[StoreSnapshot, SnapshotSource] | None:
+    """
+    Returns the last cached snapshot of the given store, or else
+    the bundled snapshot, along with its source. Returns None if
+    there is neither.
+    """
+    if (snapshot := store_cache.last_snapshot(
+            _cached_store(backend)[0])) is not None:
+        return snapshot, SnapshotSource.LAST_KNOWN
+    if (snapshot := bundled_snapshot()) is not None:
+        return snapshot, SnapshotSource.BUNDLED
+    return None
+
+
+def bundled_snapshot() -> StoreSnapshot | None:
+    """
+    Returns a snapshot of the events JSON bundled with the
+    deployment package in `BUNDLED_STORE_PATH`, or None if the
+    package has none. The snapshot is kept in `store_cache`.
+    """
+    backend = _local_backend(BUNDLED_STORE_PATH)
+    if backend.head(EVENTS_JSON_FILENAME) is None:
+        return None
+    return store_cache.get(
+        (backend.name, EVENTS_JSON_FILENAME),
+        lambda etag: _fetch_snapshot(backend, etag),
+    )
+
+
+@functools.cache
+def _local_backend(root: Path) -> LocalFileBackend:
+    """Returns a backend for the given directory, made once."""
+    return LocalFileBackend(root)
+
+
+def snapshot_source_counts() -> dict[str, int]:
+    """
+    Returns how many snapshots `bounded_snapshot_from_store` has
+    returned from each source, e.g. for metrics.
+    """
+    with _snapshot_sources_lock:
+        return {source.value: _snapshot_sources[source]
+                for source in SnapshotSource}
+
+
+def _fetch_snapshot(backend: StorageBackend,
+                    etag: str | None) -> StoreSnapshot | None:
+    """
+    Loads the events store, along with its transition table if
+    there is one. If an ETag is given, returns None if the events
+    JSON still has that ETag.
+
+    Prefers the binary snapshot of the events if it has been made
+    from the current events JSON, and parses the JSON otherwise.
+    Without an ETag, the binary snapshot is read first and checked
+    against the events JSON with a conditional request, which
+    downloads the JSON only if the snapshot is stale. The transition
+    table is only asked for if the binary snapshot lists one.
+    """
+    events_version: ObjectVersion | None = None
+    if etag is not None:
+        if (events_version := backend.head(EVENTS_JSON_FILENAME)) is None:
+            raise _missing_events_json(backend)
+        if events_version.etag == etag:
+            return None
+    if (binary := _fetch_binary_snapshot(backend)) is not None:
+        events_dict, events_md5, transitions_listed = binary
+        if events_version is None and (
+                events_version := backend.get_if_changed(
+                    EVENTS_JSON_FILENAME, f'"{events_md5}"')) is None:
+            raise _missing_events_json(backend)
+        if isinstance(events_version, StoredObject):
+            return _parse_snapshot(backend, events_version)
+        if _md5_of(events_version.etag) == events_md5:
+            return StoreSnapshot(
+                events_dict,
+                etag=events_version.etag,
+                last_modified=events_version.last_modified,
+                transitions=_fetch_transitions(
+                    backend, events_dict, events_md5)
+                if transitions_listed else None,
+            )
+    return _parse_snapshot(
+        backend, backend.get_existing(EVENTS_JSON_FILENAME))
+
+
+def _parse_snapshot(backend: StorageBackend,
+                    stored: StoredObject) -> StoreSnapshot:
+    """
+    Parses the given events JSON into a snapshot, along with its
+    transition table if there is one.
+    """
+    # Parsed as it arrives, so the whole body is never in memory
+    with closing(stored.body):
+        events_dict: EventsDict = {
+            'episodes': dict(stream_episodes(stored.body)),
+        }
+    return StoreSnapshot(
+        events_dict,
+        etag=stored.etag,
+        last_modified=stored.last_modified,
+        transitions=_fetch_transitions(
+            backend, events_dict, _md5_of(stored.etag)),
+    )
+
+
+def _missing_events_json(backend: StorageBackend) -> RuntimeError:
+    """Returns the error for a store without events JSON."""
+    return RuntimeError(
+        f'No {EVENTS_JSON_FILENAME} in store {backend.name}')
+
+
+def _fetch_sharded_snapshot(
+    backend: StorageBackend,
+    etag: str | None,
+    now: Callable[..., datetime] = datetime.now,
+) -> StoreSnapshot | None:
+    """
+    Loads the shards of the events store that are needed from the
+    current day on, as listed in the manifest. If an ETag is given,
+    returns None if the manifest still has that ETag.
+
+    The snapshot stays good for as long as the manifest does not
+    change: later days need no shards that earlier days did not.
+    Raises RuntimeError if a shard does not match the manifest,
+    e.g. because an upload is in progress.
+    """
+    stored = backend.get_existing(EVENTS_MANIFEST_FILENAME)
+    with closing(stored.body):
+        if etag is not None and stored.etag == etag:
+            return None
+        manifest = cast(EventsManifestDict, json.loads(stored.body.read()))
+    episodes: dict[Uuid, Episode] = {}
+    for shard in shards_to_load(manifest, ReferenceInstant(now)):
+        shard_key = shard['key']
+        shard_stored = backend.get_existing(shard_key)
+        with closing(shard_stored.body):
+            if shard_stored.etag != shard['etag']:
+                raise RuntimeError(
+                    f'Shard {shard_key} does not match the manifest')
+            episodes.update(stream_episodes(shard_stored.body))
+    return StoreSnapshot(
+        {'episodes': episodes},
+        etag=stored.etag,
+        last_modified=stored.last_modified,
     )
-    return cast(
-        EventsDict,
-        json.load(response['Body'],
-                  object_hook=_deserialize_events_dict)
+
+
+def _fetch_binary_snapshot(backend: StorageBackend) \
+        -> tuple[EventsDict, str, bool] | None:
+    """
+    Downloads and loads the binary snapshot of the events store.
+    Returns the events, the MD5 digest of the events JSON they were
+    made from, and whether a transition table has been uploaded for
+    it. Returns None if there is no binary snapshot in a supported
+    format.
+    """
+    if (stored := backend.get(EVENTS_BINARY_FILENAME)) is None:
+        return None
+    with closing(stored.body):
+        binary = stored.body.read()
+    try:
+        events_dict, events_md5 = load_events(binary)
+    except ValueError:
+        return None
+    return events_dict, events_md5, lists_transitions(binary)
+
+
+def _fetch_transitions(backend: StorageBackend,
+                       events_dict: EventsDict,
+                       events_md5: str | None) \
+        -> TransitionTable | None:
+    """
+    Downloads the transition table for the given events store.
+    Returns None if there is no table, or if it was computed from
+    different contents than the events store has now.
+    """
+    if events_md5 is None \
+            or (stored := backend.get(TRANSITIONS_JSON_FILENAME)) is None:
+        return None
+    with closing(stored.body):
+        transitions_dict = cast(TransitionsDict,
+                                json.loads(stored.body.read()))
+    if transitions_dict['eventsMd5'] != events_md5:
+        return None
+    return TransitionTable.from_json_dict(transitions_dict, events_dict)
+
+
+def _md5_of(etag: str | None) -> str | None:
+    """
+    Returns the MD5 digest of an object with the given ETag.
+    For single-part uploads, S3 uses the MD5 digest as the ETag.
+    """
+    return None if etag is None else etag.strip('"')
+
+
+def snapshot_from_json(events_json: bytes,
+                       etag: str | None = None) -> StoreSnapshot:
+    """Parses the given serialized events store into a snapshot."""
+    return StoreSnapshot(
+        cast(EventsDict,
+             json.loads(events_json,
+                        object_hook=_deserialize_events_dict)),
+        etag=etag,
     )
 
 
-def list_eligible_episodes(client: S3Client | None = None) \
+def transition_mismatches(transitions: TransitionTable,
+                          timeline: EpisodeTimeline) -> list[date]:
+    """
+    Cross-validates a transition table against `next_episode()`.
+    Compares the answers at the first and the last second of every
+    local day, starting the day before the first transition and
+    ending the day after the last one.
+    Returns the days on which the answers differ.
+    """
+    instants = [
+        transition.instant.astimezone(transitions.timezone)
+        for transition in transitions.transitions
+        if transition.instant is not None
+    ] or [datetime.now(transitions.timezone)]
+    first_day = instants[0].date() - timedelta(days=1)
+    last_day = instants[-1].date() + timedelta(days=1)
+    mismatches = []
+    for day in (first_day + timedelta(days=offset)
+                for offset in range((last_day - first_day).days + 1)):
+        start_of_day = datetime.combine(
+            day, time(), tzinfo=transitions.timezone)
+        end_of_day = datetime.combine(
+            day + timedelta(days=1), time(),
+            tzinfo=transitions.timezone) - timedelta(seconds=1)
+        if any(
+            _answer_of(transitions, reference)
+            != _answer_of(timeline, reference)
+            for reference in (
+                ReferenceInstant(lambda instant=instant: instant)
+                for instant in (start_of_day, end_of_day)
+            )
+        ):
+            mismatches.append(day)
+    return mismatches
+
+
+def _answer_of(source: TransitionTable | EpisodeTimeline,
+               reference: ReferenceInstant) \
+        -> tuple[Verdict, Episode | None]:
+    if isinstance(source, TransitionTable):
+        transition = source.lookup(reference)[0]
+        return transition.verdict, transition.episode
+    if (episode := next_episode(after=reference, timeline=source)) \
+            is None:
+        return Verdict.UNKNOWN, None
+    return Verdict.YES if episode.runs_today(now=reference) \
+        else Verdict.NO, episode
+
+
+def verify_transitions(backend: StorageBackend | None = None) -> None:
+    """
+    Cross-validates the transition table in the backing store
+    against the episodes for every day it covers, and prints the
+    days on which the answers differ.
+    """
+    snapshot = snapshot_from_store(backend)
+    if snapshot.transitions is None:
+        print('No up-to-date transition table in the store.')
+        return
+    mismatches = transition_mismatches(
+        snapshot.transitions, snapshot.timeline)
+    for day in mismatches:
+        print(f'Mismatch: {day.isoformat()}')
+    print(f'{len(snapshot.transitions.transitions)} transitions,'
+          f' {len(mismatches)} mismatching days.')
+
+
+def migrate_to_shards(backend: StorageBackend | None = None) -> None:
+    """
+    Converts the events store in the backing store to the sharded
+    layout, i.e. one object per broadcast year and a manifest.
+    Keeps the events JSON, which stays the source of truth.
+    """
+    backend = backend or storage_backend()
+    stored = backend.get_existing(EVENTS_JSON_FILENAME)
+    with closing(stored.body):
+        events_json = stored.body.read()
+    written, deleted = upload_shards(backend, events_json)
+    print(f'{len(written)} shards written, {len(deleted)} deleted.')
+
+
+def list_eligible_episodes(backend: StorageBackend | None = None) \
         -> None:
     """
     From all known episodes in the backing store, prints a list of
@@ -222,33 +698,27 @@ def list_eligible_episodes(client: S3Client | None = None) \
     1. it is not a rerun;
     2. it is not a spinoff, or it is followed only by spinoffs.
     """
-    for episode \
-            in filter_eligible_episodes(
-                all_episodes_from_store(client)):
+    for episode in snapshot_from_store(backend).timeline.episodes:
         print(repr(episode))
 
 
-def print_episodes_dev(client: S3Client | None = None) -> None:
+def print_episodes_dev(backend: StorageBackend | None = None) -> None:
     """
-    Downloads episodes from the backing store and prints them
-    on standard output.
+    Downloads episodes from the development bucket, or the given
+    backend, and prints them on standard output.
     """
-    _print_episodes(EVENTS_JSON_BUCKET_DEV, client)
+    _print_episodes(backend or s3_backend(EVENTS_JSON_BUCKET_DEV))
 
 
-def print_episodes_prod(client: S3Client | None = None) -> None:
+def print_episodes_prod(backend: StorageBackend | None = None) -> None:
     """
-    Downloads episodes from the backing store and prints them
-    on standard output.
+    Downloads episodes from the production bucket, or the given
+    backend, and prints them on standard output.
     """
-    _print_episodes(EVENTS_JSON_BUCKET_PROD, client)
+    _print_episodes(backend or s3_backend(EVENTS_JSON_BUCKET_PROD))
 
 
-def _print_episodes(bucket: str,
-                    client: S3Client | None = None) -> None:
-    s3_client = client or boto3.client('s3')
-    response = s3_client.get_object(
-        Bucket=bucket,
-        Key=EVENTS_JSON_FILENAME,
-    )
-    print(response['Body'].read().decode())
+def _print_episodes(backend: StorageBackend) -> None:
+    stored = backend.get_existing(EVENTS_JSON_FILENAME)
+    with closing(stored.body):
+        print(stored.body.read().decode())
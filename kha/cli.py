@@ -4,15 +4,21 @@ import sys
 
 import fire  # type: ignore
 
-from . import api, fire_workarounds
+from . import api, fire_workarounds, html_import, prerender
 
 
 def run(*args: str) -> None:
     """Runs the command line interface."""
     fire_workarounds.apply()
+    # Each invocation should see the current state of the store
+    api.store_cache.invalidate()
     fire.Fire({
         'check': api.check_episode,
+        'import-html': html_import.import_html,
         'list': api.list_eligible_episodes,
+        'migrate-to-shards': api.migrate_to_shards,
+        'prerender': prerender.prerender,
+        'verify-transitions': api.verify_transitions,
         'print': {
             'dev': api.print_episodes_dev,
             'prod': api.print_episodes_prod,
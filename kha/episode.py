@@ -4,9 +4,10 @@
 
 from collections.abc import Callable
 from datetime import datetime, timezone as timezone_module, tzinfo
-from typing import TypedDict
+import functools
+from typing import Any, TypedDict
 
-from dateutil.relativedelta import relativedelta
+from .reference_instant import ReferenceInstant
 
 
 class EpisodeDict(TypedDict):
@@ -20,7 +21,36 @@ class EpisodeDict(TypedDict):
 
 
 class Episode:
-    """Single episode of a series."""
+    """
+    Single episode of a series.
+
+    Episodes are immutable. Two episodes are equal if and only if
+    they have the same domain key.
+    """
+
+    __slots__ = (
+        'episode_number',
+        'name',
+        'date_published',
+        'sd_date_published',
+        'is_rerun',
+        'is_spinoff',
+        'timezone',
+        '_domain_key',
+        '_local_date_published',
+        '_local_sd_date_published',
+    )
+
+    episode_number: int | str
+    name: str
+    date_published: datetime
+    sd_date_published: datetime
+    is_rerun: bool
+    is_spinoff: bool
+    timezone: tzinfo | None
+    _domain_key: tuple[int | str, bool, bool] | None
+    _local_date_published: datetime | None
+    _local_sd_date_published: datetime | None
 
     def __init__(self,
                  episode_number: int | str,
@@ -30,15 +60,20 @@ class Episode:
                  is_rerun: bool = False,
                  is_spinoff: bool = False,
                  timezone: tzinfo | None = timezone_module.utc):
-        self.episode_number: int | str = episode_number
-        self.name: str = name
-        self.date_published: datetime = \
-            date_published.astimezone(timezone_module.utc)
-        self.sd_date_published: datetime = \
-            sd_date_published.astimezone(timezone_module.utc)
-        self.is_rerun = is_rerun
-        self.is_spinoff = is_spinoff
-        self.timezone = timezone
+        initialize = functools.partial(object.__setattr__, self)
+        initialize('episode_number', episode_number)
+        initialize('name', name)
+        initialize('date_published',
+                   date_published.astimezone(timezone_module.utc))
+        initialize('sd_date_published',
+                   sd_date_published.astimezone(timezone_module.utc))
+        initialize('is_rerun', is_rerun)
+        initialize('is_spinoff', is_spinoff)
+        initialize('timezone', timezone)
+        # Computed on first use
+        initialize('_domain_key', None)
+        initialize('_local_date_published', None)
+        initialize('_local_sd_date_published', None)
 
     @property
     def domain_key(self) \
@@ -48,19 +83,28 @@ class Episode:
         Two episodes are the same thing if and only if they have
         the same domain key.
         """
-        return (
-            self.episode_number,
-            self.is_rerun,
-            self.is_spinoff,
-        )
+        if (domain_key := self._domain_key) is None:
+            domain_key = (
+                self.episode_number,
+                self.is_rerun,
+                self.is_spinoff,
+            )
+            object.__setattr__(self, '_domain_key', domain_key)
+        return domain_key
 
     def local_date_published(self) -> datetime:
         """Returns `date_published` in the local timezone."""
-        return self.date_published.astimezone(self.timezone)
+        if (local := self._local_date_published) is None:
+            local = self.date_published.astimezone(self.timezone)
+            object.__setattr__(self, '_local_date_published', local)
+        return local
 
     def local_sd_date_published(self) -> datetime:
         """Returns `sd_date_published` in the local timezone."""
-        return self.sd_date_published.astimezone(self.timezone)
+        if (local := self._local_sd_date_published) is None:
+            local = self.sd_date_published.astimezone(self.timezone)
+            object.__setattr__(self, '_local_sd_date_published', local)
+        return local
 
     def runs_today(
             self,
@@ -72,11 +116,15 @@ class Episode:
         the timezone associated with this episode.
 
         Uses the current system time as a reference point, unless
-        a Callable is given that produces a datetime.
+        a Callable is given that produces a datetime. Pass a
+        ReferenceInstant to reuse its day boundaries.
         """
+        reference = ReferenceInstant.of(now)
         return \
-            self.date_published >= self.start_of_current_day(now) \
-            and self.date_published < self.start_of_next_day(now)
+            self.date_published \
+            >= reference.start_of_current_day(self.timezone) \
+            and self.date_published \
+            < reference.start_of_next_day(self.timezone)
 
     def runs_today_or_later(
             self,
@@ -88,10 +136,11 @@ class Episode:
         considering the timezone associated with this episode.
 
         Uses the current system time as a reference point, unless
-        a Callable is given that produces a datetime.
+        a Callable is given that produces a datetime. Pass a
+        ReferenceInstant to reuse its day boundaries.
         """
-        return \
-            self.date_published >= self.start_of_current_day(now)
+        return self.date_published \
+            >= ReferenceInstant.of(now).start_of_current_day(self.timezone)
 
     def start_of_next_day(
         self,
@@ -104,11 +153,7 @@ class Episode:
         Uses the current system time as a reference, unless
         a Callable is given that produces a datetime.
         """
-        local_midnight = now().astimezone(self.timezone) \
-            + relativedelta(days=+1,
-                            hour=0, minute=0, second=0,
-                            microsecond=0)
-        return local_midnight.astimezone(timezone_module.utc)
+        return ReferenceInstant.of(now).start_of_next_day(self.timezone)
 
     def start_of_current_day(
         self,
@@ -121,8 +166,34 @@ class Episode:
         Uses the current system time as a reference, unless
         a Callable is given that produces a datetime.
         """
-        return self.start_of_next_day(now=now) \
-            + relativedelta(days=-1)
+        return ReferenceInstant.of(now) \
+            .start_of_current_day(self.timezone)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Episode):
+            return NotImplemented
+        return self.domain_key == other.domain_key
+
+    def __hash__(self) -> int:
+        return hash(self.domain_key)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f'Cannot set `{name}`: Episode is immutable')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(
+            f'Cannot delete `{name}`: Episode is immutable')
+
+    def __reduce__(self) -> tuple[type['Episode'], tuple[Any, ...]]:
+        return Episode, (
+            self.episode_number,
+            self.name,
+            self.date_published,
+            self.sd_date_published,
+            self.is_rerun,
+            self.is_spinoff,
+            self.timezone,
+        )
 
     def __repr__(self) -> str:
         brackets = '({})'
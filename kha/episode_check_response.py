@@ -1,4 +1,4 @@
-# pylint: disable=too-few-public-methods
+# pylint: disable=too-few-public-methods, too-many-instance-attributes
 
 """Response to a request to check whether an episode runs today."""
 
@@ -9,7 +9,13 @@ from .verdict import Verdict
 
 
 class EpisodePresentResponse:
-    """Response when an episode has been found."""
+    """
+    Response when an episode has been found.
+
+    The verdict and the episode stay the same from `valid_from`
+    (inclusive) until `valid_until` (exclusive). None means that
+    the period is unbounded on that end.
+    """
 
     def __init__(self,  # pylint: disable=too-many-arguments
                  verdict: Literal[Verdict.YES, Verdict.NO],
@@ -18,7 +24,9 @@ class EpisodePresentResponse:
                  sd_date_published: IsoDatetimeStr,
                  runs_today: bool,
                  episode_name: str,
-                 episode_number: int | str):
+                 episode_number: int | str,
+                 valid_from: IsoDatetimeStr | None,
+                 valid_until: IsoDatetimeStr | None):
         self.verdict = verdict
         self.reference_date = reference_date
         self.start_date = start_date
@@ -26,14 +34,27 @@ class EpisodePresentResponse:
         self.runs_today = runs_today
         self.episode_name = episode_name
         self.episode_number = episode_number
+        self.valid_from = valid_from
+        self.valid_until = valid_until
 
 
 class EpisodeUnknownResponse:
-    """Response when no episode has been found."""
+    """
+    Response when no episode has been found.
+
+    The verdict stays the same from `valid_from` (inclusive) until
+    `valid_until` (exclusive). None means that the period is
+    unbounded on that end.
+    """
 
-    def __init__(self, sd_date_published: IsoDatetimeStr):
+    def __init__(self,
+                 sd_date_published: IsoDatetimeStr,
+                 valid_from: IsoDatetimeStr | None,
+                 valid_until: IsoDatetimeStr | None):
         self.verdict: Literal[Verdict.UNKNOWN] = Verdict.UNKNOWN
         self.sd_date_published = sd_date_published
+        self.valid_from = valid_from
+        self.valid_until = valid_until
 
 
 EpisodeCheckResponse = EpisodePresentResponse | EpisodeUnknownResponse
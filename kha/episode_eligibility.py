@@ -0,0 +1,102 @@
+"""Tracks which episodes are eligible as the next episode."""
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable
+from datetime import datetime
+from heapq import merge
+import operator
+
+from .episode import Episode
+
+_by_date_published = operator.attrgetter('date_published')
+
+
+class EpisodeEligibility:
+    """
+    Tracks which episodes are eligible as the next episode.
+    An episode is eligible if and only if:
+    1. it is not a rerun;
+    2. it is not a spinoff, or it is followed only by spinoffs.
+
+    The start date of the latest regular episode, the *pivot date*,
+    is kept up to date as episodes are added or removed, so that
+    nobody needs to scan all episodes to find it.
+    """
+
+    def __init__(self, episodes: Iterable[Episode] = ()):
+        self._regular_episodes: list[Episode] = []
+        self._spinoff_episodes: list[Episode] = []
+        for episode in episodes:
+            self.add(episode)
+
+    @property
+    def pivot_date(self) -> datetime | None:
+        """
+        Of all start dates of known episodes, the latest one,
+        ignoring reruns and spin-off episodes.
+        None if no such episode exists.
+        """
+        if not self._regular_episodes:
+            return None
+        return self._regular_episodes[-1].date_published
+
+    def add(self, episode: Episode) -> None:
+        """Takes an episode into account."""
+        if (episodes := self._episodes_like(episode)) is not None:
+            insort(episodes, episode, key=_by_date_published)
+
+    def remove(self, episode: Episode) -> None:
+        """
+        Stops taking a previously added episode into account.
+        Raises ValueError if the episode has not been added.
+        """
+        if (episodes := self._episodes_like(episode)) is None:
+            return
+        # Only the episodes that start at the same time need a look
+        for index in range(
+                bisect_left(episodes, episode.date_published,
+                            key=_by_date_published),
+                bisect_right(episodes, episode.date_published,
+                             key=_by_date_published)):
+            if episodes[index] is episode:
+                del episodes[index]
+                return
+        raise ValueError(f'{episode!r} has not been added')
+
+    def copy(self) -> 'EpisodeEligibility':
+        """
+        Returns an eligibility of the same episodes, which can be
+        changed without changing this one.
+        """
+        # pylint: disable=protected-access
+        copy = EpisodeEligibility()
+        copy._regular_episodes = self._regular_episodes.copy()
+        copy._spinoff_episodes = self._spinoff_episodes.copy()
+        return copy
+
+    def is_eligible(self, episode: Episode) -> bool:
+        """Checks whether the given episode is eligible."""
+        if episode.is_rerun:
+            return False
+        return not episode.is_spinoff \
+            or (pivot_date := self.pivot_date) is None \
+            or episode.date_published >= pivot_date
+
+    def eligible_episodes(self) -> list[Episode]:
+        """Returns all eligible episodes, sorted by start date."""
+        first_eligible_spinoff = 0 \
+            if (pivot_date := self.pivot_date) is None \
+            else bisect_left(self._spinoff_episodes, pivot_date,
+                             key=_by_date_published)
+        return list(merge(
+            self._regular_episodes,
+            self._spinoff_episodes[first_eligible_spinoff:],
+            key=_by_date_published,
+        ))
+
+    def _episodes_like(self, episode: Episode) -> list[Episode] | None:
+        if episode.is_rerun:
+            return None
+        if episode.is_spinoff:
+            return self._spinoff_episodes
+        return self._regular_episodes
@@ -2,7 +2,26 @@
 
 """Adds an episode."""
 
+from kha.episode import Episode
+from kha.episode_eligibility import EpisodeEligibility
 from kha.episode_patchers.patcher import Patcher
+from kha.local_types import EventsDict, Uuid
+
 
 class EpisodeAdder(Patcher):
-    """Adds an episode."""
+    """
+    Adds an episode. An episode that already has the same UUID is
+    replaced.
+    """
+
+    def __init__(self, uuid: Uuid, episode: Episode):
+        self.uuid = uuid
+        self.episode = episode
+
+    def apply(self, events_dict: EventsDict,
+              eligibility: EpisodeEligibility) -> None:
+        if (replaced := events_dict['episodes'].get(self.uuid)) \
+                is not None:
+            eligibility.remove(replaced)
+        events_dict['episodes'][self.uuid] = self.episode
+        eligibility.add(self.episode)
@@ -2,7 +2,21 @@
 
 """Replaces an existing episode."""
 
+from kha.episode import Episode
+from kha.episode_eligibility import EpisodeEligibility
 from kha.episode_patchers.patcher import Patcher
+from kha.local_types import EventsDict, Uuid
+
 
 class EpisodeReplacer(Patcher):
     """Replaces an existing episode."""
+
+    def __init__(self, uuid: Uuid, episode: Episode):
+        self.uuid = uuid
+        self.episode = episode
+
+    def apply(self, events_dict: EventsDict,
+              eligibility: EpisodeEligibility) -> None:
+        eligibility.remove(events_dict['episodes'][self.uuid])
+        events_dict['episodes'][self.uuid] = self.episode
+        eligibility.add(self.episode)
@@ -2,7 +2,14 @@
 
 """Patcher that does nothing."""
 
+from kha.episode_eligibility import EpisodeEligibility
 from kha.episode_patchers.patcher import Patcher
+from kha.local_types import EventsDict
+
 
 class NoopPatcher(Patcher):
     """Patcher that does nothing."""
+
+    def apply(self, events_dict: EventsDict,
+              eligibility: EpisodeEligibility) -> None:
+        pass
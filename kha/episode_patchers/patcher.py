@@ -2,5 +2,20 @@
 
 """Applies a patch to an EventDict."""
 
-class Patcher():
+from abc import ABC, abstractmethod
+
+from kha.episode_eligibility import EpisodeEligibility
+from kha.local_types import EventsDict
+
+
+class Patcher(ABC):
     """Applies a patch to an EventDict."""
+
+    @abstractmethod
+    def apply(self, events_dict: EventsDict,
+              eligibility: EpisodeEligibility) -> None:
+        """
+        Applies the patch to the given EventsDict, and updates the
+        eligibility of its episodes to match.
+        """
+        ...
@@ -0,0 +1,189 @@
+"""Episodes stored column by column, for large stores."""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from datetime import datetime, timezone as timezone_module, tzinfo
+from itertools import compress, islice
+import math
+import operator
+from typing import overload
+
+from .episode import Episode
+from .settings import USER_TIMEZONE
+
+FLAG_RERUN = 1
+FLAG_SPINOFF = 2
+
+# Translation tables from flags to eligibility: 1 if eligible.
+# Before the pivot date, only regular episodes are eligible;
+# from the pivot date on, spinoffs are eligible, too.
+_ELIGIBLE_BEFORE_PIVOT = bytes(
+    int(not flags & (FLAG_RERUN | FLAG_SPINOFF)) for flags in range(256))
+_ELIGIBLE_FROM_PIVOT = bytes(
+    int(not flags & FLAG_RERUN) for flags in range(256))
+
+
+class EpisodeTable(Sequence[Episode]):  # pylint: disable=too-many-instance-attributes
+    """
+    Episodes, sorted by start date, stored column by column:
+    start dates and dates of publication as UTC epoch seconds,
+    flag bits for reruns and spinoffs, names and episode numbers.
+
+    Behaves like a list of Episodes. Queries work on the columns,
+    so an Episode object is only created, or looked up, for the
+    rows that are actually returned.
+    """
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 episode_numbers: Sequence[int | str],
+                 names: Sequence[str],
+                 dates_published: 'array[int]',
+                 sd_dates_published: 'array[int]',
+                 flags: bytes,
+                 timezone: tzinfo = USER_TIMEZONE,
+                 episode_at: Callable[[int], Episode] | None = None):
+        """
+        Creates a table from the given columns, whose rows must be
+        sorted by start date.
+        If `episode_at` is given, it returns the existing Episode in
+        a given row; otherwise, Episodes are created from the columns
+        on first access.
+        """
+        if any(map(operator.gt, dates_published,  # pylint: disable=bad-builtin
+                   islice(dates_published, 1, None))):
+            raise ValueError('Rows must be sorted by start date')
+        self.episode_numbers = episode_numbers
+        self.names = names
+        self.dates_published = dates_published
+        self.sd_dates_published = sd_dates_published
+        self.flags = flags
+        self.timezone = timezone
+        self._episode_at = episode_at
+        self._episodes: list[Episode | None] = [None] * len(flags)
+
+    @classmethod
+    def from_episodes(cls,
+                      episodes: Iterable[Episode],
+                      timezone: tzinfo | None = None) \
+            -> 'EpisodeTable':
+        """
+        Creates a table that refers to the given Episodes, in the
+        given timezone, or else in the timezone the Episodes share.
+        Episodes without a timezone or in different timezones are
+        put in `USER_TIMEZONE`; their start dates stay the same
+        instants.
+        """
+        rows = sorted(episodes,
+                      key=operator.attrgetter('date_published'))
+        if timezone is None:
+            timezones = {episode.timezone for episode in rows}
+            timezone = timezones.pop() if len(timezones) == 1 else None
+        return cls(
+            [episode.episode_number for episode in rows],
+            [episode.name for episode in rows],
+            array('q', (epoch_seconds(episode.date_published)
+                        for episode in rows)),
+            array('q', (epoch_seconds(episode.sd_date_published)
+                        for episode in rows)),
+            bytes((FLAG_RERUN if episode.is_rerun else 0)
+                  | (FLAG_SPINOFF if episode.is_spinoff else 0)
+                  for episode in rows),
+            USER_TIMEZONE if timezone is None else timezone,
+            rows.__getitem__,
+        )
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    @overload
+    def __getitem__(self, index: int) -> Episode:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'EpisodeTable':
+        ...
+
+    def __getitem__(self, index: int | slice) \
+            -> 'Episode | EpisodeTable':
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+        if (episode := self._episodes[index]) is None:
+            episode = self._episodes[index] = \
+                self._episode_at(index % len(self)) \
+                if self._episode_at is not None \
+                else self._create_episode(index)
+        return episode
+
+    def __iter__(self) -> Iterator[Episode]:
+        return map(self.__getitem__, range(len(self)))  # pylint: disable=bad-builtin
+
+    def eligible(self) -> 'EpisodeTable':
+        """
+        Returns the eligible episodes in this table.
+        An episode is eligible if and only if:
+        1. it is not a rerun;
+        2. it is not a spinoff, or it is followed only by spinoffs.
+        """
+        pivot = 0 if (row := self.flags.rfind(0)) == -1 \
+            else bisect_left(self.dates_published,
+                             self.dates_published[row])
+        eligible = \
+            self.flags[:pivot].translate(_ELIGIBLE_BEFORE_PIVOT) \
+            + self.flags[pivot:].translate(_ELIGIBLE_FROM_PIVOT)
+        return self.take(compress(range(len(self)), eligible))
+
+    def index_of_first_from(self, instant: datetime) -> int:
+        """
+        Returns the index of the first episode that starts at or
+        after the given instant, or the length of this table if
+        there is no such episode.
+        """
+        return bisect_left(self.dates_published,
+                           epoch_seconds(instant))
+
+    def take(self, rows: Iterable[int]) -> 'EpisodeTable':
+        """
+        Returns a table with the given rows of this table, which
+        must be in ascending order. The new table shares its
+        Episodes with this table.
+        """
+        # map() avoids running Python code for each row
+        # pylint: disable=bad-builtin
+        selected = array('q', rows)
+        return EpisodeTable(
+            list(map(self.episode_numbers.__getitem__, selected)),
+            list(map(self.names.__getitem__, selected)),
+            array('q', map(self.dates_published.__getitem__, selected)),
+            array('q',
+                  map(self.sd_dates_published.__getitem__, selected)),
+            bytes(map(self.flags.__getitem__, selected)),
+            self.timezone,
+            lambda index: self[selected[index]],
+        )
+
+    def _create_episode(self, row: int) -> Episode:
+        flags = self.flags[row]
+        return Episode(
+            self.episode_numbers[row],
+            name=self.names[row],
+            date_published=datetime.fromtimestamp(
+                self.dates_published[row], timezone_module.utc),
+            sd_date_published=datetime.fromtimestamp(
+                self.sd_dates_published[row], timezone_module.utc),
+            is_rerun=bool(flags & FLAG_RERUN),
+            is_spinoff=bool(flags & FLAG_SPINOFF),
+            timezone=self.timezone,
+        )
+
+
+def epoch_seconds(instant: datetime, exact: bool = False) -> int:
+    """
+    Returns the given instant as whole UTC epoch seconds, the way
+    both tables and binary snapshots store it, rounded down.
+    Raises ValueError if `exact` is set and the instant has a
+    fraction of a second.
+    """
+    if exact and instant.microsecond:
+        raise ValueError(f'Unsupported fraction of a second in {instant}')
+    return math.floor(instant.timestamp())
@@ -0,0 +1,111 @@
+"""Eligible episodes, indexed by start date for fast lookups."""
+
+from collections.abc import Callable, Iterable
+from datetime import datetime, tzinfo
+
+from .episode import Episode
+from .episode_table import EpisodeTable
+from .reference_instant import ReferenceInstant, local_day_boundaries
+
+
+class EpisodeTimeline:
+    """
+    Immutable index of eligible episodes, sorted by start date.
+
+    The episodes are kept in an EpisodeTable, whose start dates are
+    a column of UTC epoch seconds, so that looking up the episode
+    for a given point in time is a binary search, regardless of the
+    number of episodes.
+
+    Days begin and end in the timezone of the episodes, as they do
+    for `Episode.runs_today_or_later`.
+
+    Build one timeline per version of the store and share it.
+    """
+
+    def __init__(self,
+                 eligible_episodes: EpisodeTable | Iterable[Episode],
+                 timezone: tzinfo | None = None):
+        """
+        Creates a timeline of the given episodes, whose days begin
+        and end in the given timezone, or else in the timezone of
+        the episodes; see `EpisodeTable.from_episodes`.
+        """
+        self._episodes = eligible_episodes \
+            if isinstance(eligible_episodes, EpisodeTable) \
+            else EpisodeTable.from_episodes(eligible_episodes, timezone)
+        self._timezone = self._episodes.timezone if timezone is None \
+            else timezone
+
+    @property
+    def episodes(self) -> EpisodeTable:
+        """The eligible episodes, sorted by start date."""
+        return self._episodes
+
+    @property
+    def timezone(self) -> tzinfo:
+        """
+        Timezone of the episodes, which determines where a day begins
+        and ends.
+        """
+        return self._timezone
+
+    def __len__(self) -> int:
+        return len(self._episodes)
+
+    def current_or_next(
+        self,
+        after: Callable[..., datetime] = datetime.now,
+    ) -> Episode | None:
+        """
+        Returns the current or next episode relative to a given
+        point in time, the *reference point*.
+        Returns None if no such episode can be found.
+
+        An episode is considered current as long as its start date
+        is at least on the same day as the reference point, in the
+        timezone of the episodes.
+        """
+        index = self._index_of_current_or_next(ReferenceInstant.of(after))
+        if index == len(self._episodes):
+            return None
+        return self._episodes[index]
+
+    def answer_validity(
+        self,
+        after: Callable[..., datetime] = datetime.now,
+    ) -> tuple[datetime | None, datetime | None]:
+        """
+        Returns the period of time, relative to a given reference
+        point, during which both the current or next episode and
+        whether it runs today stay the same.
+
+        The period starts at the end of the local day of the
+        previous episode and ends at the start of the local day of
+        the next episode. If the episode runs today, the period
+        is that day.
+        Either end may be None if there is no episode to bound it,
+        i.e. the answer has been the same since the beginning of
+        the store, or stays the same until the store changes.
+        """
+        reference = ReferenceInstant.of(after)
+        index = self._index_of_current_or_next(reference)
+        valid_from = None if index == 0 \
+            else self._local_day_of(index - 1)[1]
+        if index == len(self._episodes):
+            return valid_from, None
+        start_of_episode_day, end_of_episode_day = \
+            self._local_day_of(index)
+        if start_of_episode_day \
+                == reference.start_of_current_day(self._timezone):
+            return start_of_episode_day, end_of_episode_day
+        return valid_from, start_of_episode_day
+
+    def _index_of_current_or_next(self,
+                                  reference: ReferenceInstant) -> int:
+        return self._episodes.index_of_first_from(
+            reference.start_of_current_day(self._timezone))
+
+    def _local_day_of(self, index: int) -> tuple[datetime, datetime]:
+        return local_day_boundaries(datetime.fromtimestamp(
+            self._episodes.dates_published[index], self._timezone))
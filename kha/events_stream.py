@@ -0,0 +1,264 @@
+"""
+Incremental loading of the events JSON, one episode at a time.
+
+Only the episode being parsed is kept in memory, along with at
+most one chunk of input, so memory use stays bounded however large
+the events JSON grows.
+"""
+
+from collections.abc import Callable, Iterator
+import codecs
+from datetime import date, datetime, timezone as timezone_module, tzinfo
+import functools
+import json
+import re
+from typing import Any, Protocol, cast
+
+from .episode import Episode, EpisodeDict
+from .local_types import Uuid
+from .settings import USER_TIMEZONE
+
+CHUNK_SIZE = 64 * 1024
+EPISODE_SCHEMA_TYPE = 'Episode'
+EPISODES_PROPERTY = 'episodes'
+META_PROPERTY_TYPE = '@type'
+
+EpisodePredicate = Callable[[EpisodeDict], bool]
+"""Decides from its serialized form whether to load an episode."""
+
+_END_OBJECT = '}'
+_NON_WHITESPACE = re.compile(r'[^ \t\n\r]')
+# Key and colon, if the key is complete and has no escapes
+_PLAIN_KEY = re.compile(r'[ \t\n\r]*"([^"\\]*)"[ \t\n\r]*:')
+# Ends a literal, number or escape sequence that may be cut off
+_TOKEN_END = re.compile(r'[ \t\n\r,:\[\]{}"]')
+# Longest cut-off literal, number or escape sequence to read on
+# for, longer than any in a valid events JSON
+_MAX_PARTIAL_TOKEN_LENGTH = 64
+_UNTERMINATED_STRING = 'Unterminated string'
+
+
+class Readable(Protocol):  # pylint: disable=too-few-public-methods
+    """Binary stream, such as the body of an S3 response."""
+
+    def read(self, amt: int | None = ..., /) -> bytes:
+        """Reads up to `amt` bytes; returns b'' at the end."""
+
+
+def stream_episodes(body: Readable,
+                    predicate: EpisodePredicate | None = None,
+                    timezone: tzinfo = USER_TIMEZONE,
+                    chunk_size: int = CHUNK_SIZE) \
+        -> Iterator[tuple[Uuid, Episode]]:
+    """
+    Parses an events JSON from the given stream as it arrives, and
+    yields the UUID and the Episode of each episode, in the order
+    they are stored.
+
+    If a predicate is given, episodes for which it returns False
+    are skipped before an Episode is created.
+    Raises ValueError if the stream is not a valid events JSON.
+    """
+    reader = _JsonReader(body, chunk_size)
+    reader.expect('{')
+    for key in reader.members():
+        if key != EPISODES_PROPERTY:
+            reader.value()
+            continue
+        reader.expect('{')
+        for uuid in reader.members():
+            episode_dict = reader.value()
+            if predicate is None or predicate(episode_dict):
+                yield Uuid(uuid), episode_from_dict(episode_dict, timezone)
+    reader.expect_end()
+
+
+def episode_from_dict(episode_dict: EpisodeDict,
+                      timezone: tzinfo = USER_TIMEZONE) -> Episode:
+    """
+    Creates an Episode from its serialized form.
+    Raises RuntimeError if the object is not an episode.
+    """
+    if (schema_type := cast(dict[str, Any], episode_dict)
+            .get(META_PROPERTY_TYPE)) != EPISODE_SCHEMA_TYPE:
+        raise RuntimeError(f'Unknown type `{schema_type}`')
+    return Episode(
+        episode_dict['episodeNumber'],
+        name=episode_dict['name'],
+        date_published=datetime
+        .fromisoformat(episode_dict['datePublished'])
+        .astimezone(timezone_module.utc),
+        sd_date_published=datetime
+        .fromisoformat(episode_dict['sdDatePublished'])
+        .astimezone(timezone_module.utc),
+        is_rerun=episode_dict['isRerun'],
+        is_spinoff=episode_dict['isSpinoff'],
+        timezone=timezone,
+    )
+
+
+def episode_to_dict(episode: Episode) -> EpisodeDict:
+    """
+    Returns the serialized form of the given episode, which
+    `episode_from_dict` reads back.
+    """
+    return cast(EpisodeDict, {
+        META_PROPERTY_TYPE: EPISODE_SCHEMA_TYPE,
+        'episodeNumber': episode.episode_number,
+        'name': episode.name,
+        'datePublished': episode.local_date_published().isoformat(),
+        'sdDatePublished': episode.local_sd_date_published().isoformat(),
+        'isRerun': episode.is_rerun,
+        'isSpinoff': episode.is_spinoff,
+    })
+
+
+def published_on_or_after(day: date,
+                          timezone: tzinfo = USER_TIMEZONE) \
+        -> EpisodePredicate:
+    """
+    Returns a predicate that accepts episodes whose start date is
+    on the given local day or later.
+    """
+    def predicate(episode_dict: EpisodeDict) -> bool:
+        return datetime.fromisoformat(episode_dict['datePublished']) \
+            .astimezone(timezone).date() >= day
+    return predicate
+
+
+def not_rerun(episode_dict: EpisodeDict) -> bool:
+    """Predicate that accepts episodes that are not reruns."""
+    return not episode_dict['isRerun']
+
+
+class _JsonReader:
+    """
+    Reads JSON tokens and values from a binary stream, pulling in
+    more input only when the buffered input runs out.
+    """
+
+    def __init__(self, body: Readable, chunk_size: int):
+        self._chunks = iter(functools.partial(body.read, chunk_size), b'')
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._at_end = False
+
+    def expect(self, token: str) -> None:
+        """Consumes the given single-character token."""
+        if self._peek() != token:
+            raise ValueError(f'Expected {token!r} at {self._describe()}')
+        self._position += 1
+
+    def expect_end(self) -> None:
+        """Makes sure there is nothing but whitespace left."""
+        if self._peek():
+            raise ValueError(f'Extra data at {self._describe()}')
+
+    def members(self) -> Iterator[str]:
+        """
+        Yields the key of each member of an object whose opening
+        brace has been consumed, positioned before its value.
+        The value must be consumed before the next key is read.
+        Consumes the closing brace.
+        """
+        if self._peek() == _END_OBJECT:
+            self._position += 1
+            return
+        while True:  # pylint: disable=while-used
+            if (match := _PLAIN_KEY.match(
+                    self._buffer, self._position)) is not None:
+                # Fast path for keys without escapes, such as UUIDs
+                key = match[1]
+                self._position = match.end()
+            else:
+                if not isinstance(key := self.value(), str):
+                    raise ValueError(
+                        f'Expected a key at {self._describe()}')
+                self.expect(':')
+            yield key
+            if self._peek() == _END_OBJECT:
+                self._position += 1
+                return
+            self.expect(',')
+
+    def value(self) -> Any:
+        """Parses and consumes a complete JSON value."""
+        self._peek()
+        if (decoded := self._decode()) is not None:
+            return decoded[0]
+        for _ in self._more_input():
+            if (decoded := self._decode()) is not None:
+                return decoded[0]
+        raise ValueError(f'Unexpected end of input at {self._describe()}')
+
+    def _decode(self) -> tuple[Any] | None:
+        """
+        Consumes the value at the current position and returns it,
+        or returns None if the value is cut off at the end of the
+        buffered input.
+        Raises ValueError if the value is malformed, without reading
+        further input.
+        """
+        try:
+            value, end = self._json_decoder.raw_decode(
+                self._buffer, self._position)
+        except json.JSONDecodeError as error:
+            if self._at_end or not self._is_cut_off(error):
+                raise ValueError(str(error)) from error
+            return None
+        # A number at the end of the buffer may continue
+        if end == len(self._buffer) and not self._at_end:
+            return None
+        self._position = end
+        return (value,)
+
+    def _is_cut_off(self, error: json.JSONDecodeError) -> bool:
+        """
+        Returns whether the given error may be down to the buffered
+        input ending in the middle of the value: in a string, or in
+        a short literal, number or escape sequence.
+        """
+        if error.msg.startswith(_UNTERMINATED_STRING):
+            return True
+        return len(self._buffer) - error.pos <= _MAX_PARTIAL_TOKEN_LENGTH \
+            and _TOKEN_END.search(self._buffer, error.pos) is None
+
+    def _peek(self) -> str:
+        """
+        Skips whitespace and returns the next character, or an
+        empty string at the end of the stream.
+        """
+        if (match := _NON_WHITESPACE.search(
+                self._buffer, self._position)) is None:
+            for _ in self._more_input():
+                if (match := _NON_WHITESPACE.search(
+                        self._buffer, self._position)) is not None:
+                    break
+            else:
+                self._position = len(self._buffer)
+                return ''
+        self._position = match.start()
+        return self._buffer[self._position]
+
+    def _more_input(self) -> Iterator[None]:
+        """
+        Yields after each chunk of input that is appended, until
+        the stream ends. Consumed input is dropped whenever a chunk
+        is appended.
+        """
+        for chunk in self._chunks:
+            self._append(self._decoder.decode(chunk))
+            yield
+        if not self._at_end:
+            self._at_end = True
+            self._append(self._decoder.decode(b'', final=True))
+            yield
+
+    def _append(self, text: str) -> None:
+        self._buffer = self._buffer[self._position:] + text
+        self._position = 0
+
+    def _describe(self) -> str:
+        return repr(self._buffer[self._position:self._position + 20])
@@ -3,6 +3,11 @@ Factory methods for transforming an EpisodeCheckResponse into a
 context dict for rendering the HTML template.
 """
 
+from datetime import datetime
+import json
+
+import flask
+
 from kha.formatters.episode_check_response_formatter \
     import EpisodeCheckResponseFormatter
 from kha.formatters.episode_present_response_formatter \
@@ -12,6 +17,11 @@ from kha.formatters.episode_unknown_response_formatter \
 
 from .episode_check_response \
     import EpisodePresentResponse, EpisodeUnknownResponse
+from .reference_instant import ReferenceInstant
+from .rendered_page_cache \
+    import PageKey, REACTION_PLACEHOLDER, RenderedPage, \
+    SD_DATE_PUBLISHED_PLACEHOLDER
+from .settings import USER_TIMEZONE
 
 
 def formatter_for(
@@ -24,3 +34,78 @@ def formatter_for(
     if isinstance(response, EpisodePresentResponse):
         return EpisodePresentResponseFormatter(response)
     return EpisodeUnknownResponseFormatter(response)
+
+
+def page_key(
+        response: EpisodePresentResponse | EpisodeUnknownResponse,
+        store_version: str,
+        reference: ReferenceInstant,
+) -> PageKey:
+    """
+    Returns the key under which the page for the given response
+    is cached. Responses with the same key render the same page,
+    apart from the reaction and the moment of the request.
+    """
+    return (
+        store_version,
+        reference.local(USER_TIMEZONE).date(),
+        response.verdict,
+        (response.episode_number, response.start_date)
+        if isinstance(response, EpisodePresentResponse) else None,
+    )
+
+
+def page_expires_at(
+        response: EpisodePresentResponse | EpisodeUnknownResponse,
+        reference: ReferenceInstant,
+) -> datetime:
+    """
+    Returns when the page for the given response expires: when the
+    response stops being valid, as given by its `valid_until`, but
+    no later than the end of the local day, when the date on the
+    page changes.
+    """
+    end_of_day = reference.start_of_next_day(USER_TIMEZONE)
+    if response.valid_until is None:
+        return end_of_day
+    return min(end_of_day, datetime.fromisoformat(response.valid_until))
+
+
+def render_page(
+        formatter: EpisodeCheckResponseFormatter,
+        reference: ReferenceInstant,
+        expires_at: datetime | None = None,
+) -> RenderedPage:
+    """
+    Renders the main page for caching. The page expires at the
+    given instant, as returned by `page_expires_at`, or else when
+    the local day is over.
+    The reaction and the moment of the request, both in the page
+    and in its structured data, are left for each request to fill
+    in.
+    """
+    context = formatter.to_context()
+    # Swapped in after the structured data has been serialized, as
+    # serializing would escape the placeholder
+    context['faq_page_seo_json'] = context['faq_page_seo_json'].replace(
+        _sd_date_published_member(context['iso_sd_date_published']),
+        _sd_date_published_member(SD_DATE_PUBLISHED_PLACEHOLDER,
+                                  ensure_ascii=False))
+    return RenderedPage(
+        flask.render_template(
+            'main.template.html',
+            **(context | {
+                'iso_sd_date_published': SD_DATE_PUBLISHED_PLACEHOLDER,
+                'reaction': REACTION_PLACEHOLDER,
+            }),
+        ),
+        expires_at=reference.start_of_next_day(USER_TIMEZONE)
+        if expires_at is None else expires_at,
+    )
+
+
+def _sd_date_published_member(value: str,
+                              ensure_ascii: bool = True) -> str:
+    """Returns the `sdDatePublished` member as serialized in JSON."""
+    return json.dumps({'sdDatePublished': value},
+                      ensure_ascii=ensure_ascii)[1:-1]
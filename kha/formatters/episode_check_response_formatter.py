@@ -60,6 +60,17 @@ class EpisodeCheckResponseFormatter(ABC):
         """
         ...
 
+    def random_reaction(self, seed: int | None = None) -> Reaction:
+        """
+        A reaction that fits the verdict, picked at random.
+        The same seed always picks the same reaction.
+        """
+        reactions = POSITIVE_REACTIONS if self.positive \
+            else NEGATIVE_REACTIONS
+        if seed is None:
+            return Reaction(random.choice(reactions))
+        return Reaction(random.Random(seed).choice(reactions))
+
     @abstractmethod
     def short_explanation(self) -> Markup:
         """A sentence that explains the verdict."""
@@ -96,11 +107,6 @@ class EpisodeCheckResponseFormatter(ABC):
                 hour=0, minute=0, second=0, microsecond=0)
         )
 
-    def _random_reaction(self) -> Reaction:
-        return Reaction(random.choice(POSITIVE_REACTIONS
-                                      if self.positive
-                                      else NEGATIVE_REACTIONS))
-
     def _formatted_sd_date_published(self) -> HumanReadableDatetime:
         return HumanReadableDatetime(
             # pylint: disable=no-member
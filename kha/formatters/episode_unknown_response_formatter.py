@@ -51,7 +51,7 @@ class EpisodeUnknownResponseFormatter(EpisodeCheckResponseFormatter):
             'iso_sd_date_published': self.iso_sd_date_published,
             'formatted_sd_date_published':
             self._formatted_sd_date_published(),
-            'reaction': self._random_reaction(),
+            'reaction': self.random_reaction(),
         }
 
     def verdict_statement(self) -> str:
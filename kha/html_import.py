@@ -0,0 +1,123 @@
+"""Offline import of archived EPG pages into one events file."""
+
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import uuid
+
+from .episode import Episode
+from .events_stream import EPISODES_PROPERTY, episode_to_dict
+from .scrape_runner import merge_episodes
+from .scraper import scrape_wunschliste
+
+HTML_SUFFIX = '.html'
+# Files that each worker parses per round trip to the pool, so the
+# overhead of a round trip is spread across several files
+FILES_PER_TASK = 64
+
+# Derives the UUID of an imported episode from its domain key, so
+# imports of the same pages are identical
+_EPISODE_UUID_NAMESPACE = uuid.UUID('0F6E2B1C-5F0B-4E55-9C2E-6A4D8E3C1B7A')
+
+ParsedFile = tuple[list[Episode], str | None]
+"""Episodes parsed from a file, or the error that parsing it raised."""
+
+
+def import_html(*dirs: str,
+                out: str = 'events.kha.json',
+                max_workers: int | None = None) -> None:
+    """
+    Parses the archived wunschliste EPG pages, i.e. `*.html` files,
+    in the given directories and their subdirectories, and writes
+    the episodes to a single events file `out`.
+
+    Files are parsed in parallel across a process pool. Each
+    episode is dated as published when its file was last modified.
+    Of the episodes with the same domain key, only the earliest
+    broadcast is kept. Files that cannot be parsed are reported
+    and skipped.
+    Prints how many files and episodes have been processed per
+    second.
+    """
+    start = time.perf_counter()
+    paths = sorted(html_files(dirs))
+    episode_lists: list[list[Episode]] = []
+    failed = 0
+    for path, (episodes, error) in zip(paths, _parse_files(
+            paths, max_workers)):
+        if error is not None:
+            failed += 1
+            print(f'Skipped {path}: {error}', file=sys.stderr)
+        episode_lists.append(episodes)
+    merged = merge_episodes(episode_lists)
+    Path(out).write_text(events_json(merged), encoding='utf-8')
+
+    elapsed = time.perf_counter() - start
+    parsed = sum(len(episodes) for episodes in episode_lists)
+    print(f'{len(paths)} files ({failed} skipped),'
+          f' {parsed} episodes ({len(merged)} unique) written to {out}'
+          f' in {elapsed:.2f} s:'
+          f' {len(paths) / elapsed:.0f} files/s,'
+          f' {parsed / elapsed:.0f} episodes/s')
+
+
+def html_files(dirs: Iterable[str]) -> Iterator[Path]:
+    """
+    Yields the `*.html` files in the given directories and their
+    subdirectories. Raises FileNotFoundError if a directory does
+    not exist.
+    """
+    for directory in (Path(name) for name in dirs):
+        if not directory.is_dir():
+            raise FileNotFoundError(f'No directory {directory}')
+        yield from (path for path in directory.rglob(f'*{HTML_SUFFIX}')
+                    if path.is_file())
+
+
+def events_json(episodes: Iterable[Episode]) -> str:
+    """
+    Returns the events JSON with the given episodes, each under a
+    UUID derived from its domain key.
+    """
+    return json.dumps({EPISODES_PROPERTY: {
+        str(uuid.uuid5(_EPISODE_UUID_NAMESPACE,
+                       repr(episode.domain_key))).upper():
+        episode_to_dict(episode)
+        for episode in episodes
+    }}, indent=2, ensure_ascii=False) + '\n'
+
+
+def parse_file(path: Path) -> ParsedFile:
+    """
+    Parses the given EPG page. Returns its episodes, or else the
+    error that parsing it raised.
+    """
+    sd_date_published = datetime.fromtimestamp(
+        path.stat().st_mtime, timezone.utc).replace(microsecond=0)
+    try:
+        return list(scrape_wunschliste(
+            path.read_text(encoding='utf-8', errors='replace'),
+            sd_date_published=sd_date_published)), None
+    except RuntimeError as error:
+        return [], str(error)
+
+
+def _parse_files(paths: list[Path],
+                 max_workers: int | None) -> Iterator[ParsedFile]:
+    """
+    Parses the given files across a process pool, and yields the
+    outcome for each file in order.
+    """
+    if not paths:
+        return
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(
+            parse_file, paths,
+            chunksize=max(1, min(FILES_PER_TASK,
+                                 len(paths) // workers)))
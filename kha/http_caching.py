@@ -0,0 +1,90 @@
+"""HTTP validators and expiry headers for cacheable pages."""
+
+from datetime import datetime, timezone
+import hashlib
+import math
+
+import flask
+from werkzeug.http import is_resource_modified
+
+from .reference_instant import ReferenceInstant
+from .rendered_page_cache import PageKey
+from .settings import USER_TIMEZONE
+from .store_snapshot import SnapshotSource, StoreSnapshot
+
+
+class CacheValidators:
+    """
+    Validators and expiry of a page, as sent in HTTP headers.
+    Lets clients and CDNs reuse a page until it expires, and
+    revalidate it cheaply afterwards.
+    Without a modification date, pages are only revalidated by
+    their ETag.
+    """
+
+    def __init__(self,
+                 etag: str,
+                 last_modified: datetime | None,
+                 expires_at: datetime):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def not_modified(self, request: flask.Request) -> bool:
+        """
+        Checks whether the client already has the current version,
+        according to the request’s `If-None-Match` or, if there is
+        a modification date, `If-Modified-Since` header.
+        """
+        return not is_resource_modified(
+            request.environ,
+            etag=self.etag,
+            last_modified=self.last_modified,
+        )
+
+    def apply(self, response: flask.Response, now: datetime) \
+            -> flask.Response:
+        """
+        Adds validators and expiry headers to the given response and
+        returns it.
+        """
+        response.set_etag(self.etag)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        response.expires = self.expires_at
+        response.cache_control.public = True
+        response.cache_control.max_age = max(
+            0, math.floor((self.expires_at - now).total_seconds()))
+        return response
+
+
+def validators_for(  # pylint: disable=too-many-arguments
+    key: PageKey,
+    snapshot: StoreSnapshot,
+    reference: ReferenceInstant,
+    expires_at: datetime | None = None,
+    source: SnapshotSource = SnapshotSource.STORE,
+) -> CacheValidators:
+    """
+    Returns validators for the page with the given key.
+    The ETag is derived from the key, so it changes whenever any
+    input of the page changes. The page expires at the given
+    instant, as returned by `kha.format.page_expires_at`, or else
+    at the end of the local day.
+
+    A snapshot that has not come from the store, but is a fallback,
+    may be older than pages the client has already received from
+    the store, so its pages get no modification date and are only
+    revalidated by their ETag.
+    """
+    start_of_day = reference.start_of_current_day(USER_TIMEZONE)
+    return CacheValidators(
+        etag=hashlib.sha256(repr(key).encode()).hexdigest()[:32],
+        last_modified=max(
+            start_of_day,
+            snapshot.last_modified or start_of_day,
+        ).astimezone(timezone.utc).replace(microsecond=0)
+        if source is SnapshotSource.STORE else None,
+        expires_at=reference.start_of_next_day(USER_TIMEZONE)
+        if expires_at is None else expires_at,
+    )
@@ -1,5 +1,6 @@
 """Package-scoped type annotations."""
 
+from collections.abc import MutableMapping
 from datetime import datetime
 from typing import Literal, NewType, TypedDict
 
@@ -19,7 +20,29 @@ Uuid = NewType('Uuid', str)
 
 class EventsDict(TypedDict):
     """Top-level dictionary."""
-    episodes: dict[Uuid, Episode]
+    episodes: MutableMapping[Uuid, Episode]
+
+
+class TransitionsDict(TypedDict):
+    """Serialization structure for a TransitionTable."""
+    eventsMd5: str
+    transitions: list[tuple[str | None, str, str | None]]
+
+
+class ShardDict(TypedDict):
+    """Manifest entry for the shard of a single broadcast year."""
+    year: int
+    key: str
+    etag: str
+    firstDatePublished: str
+    lastDatePublished: str
+    lastRegularDatePublished: str | None
+    lastEligibleDatePublished: str | None
+
+
+class EventsManifestDict(TypedDict):
+    """Manifest of a sharded events store."""
+    shards: list[ShardDict]
 
 
 class PageContextDict(TypedDict):
@@ -0,0 +1,229 @@
+"""Static pre-rendering of the main page for upcoming days."""
+
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+import functools
+import hashlib
+import json
+import locale
+from pathlib import Path
+from typing import Any, TypedDict
+
+import flask
+
+from . import api
+from .episode_check_response import EpisodeCheckResponse
+from .format import formatter_for, render_page
+from .reference_instant import ReferenceInstant
+from .settings import PACKAGE_ROOT, USER_LOCALE, USER_TIMEZONE
+from .storage_backends import StorageBackend
+from .store_snapshot import StoreSnapshot
+
+MANIFEST_FILENAME = 'manifest.json'
+TEMPLATES_PATH = PACKAGE_ROOT / 'templates'
+
+PendingDay = tuple[date, EpisodeCheckResponse, str]
+"""Local date, response, and digest of the inputs of the page."""
+
+
+class PrerenderedDayDict(TypedDict):
+    """Manifest entry for the page of a single day."""
+    file: str
+    verdict: str
+    sha256: str
+    inputSha256: str
+
+
+class PrerenderManifestDict(TypedDict):
+    """Manifest of a directory of pre-rendered pages."""
+    storeVersion: str
+    days: dict[str, PrerenderedDayDict]
+
+
+def prerender(days: int = 7,
+              out: str = 'prerendered',
+              backend: StorageBackend | None = None,
+              max_workers: int | None = None,
+              now: Callable[..., datetime] = datetime.now) -> None:
+    """
+    Renders the main page for each local day in a window of `days`
+    days, starting today, into one HTML file per day in the `out`
+    directory, and writes a manifest next to them.
+
+    Days whose inputs have not changed since the previous run, as
+    recorded in the manifest, are not rendered again. Days whose
+    rendered page has the same content hash as before are not
+    written again. The remaining days are rendered in parallel
+    across a process pool.
+    """
+    out_path = Path(out)
+    out_path.mkdir(parents=True, exist_ok=True)
+    snapshot = api.snapshot_from_store(backend)
+    previous_days = _previous_days(out_path)
+    entries, pending = _reuse_unchanged(
+        _days_to_render(snapshot, ReferenceInstant.of(now), days),
+        previous_days, out_path)
+
+    written = 0
+    for day, entry, html in _render_days(pending, max_workers):
+        entries[day.isoformat()] = entry
+        if _write_if_changed(out_path / entry['file'], html,
+                             previous_days.get(day.isoformat())):
+            written += 1
+
+    manifest: PrerenderManifestDict = {
+        'storeVersion': snapshot.version,
+        'days': dict(sorted(entries.items())),
+    }
+    (out_path / MANIFEST_FILENAME).write_text(
+        json.dumps(manifest, indent=2) + '\n', encoding='utf-8')
+    print(f'{days} days, {len(pending)} rendered, {written} written'
+          f' to {out_path}')
+
+
+def _days_to_render(snapshot: StoreSnapshot,
+                    reference: ReferenceInstant,
+                    days: int) -> Iterator[PendingDay]:
+    """
+    Yields the response for each day in the window, starting on
+    the day of the reference point, along with a digest of all
+    inputs that determine the rendered page.
+    """
+    templates_digest = _templates_digest()
+    first_day = reference.local(USER_TIMEZONE).date()
+    for day in (first_day + timedelta(days=offset)
+                for offset in range(days)):
+        response = api.check(
+            now=_start_of(day),
+            timeline=snapshot.timeline,
+            transitions=snapshot.transitions,
+        )
+        yield day, response, _sha256(json.dumps(
+            [templates_digest, _rendered_fields(response)]))
+
+
+def _reuse_unchanged(
+    candidates: Iterable[PendingDay],
+    previous_days: dict[str, PrerenderedDayDict],
+    out_path: Path,
+) -> tuple[dict[str, PrerenderedDayDict], list[PendingDay]]:
+    """
+    Splits the given days into those whose inputs are unchanged
+    since the previous run, which keep their manifest entries, and
+    those that need to be rendered.
+    """
+    entries: dict[str, PrerenderedDayDict] = {}
+    pending: list[PendingDay] = []
+    for day, response, input_digest in candidates:
+        previous = previous_days.get(day.isoformat())
+        if previous is not None \
+                and previous['inputSha256'] == input_digest \
+                and (out_path / previous['file']).is_file():
+            entries[day.isoformat()] = previous
+        else:
+            pending.append((day, response, input_digest))
+    return entries, pending
+
+
+def _render_days(
+    pending: list[PendingDay],
+    max_workers: int | None,
+) -> Iterator[tuple[date, PrerenderedDayDict, str]]:
+    """
+    Renders the pages for the given days across a process pool.
+    Yields the day, its manifest entry and its HTML.
+    """
+    if not pending:
+        return
+    with ProcessPoolExecutor(max_workers,
+                             initializer=_initialize_worker,
+                             initargs=(USER_LOCALE,)) as executor:
+        pages = executor.map(
+            _render_day,
+            [day for day, _, _ in pending],
+            [response for _, response, _ in pending],
+        )
+        for (day, response, input_digest), html in zip(pending, pages):
+            yield day, {
+                'file': f'{day.isoformat()}.html',
+                'verdict': response.verdict.name,
+                'sha256': _sha256(html),
+                'inputSha256': input_digest,
+            }, html
+
+
+def _write_if_changed(path: Path,
+                      html: str,
+                      previous: PrerenderedDayDict | None) -> bool:
+    """
+    Writes the given page unless the file already has the same
+    content hash, according to the previous manifest entry.
+    Returns whether the file has been written.
+    """
+    if previous is not None and previous['sha256'] == _sha256(html) \
+            and path.is_file():
+        return False
+    path.write_text(html, encoding='utf-8')
+    return True
+
+
+def _start_of(day: date) -> ReferenceInstant:
+    return ReferenceInstant(
+        lambda: datetime.combine(day, time(), tzinfo=USER_TIMEZONE))
+
+
+def _previous_days(out_path: Path) -> dict[str, PrerenderedDayDict]:
+    try:
+        manifest: PrerenderManifestDict = json.loads(
+            (out_path / MANIFEST_FILENAME).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+    return manifest['days']
+
+
+def _rendered_fields(response: EpisodeCheckResponse) -> dict[str, Any]:
+    """
+    Returns the fields of a response that end up on the page.
+    The validity period does not.
+    """
+    return {
+        name: value for name, value in response.__dict__.items()
+        if name not in ('valid_from', 'valid_until')
+    }
+
+
+def _templates_digest() -> str:
+    digest = hashlib.sha256()
+    for path in sorted(TEMPLATES_PATH.glob('*.html')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _initialize_worker(locale_name: str) -> None:
+    locale.setlocale(locale.LC_ALL, locale_name)
+
+
+@functools.cache
+def _worker_app() -> flask.Flask:
+    app = flask.Flask('kha')
+    app.add_url_rule('/site.webmanifest', 'webmanifest')
+    return app
+
+
+def _render_day(day: date, response: EpisodeCheckResponse) -> str:
+    """
+    Renders the page for the given day the same way the server
+    does, with a reaction that is the same whenever the day is
+    rendered.
+    """
+    with _worker_app().test_request_context('/'):
+        formatter = formatter_for(response)
+        return render_page(formatter, _start_of(day)).filled_in(
+            formatter.random_reaction(seed=day.toordinal()),
+            formatter.iso_sd_date_published)
@@ -0,0 +1,84 @@
+"""Point in time that a request refers to, resolved only once."""
+
+from collections.abc import Callable
+from datetime import datetime, timezone as timezone_module, tzinfo
+
+from dateutil.relativedelta import relativedelta
+
+DayBoundaries = tuple[datetime, datetime]
+"""Start of the current and start of the next day, in UTC."""
+
+
+class ReferenceInstant:
+    """
+    Point in time that a request refers to, resolved only once.
+
+    Calling a ReferenceInstant returns that point in time, so it
+    can stand in for `datetime.now` wherever a Callable is expected.
+    The boundaries of the local day are computed at most once per
+    timezone and then reused, which keeps a single response
+    internally consistent and avoids repeating the same datetime
+    arithmetic for every episode.
+    """
+
+    def __init__(self, now: Callable[..., datetime] = datetime.now):
+        self._instant = now()
+        self._local_instants: dict[tzinfo | None, datetime] = {}
+        self._day_boundaries: dict[tzinfo | None, DayBoundaries] = {}
+
+    @classmethod
+    def of(cls, now: Callable[..., datetime]) -> 'ReferenceInstant':
+        """
+        Returns the given ReferenceInstant as is, or resolves the
+        given Callable into a new ReferenceInstant.
+        """
+        if isinstance(now, ReferenceInstant):
+            return now
+        return cls(now)
+
+    def __call__(self) -> datetime:
+        return self._instant
+
+    def local(self, timezone: tzinfo | None) -> datetime:
+        """Returns the reference point in the given timezone."""
+        if (local_instant := self._local_instants.get(timezone)) \
+                is None:
+            local_instant = self._local_instants[timezone] = \
+                self._instant.astimezone(timezone)
+        return local_instant
+
+    def start_of_current_day(self, timezone: tzinfo | None) \
+            -> datetime:
+        """
+        Returns the start of the current day in the given timezone,
+        converted to UTC.
+        """
+        return self._boundaries(timezone)[0]
+
+    def start_of_next_day(self, timezone: tzinfo | None) -> datetime:
+        """
+        Returns the start of the next day in the given timezone,
+        converted to UTC.
+        """
+        return self._boundaries(timezone)[1]
+
+    def _boundaries(self, timezone: tzinfo | None) -> DayBoundaries:
+        if (boundaries := self._day_boundaries.get(timezone)) is None:
+            boundaries = self._day_boundaries[timezone] = \
+                local_day_boundaries(self.local(timezone))
+        return boundaries
+
+
+def local_day_boundaries(local_instant: datetime) -> DayBoundaries:
+    """
+    Returns the start of the day and the start of the next day for
+    the given datetime, in its own timezone, converted to UTC.
+    """
+    return (
+        (local_instant + relativedelta(
+            hour=0, minute=0, second=0, microsecond=0))
+        .astimezone(timezone_module.utc),
+        (local_instant + relativedelta(
+            days=+1, hour=0, minute=0, second=0, microsecond=0))
+        .astimezone(timezone_module.utc),
+    )
@@ -0,0 +1,95 @@
+"""Cache for rendered HTML pages."""
+
+from datetime import date, datetime
+import re
+import threading
+
+from markupsafe import escape
+
+from .verdict import Verdict
+
+REACTION_PLACEHOLDER = '\N{OBJECT REPLACEMENT CHARACTER}reaction'
+"""Stands in for the reaction while a page is rendered for caching."""
+
+SD_DATE_PUBLISHED_PLACEHOLDER = \
+    '\N{OBJECT REPLACEMENT CHARACTER}sdDatePublished'
+"""
+Stands in for the moment of the request while a page is rendered
+for caching.
+"""
+
+_PLACEHOLDER_PATTERN = re.compile(
+    f'({re.escape(REACTION_PLACEHOLDER)}'
+    f'|{re.escape(SD_DATE_PUBLISHED_PLACEHOLDER)})')
+
+PageKey = tuple[str, date, Verdict, tuple[int | str, str] | None]
+"""
+Store version, local date, verdict, and episode number and start
+date of the episode the verdict refers to, if any.
+"""
+
+
+class RenderedPage:  # pylint: disable=too-few-public-methods
+    """
+    A rendered HTML page, with slots for a reaction and for the
+    moment of the request, which change from request to request.
+    """
+
+    def __init__(self, html: str, expires_at: datetime):
+        # Text at even indices, placeholders at odd indices
+        self._parts = _PLACEHOLDER_PATTERN.split(html)
+        self.expires_at = expires_at
+
+    def filled_in(self, reaction: str, iso_sd_date_published: str) -> str:
+        """
+        Returns the page with the given reaction and ISO datetime of
+        the request filled in.
+        """
+        values = {
+            REACTION_PLACEHOLDER: str(escape(reaction)),
+            SD_DATE_PUBLISHED_PLACEHOLDER:
+            str(escape(iso_sd_date_published)),
+        }
+        return ''.join(values[part] if index % 2 else part
+                       for index, part in enumerate(self._parts))
+
+
+class RenderedPageCache:
+    """
+    Thread-safe cache for rendered pages.
+
+    Each page expires at the first instant its content could
+    change. Expired pages are dropped whenever a page is added.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pages: dict[PageKey, RenderedPage] = {}
+
+    def get(self, key: PageKey, now: datetime) -> RenderedPage | None:
+        """
+        Returns the cached page for the given key, or None if there
+        is no such page or if it has expired.
+        """
+        with self._lock:
+            page = self._pages.get(key)
+        if page is None or page.expires_at <= now:
+            return None
+        return page
+
+    def put(self, key: PageKey, page: RenderedPage, now: datetime) \
+            -> RenderedPage:
+        """Caches the given page and returns it."""
+        with self._lock:
+            self._pages = {
+                other_key: other_page
+                for other_key, other_page in self._pages.items()
+                if other_page.expires_at > now
+            }
+            self._pages[key] = page
+        return page
+
+    def clear(self) -> None:
+        """Drops all cached pages."""
+        with self._lock:
+            self._pages.clear()
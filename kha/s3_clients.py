@@ -0,0 +1,156 @@
+"""Shared S3 clients, created lazily and reused for the whole process."""
+
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+import threading
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from mypy_boto3_s3.client import S3Client
+from mypy_boto3_s3.type_defs import GetObjectOutputTypeDef
+
+from .settings import S3_CONNECT_TIMEOUT_SECONDS, S3_ENDPOINT_URL, \
+    S3_MAX_ATTEMPTS, S3_MAX_POOL_CONNECTIONS, S3_READ_TIMEOUT_SECONDS
+from .storage_backends import ObjectVersion, StorageBackend, StoredObject
+
+ClientConfigKey = tuple[str | None, str | None]
+"""AWS profile name and endpoint URL that a client is bound to."""
+
+_clients: dict[ClientConfigKey, S3Client] = {}
+_clients_lock = threading.Lock()
+
+
+def s3_client(profile_name: str | None = None,
+              endpoint_url: str | None = S3_ENDPOINT_URL) -> S3Client:
+    """
+    Returns an S3 client for the given AWS profile and endpoint.
+
+    The client is created on first use and then kept for the
+    lifetime of the process, so credentials and endpoint data are
+    resolved only once and its HTTP connections are kept alive
+    between requests. S3 clients are thread-safe, so callers may
+    share the result freely.
+    Requests time out and give up retrying as set in
+    `S3_CONNECT_TIMEOUT_SECONDS`, `S3_READ_TIMEOUT_SECONDS` and
+    `S3_MAX_ATTEMPTS`.
+    """
+    config_key = (profile_name, endpoint_url)
+    with _clients_lock:
+        if (client := _clients.get(config_key)) is None:
+            client = _clients[config_key] = boto3.Session(
+                profile_name=profile_name,
+            ).client(
+                's3',
+                endpoint_url=endpoint_url,
+                config=Config(
+                    connect_timeout=S3_CONNECT_TIMEOUT_SECONDS,
+                    read_timeout=S3_READ_TIMEOUT_SECONDS,
+                    retries={
+                        'total_max_attempts': S3_MAX_ATTEMPTS,
+                        'mode': 'standard',
+                    },
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True,
+                    s3={'addressing_style': 'path'}
+                    if endpoint_url else None,
+                ),
+            )
+        return client
+
+
+def clear_s3_clients() -> None:
+    """
+    Forgets all shared clients, e.g. after credentials or the
+    endpoint configuration have changed.
+    """
+    with _clients_lock:
+        _clients.clear()
+
+
+def get_object_or_none(client: S3Client, bucket: str, key: str) \
+        -> GetObjectOutputTypeDef | None:
+    """
+    Downloads the given object. Returns None if there is no such
+    object.
+    """
+    try:
+        return client.get_object(Bucket=bucket, Key=key)
+    except ClientError as error:
+        if error.response.get('Error', {}).get('Code') \
+                in ('NoSuchKey', str(int(HTTPStatus.NOT_FOUND))):
+            return None
+        raise
+
+
+def head_object_or_none(client: S3Client, bucket: str, key: str) \
+        -> ObjectVersion | None:
+    """
+    Returns the metadata of the given object. Returns None if there
+    is no such object.
+    """
+    try:
+        response = client.head_object(Bucket=bucket, Key=key)
+    except ClientError as error:
+        if error.response.get('Error', {}).get('Code') \
+                in ('NoSuchKey', str(int(HTTPStatus.NOT_FOUND))):
+            return None
+        raise
+    return ObjectVersion(response.get('ETag'), response.get('LastModified'))
+
+
+class S3Backend(StorageBackend):
+    """
+    Serves objects from an S3 bucket.
+
+    Uses the given client, or else the shared client from
+    `s3_client`, which is created on first use.
+    """
+
+    def __init__(self, bucket: str, client: S3Client | None = None):
+        self.bucket = bucket
+        self.name = bucket
+        self._client = client
+
+    @property
+    def client(self) -> S3Client:
+        """Client that the requests are made with."""
+        return self._client or s3_client()
+
+    def head(self, key: str) -> ObjectVersion | None:
+        return head_object_or_none(self.client, self.bucket, key)
+
+    def get(self, key: str) -> StoredObject | None:
+        if (response := get_object_or_none(
+                self.client, self.bucket, key)) is None:
+            return None
+        return StoredObject(response['Body'], response.get('ETag'),
+                            response.get('LastModified'))
+
+    def get_if_changed(self, key: str, etag: str) -> ObjectVersion | None:
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket, Key=key, IfNoneMatch=etag)
+        except ClientError as error:
+            code = error.response.get('Error', {}).get('Code')
+            if code in ('NoSuchKey', str(int(HTTPStatus.NOT_FOUND))):
+                return None
+            if code != str(int(HTTPStatus.NOT_MODIFIED)):
+                raise
+            headers = error.response.get('ResponseMetadata', {}) \
+                .get('HTTPHeaders', {})
+            last_modified = headers.get('last-modified')
+            return ObjectVersion(
+                headers.get('etag', etag),
+                None if last_modified is None
+                else parsedate_to_datetime(last_modified),
+            )
+        return StoredObject(response['Body'], response.get('ETag'),
+                            response.get('LastModified'))
+
+    def put(self, key: str, body: bytes) -> None:
+        # A single-part upload makes the ETag the MD5 digest
+        self.client.put_object(Body=body, Bucket=self.bucket, Key=key)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
@@ -0,0 +1,165 @@
+"""Cache of scraped EPG pages and their episodes, kept between runs."""
+
+from contextlib import closing
+import functools
+import hashlib
+from http import HTTPStatus
+import json
+import threading
+from typing import Any, TypedDict, cast
+
+import requests
+
+from . import scraper
+from .episode import Episode, EpisodeDict
+from .events_stream import episode_from_dict, episode_to_dict
+from .settings import SCRAPE_CACHE_PATH, WUNSCHLISTE_IMPLIED_TIMEZONE
+from .storage_backends import LocalFileBackend, StorageBackend
+
+_RESPONSE_KEY_FORMAT = 'responses/{request_sha256}.json'
+_EPISODES_KEY_FORMAT = 'episodes/{body_sha256}.json'
+
+
+class ScrapeCacheStats(TypedDict):
+    """Counters that describe how much work the cache has saved."""
+    not_modified: int
+    unchanged: int
+    parsed: int
+
+
+class CachedResponse:  # pylint: disable=too-few-public-methods
+    """Validators and body digest of a downloaded EPG page."""
+
+    def __init__(self,
+                 etag: str | None,
+                 last_modified: str | None,
+                 body_sha256: str):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_sha256 = body_sha256
+
+    def conditional_headers(self) -> dict[str, str]:
+        """
+        Returns the headers that ask the server to answer with
+        `304 Not Modified` if the page is still the same.
+        """
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ScrapeCache:
+    """
+    Keeps downloaded EPG pages and the episodes parsed from them in
+    the given storage backend, so they survive between runs.
+
+    For each page, the cache remembers its ETag, its Last-Modified
+    date and the SHA-256 digest of its body. The episodes are kept
+    by body digest, so a page that comes back unchanged, or that
+    another page has served before, is never parsed twice.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.unchanged = 0
+        self.parsed = 0
+
+    def scrape(self,
+               params: dict[str, str] | None = None,
+               session: requests.Session | None = None) -> list[Episode]:
+        """
+        Returns the episodes on the EPG page with the given query
+        parameters, downloading it as `scraper.fetch_page` does.
+
+        If the episodes of the last download are cached, asks the
+        server to send the page only if it has changed since. If
+        it has not, or if the new body has been parsed before, the
+        cached episodes are returned as they were first parsed,
+        including their `sd_date_published`.
+        """
+        response_key = _RESPONSE_KEY_FORMAT.format(
+            request_sha256=_request_sha256(params))
+        cached = self._load_response(response_key)
+        cached_episodes = None if cached is None \
+            else self._load_episodes(cached.body_sha256)
+        response = scraper.fetch_page(
+            params, session,
+            headers=None if cached is None or cached_episodes is None
+            else cached.conditional_headers())
+
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            if cached_episodes is None:
+                raise RuntimeError(
+                    'Server reported no changes but nothing is cached')
+            with self._lock:
+                self.not_modified += 1
+            return cached_episodes
+
+        body_sha256 = hashlib.sha256(response.content).hexdigest()
+        if (episodes := self._load_episodes(body_sha256)) is not None:
+            with self._lock:
+                self.unchanged += 1
+        else:
+            episodes = list(scraper.scrape_wunschliste(response.text))
+            with self._lock:
+                self.parsed += 1
+            self.backend.put(
+                _EPISODES_KEY_FORMAT.format(body_sha256=body_sha256),
+                json.dumps({'episodes': [
+                    episode_to_dict(episode) for episode in episodes
+                ]}).encode())
+        self.backend.put(response_key, json.dumps({
+            'etag': response.headers.get('ETag'),
+            'lastModified': response.headers.get('Last-Modified'),
+            'bodySha256': body_sha256,
+        }).encode())
+        return episodes
+
+    def _load_response(self, key: str) -> CachedResponse | None:
+        if (obj := self._load_json(key)) is None:
+            return None
+        return CachedResponse(obj.get('etag'), obj.get('lastModified'),
+                              obj['bodySha256'])
+
+    def _load_episodes(self, body_sha256: str) -> list[Episode] | None:
+        if (obj := self._load_json(_EPISODES_KEY_FORMAT.format(
+                body_sha256=body_sha256))) is None:
+            return None
+        return [
+            episode_from_dict(cast(EpisodeDict, episode_dict),
+                              WUNSCHLISTE_IMPLIED_TIMEZONE)
+            for episode_dict in obj['episodes']
+        ]
+
+    def _load_json(self, key: str) -> dict[str, Any] | None:
+        if (stored := self.backend.get(key)) is None:
+            return None
+        with closing(stored.body):
+            return cast(dict[str, Any], json.loads(stored.body.read()))
+
+    def stats(self) -> ScrapeCacheStats:
+        """Returns the current values of the cache counters."""
+        with self._lock:
+            return {
+                'not_modified': self.not_modified,
+                'unchanged': self.unchanged,
+                'parsed': self.parsed,
+            }
+
+
+@functools.cache
+def scrape_cache() -> ScrapeCache:
+    """
+    Returns the cache in `SCRAPE_CACHE_PATH`, which scrape runs
+    share by default.
+    """
+    return ScrapeCache(LocalFileBackend(SCRAPE_CACHE_PATH))
+
+
+def _request_sha256(params: dict[str, str] | None) -> str:
+    return hashlib.sha256(scraper.page_url(params).encode()).hexdigest()
@@ -0,0 +1,88 @@
+"""Scrape episodes from several EPG pages in one run."""
+
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .episode import Episode
+from .scrape_cache import ScrapeCache
+from .scraper import scrape_session, scrape_wunschliste
+from .settings import SCRAPE_MAX_WORKERS, WUNSCHLISTE_SOURCES
+
+
+class ScrapeSource:  # pylint: disable=too-few-public-methods
+    """EPG page to scrape, e.g. of one station, series or page."""
+
+    def __init__(self, name: str, params: Mapping[str, str]):
+        self.name = name
+        self.params = dict(params)
+
+    def __repr__(self) -> str:
+        return f'ScrapeSource({self.name!r}, {self.params!r})'
+
+
+def configured_sources() -> list[ScrapeSource]:
+    """Returns the sources in `WUNSCHLISTE_SOURCES`, in order."""
+    return [ScrapeSource(name, params)
+            for name, params in WUNSCHLISTE_SOURCES.items()]
+
+
+def scrape_sources(sources: Iterable[ScrapeSource] | None = None,
+                   session: requests.Session | None = None,
+                   max_workers: int = SCRAPE_MAX_WORKERS,
+                   cache: ScrapeCache | None = None) -> list[Episode]:
+    """
+    Scrapes the given sources, by default those in
+    `WUNSCHLISTE_SOURCES`, and returns their merged episodes.
+
+    Up to `max_workers` sources are downloaded and parsed at once,
+    all through the given session, or else through the shared one
+    from `scrape_session`, which caps the connections per host and
+    retries failed downloads.
+    With a cache, each source is downloaded only if it has changed
+    since the last run, and parsed only if its body is new; see
+    `ScrapeCache.scrape`. Otherwise, each source is parsed while it
+    downloads.
+    The result does not depend on which download finishes first;
+    see `merge_episodes`.
+    Raises RuntimeError for the first source, in the given order,
+    that cannot be scraped.
+    """
+    sources = configured_sources() if sources is None else list(sources)
+    session = session or scrape_session()
+
+    def episodes_of(source: ScrapeSource) -> list[Episode]:
+        if cache is not None:
+            return cache.scrape(source.params, session)
+        return list(scrape_wunschliste(
+            stream=True, params=source.params, session=session))
+
+    def scrape(source: ScrapeSource) -> list[Episode]:
+        try:
+            return episodes_of(source)
+        except (requests.RequestException, RuntimeError) as error:
+            raise RuntimeError(f'Unable to scrape {source!r}') from error
+
+    with ThreadPoolExecutor(max_workers,
+                            thread_name_prefix='scrape') as executor:
+        return merge_episodes(executor.map(scrape, sources))
+
+
+def merge_episodes(episode_lists: Iterable[Iterable[Episode]]) \
+        -> list[Episode]:
+    """
+    Merges the episodes of several sources into one list, ordered
+    by broadcast time.
+
+    Of the episodes with the same domain key, only the earliest
+    broadcast is kept. Broadcasts at the same time are ordered as
+    their sources are, and as they appear within each source.
+    """
+    broadcasts = sorted(
+        (episode for episodes in episode_lists for episode in episodes),
+        key=lambda episode: episode.date_published)
+    merged: dict[tuple[int | str, bool, bool], Episode] = {}
+    for episode in broadcasts:
+        merged.setdefault(episode.domain_key, episode)
+    return list(merged.values())
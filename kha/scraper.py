@@ -1,95 +1,401 @@
 """Scrape episodes from online sources."""
 
+import codecs
 from datetime import datetime
+import functools
+from http import HTTPStatus
 import re
 from re import Match
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
+from urllib.parse import urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .episode import Episode
 from .settings \
-    import WUNSCHLISTE_IMPLIED_TIMEZONE, \
-    WUNSCHLISTE_QUERY_PARAMETERS, WUNSCHLISTE_URL
-
-WUNSCHLISTE_SELECT_EPISODE_PATTERN = r'(?ms)<li.*?</li>'
-
-WUNSCHLISTE_PARSE_EPISODE_PATTERN = r"""(?msx)
-    (?:
-        heute|
-        morgen|
-        [A-Z][a-z],[^<]+              # Weekday
-        (?P<day>\d{2})\.
-        (?P<month>\d{2})\.
-        <.*?>                         # Multiple text nodes or tags
-        (?P<year>\d{4})
+    import SCRAPE_BACKOFF_SECONDS, SCRAPE_MAX_ATTEMPTS, \
+    SCRAPE_MAX_CONNECTIONS_PER_HOST, SCRAPE_TIMEOUT_SECONDS, \
+    WUNSCHLISTE_IMPLIED_TIMEZONE, WUNSCHLISTE_QUERY_PARAMETERS, \
+    WUNSCHLISTE_URL
+
+# Tags, text nodes, and stray `<` characters. Each alternative stops
+# at the next `<`, so tokenizing takes linear time.
+_TOKEN_PATTERN = re.compile(r'<[^<>]*>|[^<]+|<')
+_WEEKDAY_PATTERN = re.compile(r'[A-Z][a-z],')
+_DATE_PATTERN = re.compile(r'(\d{2})\.(\d{2})\.')
+_DATE_LENGTH = len('DD.MM.')
+_YEAR_PATTERN = re.compile(r'\d{4}')
+_TIME_PATTERN = re.compile(r'(?s)(\d{1,2}):(\d{2})[^<]+h')
+_RERUN_PATTERN = re.compile(r'\s+\(Wdh.\)')
+_WHITESPACE_PATTERN = re.compile(r'(?:\s|\\n)+')
+
+# Size of the pieces in which a streamed download is read. Each
+# read waits until a whole piece has arrived, so smaller pieces get
+# items to the parser sooner.
+STREAM_CHUNK_SIZE = 1024
+# Length beyond which a streamed list item is taken for malformed
+MAX_ITEM_LENGTH = 1024 * 1024
+
+# Responses after which a download is retried
+_RETRY_STATUSES = frozenset({
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+})
+
+_RELATIVE_DAYS = ('heute', 'morgen')
+_EPISODE_LABEL_SUFFIX = '"Episode">'
+
+
+@functools.cache
+def scrape_session() -> requests.Session:
+    """
+    Returns the HTTP session that downloads go through by default.
+
+    The session is created on first use with the limits in
+    `SCRAPE_MAX_CONNECTIONS_PER_HOST`, `SCRAPE_MAX_ATTEMPTS` and
+    `SCRAPE_BACKOFF_SECONDS`, and then kept for the lifetime of the
+    process, so its connections are kept alive between downloads.
+    """
+    return create_scrape_session()
+
+
+def create_scrape_session(
+    max_connections_per_host: int = SCRAPE_MAX_CONNECTIONS_PER_HOST,
+    max_attempts: int = SCRAPE_MAX_ATTEMPTS,
+    backoff_seconds: float = SCRAPE_BACKOFF_SECONDS,
+) -> requests.Session:
+    """
+    Returns a new HTTP session for downloads from several threads.
+
+    The session keeps up to `max_connections_per_host` connections
+    to each host alive, and makes further downloads from the same
+    host wait for one of them rather than open more.
+    Failed connections and responses that say the server is busy
+    or failing are retried until `max_attempts` attempts have been
+    made, with exponential backoff starting at `backoff_seconds`.
+    A response that breaks off after its headers is not retried.
+    """
+    adapter = HTTPAdapter(
+        pool_maxsize=max_connections_per_host,
+        pool_block=True,
+        max_retries=Retry(
+            total=max_attempts - 1,
+            status_forcelist=_RETRY_STATUSES,
+            allowed_methods={'GET'},
+            backoff_factor=backoff_seconds,
+            raise_on_status=False,
+        ),
     )
-    <.*?>                             # Multiple text nodes or tags
-    (?P<hour>\d{1,2}):
-    (?P<minute>\d{2})[^<]+h
-    <.*?"Episode">                    # Multiple text nodes or tags
-    (?P<episode_number>[^<]+)
-    (?:<[^>]+>)+                      # Multiple tags
-    (?P<name>[^<]+)
-    (?:<[^>]+>)+                      # Multiple tags
-    (?P<rerun>(?:\s+\(Wdh.\))?)
-"""
-
-
-def scrape_wunschliste(html: str | None = None) \
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def scrape_wunschliste(html: str | None = None,
+                       stream: bool = False,
+                       params: dict[str, str] | None = None,
+                       session: requests.Session | None = None,
+                       sd_date_published: datetime | None = None) \
         -> Iterable[Episode]:
-    """Scrape episodes from wunschliste.de"""
+    """
+    Scrape episodes from wunschliste.de
+
+    Parses the given HTML, or else downloads the EPG page with the
+    given query parameters first, as `fetch_page` does. In
+    streaming mode, parses the download as it arrives, and yields
+    each episode as soon as its list item is complete.
+    Episodes are dated as published at `sd_date_published`, by
+    default when they are parsed.
+    """
+
+    def get_chunks() -> Iterator[str]:
+        with fetch_page(params, session, stream=True) as response:
+            yield from text_chunks(response)
 
-    def get_html() -> str:
-        response = requests.get(WUNSCHLISTE_URL,
-                                params=WUNSCHLISTE_QUERY_PARAMETERS,
-                                timeout=30)
+    items = list_items(html) if html \
+        else stream_items(get_chunks()) if stream \
+        else list_items(fetch_page(params, session).text)
+    for item_html in items:
+        if (episode := parse_item(item_html, sd_date_published)) \
+                is not None:
+            yield episode
+
+
+def fetch_page(params: dict[str, str] | None = None,
+               session: requests.Session | None = None,
+               headers: dict[str, str] | None = None,
+               stream: bool = False) -> requests.Response:
+    """
+    Downloads the EPG page with the given query parameters, by
+    default those in `WUNSCHLISTE_QUERY_PARAMETERS`, through the
+    given session, or else through the shared one from
+    `scrape_session`.
+    Raises requests.HTTPError if the server answers with an error.
+    """
+    response = (session or scrape_session()).get(
+        WUNSCHLISTE_URL,
+        params=WUNSCHLISTE_QUERY_PARAMETERS if params is None else params,
+        headers=headers, timeout=SCRAPE_TIMEOUT_SECONDS, stream=stream)
+    try:
         response.raise_for_status()
-        return response.text
-
-    def parse_episodes(html_source: str) \
-            -> Iterable[tuple[str, Match[str] | None]]:
-        return (
-            (
-                episode_html,
-                re.search(WUNSCHLISTE_PARSE_EPISODE_PATTERN,
-                          episode_html)
-            )
-            for episode_html
-            in re.findall(WUNSCHLISTE_SELECT_EPISODE_PATTERN,
-                          html_source)
-        )
+    except requests.HTTPError:
+        # Hands the connection back to the pool right away
+        response.close()
+        raise
+    return response
+
+
+def page_url(params: dict[str, str] | None = None) -> str:
+    """
+    Returns the URL of the EPG page with the given query parameters,
+    by default those in `WUNSCHLISTE_QUERY_PARAMETERS`, in the same
+    form whatever their order.
+    """
+    query = urlencode(sorted(
+        (WUNSCHLISTE_QUERY_PARAMETERS if params is None else params)
+        .items()))
+    return f'{WUNSCHLISTE_URL}?{query}'
+
+
+def text_chunks(response: requests.Response,
+                chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yields the body of the given streamed response as text, in
+    pieces as they arrive. Decodes like `response.text` does, but
+    falls back to UTF-8 instead of guessing the encoding.
+    """
+    decoder = codecs.getincrementaldecoder(
+        response.encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
 
-    def cleanup_html(html_dict: dict[str, str]) -> dict[str, str]:
-        return {
-            key: re.sub(r'(?m)(?:\s|\\n)+(?=\s|\\n)', '', value)
-            for key, value in html_dict.items()
-        }
+def list_items(html: str) -> Iterator[str]:
+    """
+    Yields each list item in the given EPG HTML, from `<li` up to
+    and including the next `</li>`. Items that are never closed
+    are skipped.
+    """
+    position = 0
+    while (start := html.find('<li', position)) != -1 \
+            and (end := html.find('</li>', start)) != -1:  # pylint: disable=while-used
+        position = end + len('</li>')
+        yield html[start:position]
 
-    def to_episode(raw_episode_dict: dict[str, str]) -> Episode:
+
+def stream_items(chunks: Iterable[str],
+                 max_item_length: int = MAX_ITEM_LENGTH) -> Iterator[str]:
+    """
+    Yields the same list items as `list_items`, from EPG HTML that
+    arrives in pieces, as soon as each item is complete.
+    Raises RuntimeError if an item grows longer than
+    `max_item_length` characters.
+    """
+    extractor = ListItemExtractor(max_item_length)
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+
+
+class ListItemExtractor:  # pylint: disable=too-few-public-methods
+    """
+    Extracts list items from EPG HTML that arrives in pieces.
+
+    Keeps only the part of the HTML that may still belong to an
+    item, so memory is bounded by the longest item, and remembers
+    how far it has searched, so no character is searched twice.
+    """
+
+    def __init__(self, max_item_length: int = MAX_ITEM_LENGTH):
+        self.max_item_length = max_item_length
+        # Starts with `<li` while an item is being received
+        self._pending = ''
+        self._in_item = False
+        # Position in `_pending` from which to search on
+        self._searched = 0
+
+    def feed(self, chunk: str) -> list[str]:
+        """
+        Adds the given piece of HTML, and returns the items that it
+        completes. Raises RuntimeError if the item being received
+        grows longer than `max_item_length` characters.
+        """
+        pending = self._pending + chunk
+        items = []
+        position = 0
+        while True:  # pylint: disable=while-used
+            if not self._in_item:
+                if (start := pending.find('<li', self._searched)) == -1:
+                    # Keeps what may be the beginning of `<li`
+                    position = max(position, len(pending) - len('<l'))
+                    self._searched = position
+                    break
+                position = self._searched = start
+                self._in_item = True
+            if (end := pending.find('</li>', self._searched)) == -1:
+                self._searched = max(position,
+                                     len(pending) - len('</li'))
+                break
+            self._searched = end + len('</li>')
+            items.append(pending[position:self._searched])
+            position = self._searched
+            self._in_item = False
+        self._pending = pending[position:]
+        self._searched -= position
+        if self._in_item and len(self._pending) > self.max_item_length:
+            raise RuntimeError(
+                'List item is longer than'
+                f' {self.max_item_length} characters')
+        return items
+
+
+def parse_item(item_html: str,
+               sd_date_published: datetime | None = None) \
+        -> Episode | None:
+    """
+    Parses a list item of the wunschliste EPG in a single pass over
+    its tags and text nodes. The episode is dated as published at
+    `sd_date_published`, by default now.
+
+    Returns None for broadcasts `heute` or `morgen`, as the year
+    is only given for later days.
+    Raises RuntimeError if the item is not a broadcast, or if its
+    episode number or date is invalid.
+    """
+    if (fields := _match_item(item_html)) is None:
+        raise RuntimeError(
+            f'Unable to parse episode from {repr(item_html)}')
+    if fields.get('day') is None:
+        return None
+    name = _collapse_whitespace(fields['name'])
+    try:
         return Episode(
-            int(raw_episode_dict['episode_number']),
-            name=raw_episode_dict['name'],
+            int(_collapse_whitespace(fields['episode_number'])),
+            name=name,
             date_published=datetime(
-                int(raw_episode_dict['year']),
-                int(raw_episode_dict['month']),
-                int(raw_episode_dict['day']),
-                hour=int(raw_episode_dict['hour']),
-                minute=int(raw_episode_dict['minute']),
+                int(fields['year']),
+                int(fields['month']),
+                int(fields['day']),
+                hour=int(fields['hour']),
+                minute=int(fields['minute']),
                 tzinfo=WUNSCHLISTE_IMPLIED_TIMEZONE,
             ),
-            sd_date_published=datetime.now(),
-            is_rerun=bool(raw_episode_dict['rerun']),
-            is_spinoff=not raw_episode_dict['name'].startswith('Folge'),
+            sd_date_published=sd_date_published or datetime.now(),
+            is_rerun=bool(fields['rerun']),
+            is_spinoff=not name.startswith('Folge'),
             timezone=WUNSCHLISTE_IMPLIED_TIMEZONE,
         )
+    except ValueError as error:
+        # E.g. an episode number that is not a number, or a date
+        # that does not exist
+        raise RuntimeError(
+            f'Unable to parse episode from {repr(item_html)}') from error
 
-    for episode_html, episode_match \
-            in parse_episodes(html or get_html()):
-        if not episode_match:
-            raise RuntimeError(
-                f'Unable to parse episode from {repr(episode_html)}')
-        if episode_match.groupdict()['day']:
-            yield to_episode(
-                cleanup_html(episode_match.groupdict())
-            )
+
+def _match_item(item_html: str) -> dict[str, str] | None:
+    """
+    Finds the fields of a broadcast in the given list item, in
+    order:
+    1. the day, as a text node that ends with `heute` or `morgen`,
+       or with a weekday and `DD.MM.`, followed by a text node
+       with the year;
+    2. the time, as a text node like `20:15 h`;
+    3. the episode number, as the text node right after a tag
+       whose title is `Episode`;
+    4. the name, as the next text node;
+    5. whether it is a rerun, as the next text node if it starts
+       with `(Wdh.)`.
+    Tokens are consumed as they are found, so each is looked at
+    once. Returns None if a field is missing.
+    """
+    tokens = (match.group() for match in _TOKEN_PATTERN.finditer(item_html))
+    # Shares its position with `tokens`
+    texts = (token for token in tokens if not _is_tag(token))
+    fields: dict[str, str] = {}
+    if not _match_day_and_time(texts, fields) \
+            or not _match_episode_number(tokens, fields) \
+            or (name := next(texts, None)) is None:
+        return None
+    fields['name'] = name
+    rerun_match = _RERUN_PATTERN.match(next(texts, ''))
+    fields['rerun'] = '' if rerun_match is None else rerun_match.group()
+    return fields
+
+
+def _match_day_and_time(texts: Iterator[str],
+                        fields: dict[str, str]) -> bool:
+    """
+    Matches steps 1 and 2 of `_match_item`, and adds them to the
+    given fields. Returns whether both have been found.
+    """
+    for text in texts:
+        if text.endswith(_RELATIVE_DAYS):
+            break
+        if (date_match := _date_match(text)) is not None:
+            fields['day'], fields['month'] = date_match.groups()
+            if (year := next((text for text in texts
+                              if _YEAR_PATTERN.fullmatch(text)),
+                             None)) is None:
+                return False
+            fields['year'] = year
+            break
+    else:
+        return False
+    for text in texts:
+        if (time_match := _TIME_PATTERN.fullmatch(text)) is not None:
+            fields['hour'], fields['minute'] = time_match.groups()
+            return True
+    return False
+
+
+def _match_episode_number(tokens: Iterator[str],
+                          fields: dict[str, str]) -> bool:
+    """
+    Matches step 3 of `_match_item`, and adds it to the given
+    fields. Returns whether it has been found.
+    """
+    after_label = False
+    for token in tokens:
+        if not _is_tag(token) and after_label:
+            fields['episode_number'] = token
+            return True
+        after_label = token.endswith(_EPISODE_LABEL_SUFFIX)
+    return False
+
+
+def _is_tag(token: str) -> bool:
+    return token.startswith('<') and token.endswith('>')
+
+
+def _date_match(text: str) -> Match[str] | None:
+    """
+    Matches the day and month in a text node that ends with
+    `DD.MM.`, and has a weekday like `Mi,` and at least one more
+    character before.
+    """
+    date_start = len(text) - _DATE_LENGTH
+    if date_start < 0 \
+            or (date_match := _DATE_PATTERN.fullmatch(text, date_start)) \
+            is None \
+            or (weekday := _WEEKDAY_PATTERN.search(text, 0, date_start)) \
+            is None \
+            or weekday.end() == date_start:
+        return None
+    return date_match
+
+
+def _collapse_whitespace(text: str) -> str:
+    """
+    Shortens each run of whitespace and escaped newlines (`\\n`)
+    to its last character or escape.
+    """
+    return _WHITESPACE_PATTERN.sub(
+        lambda match: match.group()[-2:]
+        if match.group().endswith('\\n') else match.group()[-1],
+        text)
@@ -1,5 +1,6 @@
 """Shared paths and settings"""
 
+import os
 from pathlib import Path
 
 from zoneinfo import ZoneInfo
@@ -14,9 +15,61 @@ TV_NETWORK = 'ZDF'
 EVENTS_JSON_BUCKET_DEV = 'kha-store-dev'
 EVENTS_JSON_BUCKET_PROD = 'kha-store'
 EVENTS_JSON_FILENAME = 'events.kha.json'
+EVENTS_BINARY_FILENAME = 'events.kha.bin'
+TRANSITIONS_JSON_FILENAME = 'transitions.kha.json'
+EVENTS_MANIFEST_FILENAME = 'events.manifest.json'
+EVENTS_SHARD_KEY_FORMAT = 'events/{year}.kha.json'
 LOCAL_EVENTS_JSON_PATH = \
     PROJECT_ROOT / 'etc' / EVENTS_JSON_FILENAME
 
+# How long a cached copy of the events store is trusted before it is
+# revalidated against the backing store
+STORE_CACHE_TTL_SECONDS = \
+    float(os.environ.get('KHA_STORE_CACHE_TTL_SECONDS', '60'))
+# How long after its last validation a cached copy is still served
+# while a background thread refreshes it, and how long to wait
+# before retrying a failed refresh
+STORE_MAX_STALENESS_SECONDS = \
+    float(os.environ.get('KHA_STORE_MAX_STALENESS_SECONDS', '3600'))
+STORE_REFRESH_INTERVAL_SECONDS = \
+    float(os.environ.get('KHA_STORE_REFRESH_INTERVAL_SECONDS', '30'))
+# How long a request waits for the store to load before it falls
+# back to the last cached copy, or else to the bundled copy in
+# `BUNDLED_STORE_PATH`
+STORE_READ_DEADLINE_SECONDS = \
+    float(os.environ.get('KHA_STORE_READ_DEADLINE_SECONDS', '3'))
+BUNDLED_STORE_PATH = Path(os.environ.get(
+    'KHA_BUNDLED_STORE_PATH', LOCAL_EVENTS_JSON_PATH.parent))
+
+# Layout of the events store to read from: `single` for the
+# events JSON, or `sharded` for one object per broadcast year and a
+# manifest. Uploads always write both.
+SINGLE_STORE_LAYOUT = 'single'
+SHARDED_STORE_LAYOUT = 'sharded'
+STORE_LAYOUT = os.environ.get('KHA_STORE_LAYOUT', SINGLE_STORE_LAYOUT)
+
+# Where the events store is read from: `s3` for the bucket in
+# `KHA_DATA_S3_BUCKET`, `local` for files in `LOCAL_STORE_PATH`, or
+# `memory` for objects put by the same process
+S3_STORAGE_BACKEND = 's3'
+LOCAL_STORAGE_BACKEND = 'local'
+MEMORY_STORAGE_BACKEND = 'memory'
+STORAGE_BACKEND = os.environ.get('KHA_STORAGE_BACKEND', S3_STORAGE_BACKEND)
+LOCAL_STORE_PATH = Path(os.environ.get(
+    'KHA_LOCAL_STORE_PATH', LOCAL_EVENTS_JSON_PATH.parent))
+
+# Alternative S3 endpoint, e.g. a local stand-in for benchmarks
+S3_ENDPOINT_URL = os.environ.get('KHA_S3_ENDPOINT_URL')
+S3_MAX_POOL_CONNECTIONS = 10
+# Limits for each S3 request, so a degraded S3 fails fast rather
+# than hold up requests with the botocore defaults of 60 seconds
+# and several attempts
+S3_CONNECT_TIMEOUT_SECONDS = \
+    float(os.environ.get('KHA_S3_CONNECT_TIMEOUT_SECONDS', '1'))
+S3_READ_TIMEOUT_SECONDS = \
+    float(os.environ.get('KHA_S3_READ_TIMEOUT_SECONDS', '2'))
+S3_MAX_ATTEMPTS = int(os.environ.get('KHA_S3_MAX_ATTEMPTS', '2'))
+
 USER_TIMEZONE = ZoneInfo('Europe/Berlin')
 USER_LOCALE = 'de_DE'
 
@@ -26,6 +79,26 @@ WUNSCHLISTE_QUERY_PARAMETERS = {
     'station': '2',
 }
 WUNSCHLISTE_IMPLIED_TIMEZONE = ZoneInfo('Europe/Berlin')
+# EPG pages that a scrape run covers, by name, each as its query
+# parameters, e.g. one per station, series ID or page
+WUNSCHLISTE_SOURCES = {
+    'zdf': WUNSCHLISTE_QUERY_PARAMETERS,
+}
+
+# Limits for scraping several sources in one run: how many are
+# downloaded at once, over how many connections per host, and how
+# often and how patiently a failed download is retried
+SCRAPE_MAX_WORKERS = int(os.environ.get('KHA_SCRAPE_MAX_WORKERS', '4'))
+SCRAPE_MAX_CONNECTIONS_PER_HOST = \
+    int(os.environ.get('KHA_SCRAPE_MAX_CONNECTIONS_PER_HOST', '2'))
+SCRAPE_MAX_ATTEMPTS = int(os.environ.get('KHA_SCRAPE_MAX_ATTEMPTS', '3'))
+SCRAPE_BACKOFF_SECONDS = \
+    float(os.environ.get('KHA_SCRAPE_BACKOFF_SECONDS', '0.5'))
+SCRAPE_TIMEOUT_SECONDS = 30
+# Where scraped responses and the episodes parsed from them are
+# kept between runs
+SCRAPE_CACHE_PATH = Path(os.environ.get(
+    'KHA_SCRAPE_CACHE_PATH', PROJECT_ROOT / '.cache' / 'scraper'))
 
 
 FAVICONS_MANIFEST = {
@@ -0,0 +1,176 @@
+"""
+Sharded layout of the events store: one events JSON per broadcast
+year, and a manifest that lists the shards.
+
+Readers fetch the manifest first, and then only the shards they
+need to answer from today on. Writers upload only the shards whose
+contents have changed.
+"""
+
+from collections.abc import Callable
+from contextlib import closing
+from datetime import datetime, tzinfo
+import json
+from typing import Any, cast
+
+from .local_types import EventsManifestDict, ShardDict
+from .reference_instant import ReferenceInstant
+from .settings import EVENTS_MANIFEST_FILENAME, EVENTS_SHARD_KEY_FORMAT, \
+    USER_TIMEZONE
+from .storage_backends import StorageBackend, etag_of
+
+
+def split_events(events_json: bytes,
+                 timezone: tzinfo = USER_TIMEZONE) \
+        -> tuple[dict[str, bytes], EventsManifestDict]:
+    """
+    Splits the given events JSON into one shard per local year of
+    broadcast. Returns the contents of each shard by its key, and
+    the manifest that lists them.
+    Shards only depend on the episodes they contain, so unchanged
+    years have unchanged contents.
+    """
+    records: dict[str, dict[str, Any]] = json.loads(events_json)['episodes']
+    starts = {
+        uuid: datetime.fromisoformat(record['datePublished'])
+        for uuid, record in records.items()
+    }
+    pivot_date = max((
+        starts[uuid] for uuid, record in records.items()
+        if not record['isRerun'] and not record['isSpinoff']
+    ), default=None)
+
+    def is_eligible(uuid: str) -> bool:
+        record = records[uuid]
+        return not record['isRerun'] and (
+            not record['isSpinoff'] or pivot_date is None
+            or starts[uuid] >= pivot_date)
+
+    def is_regular(uuid: str) -> bool:
+        return not records[uuid]['isRerun'] \
+            and not records[uuid]['isSpinoff']
+
+    uuids_by_year: dict[int, list[str]] = {}
+    for uuid in sorted(records, key=lambda uuid: (starts[uuid], uuid)):
+        uuids_by_year.setdefault(
+            starts[uuid].astimezone(timezone).year, []).append(uuid)
+
+    shard_bodies: dict[str, bytes] = {}
+    shards: list[ShardDict] = []
+    for year, uuids in sorted(uuids_by_year.items()):
+        key = EVENTS_SHARD_KEY_FORMAT.format(year=year)
+        body = shard_bodies[key] = (json.dumps(
+            {'episodes': {uuid: records[uuid] for uuid in uuids}},
+            indent=2,
+            ensure_ascii=False,
+        ) + '\n').encode()
+        shards.append({
+            'year': year,
+            'key': key,
+            'etag': etag_of(body),
+            'firstDatePublished': records[uuids[0]]['datePublished'],
+            'lastDatePublished': records[uuids[-1]]['datePublished'],
+            'lastRegularDatePublished':
+                _last_date_published(records, uuids, is_regular),
+            'lastEligibleDatePublished':
+                _last_date_published(records, uuids, is_eligible),
+        })
+    return shard_bodies, {'shards': shards}
+
+
+def shards_to_load(manifest: EventsManifestDict,
+                   reference: ReferenceInstant,
+                   timezone: tzinfo = USER_TIMEZONE) -> list[ShardDict]:
+    """
+    Returns the shards that are needed to answer for the day of the
+    reference point and any later day:
+    1. every shard with episodes on that day or later;
+    2. the shard with the latest regular episode, which decides
+       which spinoffs are eligible;
+    3. the shard with the last eligible episode before that day,
+       which bounds how long the answer has been the same.
+    """
+    start_of_day = reference.start_of_current_day(timezone)
+    shards = manifest['shards']
+    selected = {
+        shard['key']: shard for shard in shards
+        if datetime.fromisoformat(shard['lastDatePublished'])
+        >= start_of_day
+    }
+    for latest in (
+        _latest_shard(shards, 'lastRegularDatePublished'),
+        _latest_shard(
+            shards, 'lastEligibleDatePublished',
+            lambda date_published: date_published < start_of_day),
+    ):
+        if latest is not None:
+            selected[latest['key']] = latest
+    return sorted(selected.values(), key=lambda shard: shard['year'])
+
+
+def fetch_manifest(backend: StorageBackend) -> EventsManifestDict | None:
+    """
+    Downloads the manifest of the sharded events store.
+    Returns None if the store has not been sharded.
+    """
+    if (stored := backend.get(EVENTS_MANIFEST_FILENAME)) is None:
+        return None
+    with closing(stored.body):
+        return cast(EventsManifestDict, json.loads(stored.body.read()))
+
+
+def upload_shards(backend: StorageBackend,
+                  events_json: bytes) -> tuple[list[str], list[str]]:
+    """
+    Splits the given events JSON into shards, and uploads the
+    shards whose contents differ from the current manifest,
+    followed by the new manifest. Then deletes shards that are no
+    longer listed. Returns the keys of the uploaded and of the
+    deleted shards.
+
+    Readers see either the old or the new manifest; both only
+    list shards that exist while they can be read.
+    """
+    shard_bodies, manifest = split_events(events_json)
+    previous = fetch_manifest(backend)
+    previous_etags = {} if previous is None else {
+        shard['key']: shard['etag'] for shard in previous['shards']
+    }
+    # Readers check the ETag of each shard against the manifest
+    written = [
+        shard['key'] for shard in manifest['shards']
+        if previous_etags.get(shard['key']) != shard['etag']
+    ]
+    for key in written:
+        backend.put(key, shard_bodies[key])
+    backend.put(EVENTS_MANIFEST_FILENAME,
+                (json.dumps(manifest, indent=2) + '\n').encode())
+    deleted = sorted(previous_etags.keys() - shard_bodies.keys())
+    for key in deleted:
+        backend.delete(key)
+    return written, deleted
+
+
+def _last_date_published(records: dict[str, dict[str, Any]],
+                         uuids: list[str],
+                         predicate: Callable[[str], bool]) -> str | None:
+    return next((records[uuid]['datePublished']
+                 for uuid in reversed(uuids) if predicate(uuid)), None)
+
+
+def _latest_shard(
+    shards: list[ShardDict],
+    field: str,
+    accept: Callable[[datetime], bool] = lambda _: True,
+) -> ShardDict | None:
+    """
+    Returns the shard with the latest date in the given field,
+    among those whose date is accepted, or None if there are none.
+    """
+    candidates = [
+        (date_published, shard) for shard in shards
+        if (value := cast(dict[str, Any], shard)[field]) is not None
+        and accept(date_published := datetime.fromisoformat(value))
+    ]
+    return max(candidates, key=lambda candidate: candidate[0],
+               default=(None, None))[1]
@@ -0,0 +1,259 @@
+"""
+Storage backends that hold the events store: S3, a local directory,
+or memory. Objects have the same keys in every backend, e.g.
+`events.kha.json`.
+
+The S3 backend lives in `kha.s3_clients`, so that only it needs
+boto3.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+import hashlib
+import mmap
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import Protocol
+
+
+class ObjectBody(Protocol):
+    """Binary stream with the contents of a stored object."""
+
+    def read(self, amt: int | None = ..., /) -> bytes:
+        """Reads up to `amt` bytes; returns b'' at the end."""
+
+    def close(self) -> None:
+        """Releases the stream."""
+
+
+class ObjectVersion:  # pylint: disable=too-few-public-methods
+    """Metadata of a stored object at a given version."""
+
+    def __init__(self, etag: str | None, last_modified: datetime | None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class StoredObject(ObjectVersion):  # pylint: disable=too-few-public-methods
+    """Contents and metadata of a stored object."""
+
+    def __init__(self,
+                 body: ObjectBody,
+                 etag: str | None,
+                 last_modified: datetime | None):
+        super().__init__(etag, last_modified)
+        self.body = body
+
+
+class StorageBackend(ABC):
+    """
+    Holds objects by key. Implementations must be thread-safe.
+
+    ETags follow S3 for single-part uploads, i.e. they are the
+    quoted MD5 digest of the contents, so readers can match derived
+    objects like the binary snapshot to the events JSON.
+    """
+
+    name: str
+    """Identifies the store, e.g. in cache keys."""
+
+    @abstractmethod
+    def head(self, key: str) -> ObjectVersion | None:
+        """
+        Returns the metadata of the given object, or None if there
+        is no such object.
+        """
+
+    @abstractmethod
+    def get(self, key: str) -> StoredObject | None:
+        """
+        Returns the given object, or None if there is no such
+        object. The caller must close its body.
+        """
+
+    @abstractmethod
+    def put(self, key: str, body: bytes) -> None:
+        """Stores the given contents, replacing any previous ones."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes the given object, if there is one."""
+
+    def get_if_changed(self, key: str, etag: str) -> ObjectVersion | None:
+        """
+        Returns the given object unless it has the given ETag, and
+        just its metadata if it does, like a GET request with
+        `If-None-Match` does. Returns None if there is no such
+        object. The caller must close the body of a StoredObject.
+        """
+        if (stored := self.get(key)) is None or stored.etag != etag:
+            return stored
+        stored.body.close()
+        return ObjectVersion(stored.etag, stored.last_modified)
+
+    def get_existing(self, key: str) -> StoredObject:
+        """
+        Returns the given object.
+        Raises RuntimeError if there is no such object.
+        """
+        if (stored := self.get(key)) is None:
+            raise RuntimeError(f'No object `{key}` in store {self.name}')
+        return stored
+
+
+class _Mapping:  # pylint: disable=too-few-public-methods
+    """Memory-mapped contents of a file at a given version."""
+
+    def __init__(self, data: mmap.mmap | bytes, stat: os.stat_result):
+        self.data = data
+        self.identity = _identity(stat)
+        self.version = ObjectVersion(
+            etag_of(data),
+            datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+        )
+
+
+class _MappedBody:
+    """Reads from a mapping, independently of other readers."""
+
+    def __init__(self, data: mmap.mmap | bytes):
+        self._data: mmap.mmap | bytes | None = data
+        self._position = 0
+
+    def read(self, amt: int | None = None, /) -> bytes:
+        """Reads up to `amt` bytes; returns b'' at the end."""
+        if self._data is None:
+            raise ValueError('Read from a closed body')
+        end = len(self._data) if amt is None or amt < 0 \
+            else self._position + amt
+        chunk = self._data[self._position:end]
+        self._position += len(chunk)
+        return chunk
+
+    def close(self) -> None:
+        """Drops the reference to the mapping."""
+        self._data = None
+
+
+class LocalFileBackend(StorageBackend):
+    """
+    Serves objects from files in a local directory, without any
+    network access.
+
+    Each file is memory-mapped on first access, and mapped again
+    only once its modification time or size has changed, so
+    unchanged files are neither read nor hashed again.
+
+    Writers must replace files as a whole, like `put` or `mv` do,
+    and must not modify them in place: readers of the previous
+    contents keep reading from the previous file, whereas reading
+    past the end of a file truncated in place crashes the process.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.name = f'file://{root}'
+        self._lock = threading.Lock()
+        self._mappings: dict[str, _Mapping] = {}
+
+    def head(self, key: str) -> ObjectVersion | None:
+        if (mapping := self._mapping(key)) is None:
+            return None
+        return mapping.version
+
+    def get(self, key: str) -> StoredObject | None:
+        if (mapping := self._mapping(key)) is None:
+            return None
+        return StoredObject(_MappedBody(mapping.data),
+                            mapping.version.etag,
+                            mapping.version.last_modified)
+
+    def put(self, key: str, body: bytes) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+                dir=path.parent, prefix=f'.{path.name}.',
+                delete=False) as temporary:
+            temporary.write(body)
+        os.replace(temporary.name, path)
+
+    def delete(self, key: str) -> None:
+        (self.root / key).unlink(missing_ok=True)
+        with self._lock:
+            self._mappings.pop(key, None)
+
+    def _mapping(self, key: str) -> _Mapping | None:
+        """
+        Returns the mapping of the current contents of the given
+        file, or None if there is no such file.
+        """
+        path = self.root / key
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            mapping = self._mappings.get(key)
+        if mapping is not None and mapping.identity == _identity(stat):
+            return mapping
+        try:
+            file = path.open('rb')
+        except FileNotFoundError:
+            return None
+        with file:
+            stat = os.fstat(file.fileno())
+            # Empty files cannot be mapped
+            data: mmap.mmap | bytes = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ) \
+                if stat.st_size else b''
+        # Previous mappings are unmapped once no reader uses them
+        mapping = _Mapping(data, stat)
+        with self._lock:
+            self._mappings[key] = mapping
+        return mapping
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Holds objects in memory, for tests, benchmarks, and processes
+    that load the store once.
+    """
+
+    def __init__(self) -> None:
+        self.name = f'memory:{id(self):x}'
+        self._lock = threading.Lock()
+        self._objects: dict[str, tuple[bytes, ObjectVersion]] = {}
+
+    def head(self, key: str) -> ObjectVersion | None:
+        with self._lock:
+            if (entry := self._objects.get(key)) is None:
+                return None
+            return entry[1]
+
+    def get(self, key: str) -> StoredObject | None:
+        with self._lock:
+            if (entry := self._objects.get(key)) is None:
+                return None
+        body, version = entry
+        return StoredObject(_MappedBody(body),
+                            version.etag, version.last_modified)
+
+    def put(self, key: str, body: bytes) -> None:
+        version = ObjectVersion(etag_of(body), datetime.now(timezone.utc))
+        with self._lock:
+            self._objects[key] = (bytes(body), version)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._objects.pop(key, None)
+
+
+def etag_of(body: bytes | mmap.mmap) -> str:
+    """Returns the ETag S3 assigns to a single-part upload."""
+    return f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+
+
+def _identity(stat: os.stat_result) -> tuple[int, int]:
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,310 @@
+"""Process-wide cache for parsed snapshots of the backing store."""
+
+from collections.abc import Callable
+import threading
+import time
+from typing import TypedDict
+
+from .episode_patchers.patcher import Patcher
+from .store_snapshot import StoreSnapshot
+
+StoreKey = tuple[str, str]
+"""Name of the storage backend and object key that identify a store."""
+
+SnapshotFetcher = Callable[[str | None], StoreSnapshot | None]
+"""
+Loads a snapshot from the backing store. Receives the ETag of the
+cached snapshot, if any, and returns None if the store still has
+that version.
+"""
+
+FlightKey = tuple[StoreKey, str | None]
+"""Store and ETag of the cached snapshot that a load starts from."""
+
+
+class StoreCacheStats(TypedDict):
+    """Counters that describe how well the cache performs."""
+    hits: int
+    misses: int
+    revalidations: int
+    stale_hits: int
+    refreshes: int
+    refresh_errors: int
+    coalesced: int
+    oldest_snapshot_age_seconds: float | None
+
+
+class _CacheEntry:  # pylint: disable=too-few-public-methods
+    def __init__(self, snapshot: StoreSnapshot, validated_at: float):
+        self.snapshot = snapshot
+        self.validated_at = validated_at
+        # When a background refresh was last started, if ever
+        self.refresh_started_at: float | None = None
+
+
+class _Flight:  # pylint: disable=too-few-public-methods
+    """Load of a snapshot whose outcome concurrent callers share."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.snapshot: StoreSnapshot | None = None
+        self.error: Exception | None = None
+
+    def result(self, timeout: float | None = None) -> StoreSnapshot:
+        """
+        Waits for the load to finish, and returns the snapshot or
+        raises the error it has ended with.
+        Raises TimeoutError if the load takes longer than `timeout`
+        seconds; it keeps running in the background then.
+        """
+        if not self.done.wait(timeout):
+            raise TimeoutError(f'Load took longer than {timeout} seconds')
+        if self.error is not None:
+            raise self.error
+        if self.snapshot is None:
+            raise RuntimeError('Load was interrupted')
+        return self.snapshot
+
+
+class StoreCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Thread-safe cache for parsed snapshots of the backing store.
+
+    A cached snapshot is served as-is for `ttl_seconds` after it has
+    last been validated. After that, it is stale:
+
+    - Up to `max_staleness_seconds` after its last validation, it
+      is still served right away, while a background thread
+      revalidates it and, if the store has changed, loads and
+      parses the new snapshot. The new snapshot replaces the old
+      one only once it is complete. If the refresh fails, the old
+      snapshot stays in use, the failure is counted, and the next
+      refresh starts no earlier than `refresh_interval_seconds`
+      after the failed one.
+    - Beyond that, the caller revalidates it, and any failure is
+      raised to the caller.
+
+    By default, `max_staleness_seconds` is the same as
+    `ttl_seconds`, so stale snapshots are never served.
+
+    At most one load per store and version is in flight: callers
+    that need the same load while it runs, e.g. a burst of requests
+    on a cold start, wait for it and share its snapshot or error.
+
+    Callers may limit how long they wait for a load. If it takes
+    longer, they get TimeoutError, and the load goes on in the
+    background and caches its result for later callers.
+    """
+
+    def __init__(self,
+                 ttl_seconds: float,
+                 clock: Callable[[], float] = time.monotonic,
+                 max_staleness_seconds: float | None = None,
+                 refresh_interval_seconds: float = 0):
+        self.ttl_seconds = ttl_seconds
+        self.max_staleness_seconds = ttl_seconds \
+            if max_staleness_seconds is None else max_staleness_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[StoreKey, _CacheEntry] = {}
+        self._flights: dict[FlightKey, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.coalesced = 0
+
+    def get(self, store_key: StoreKey,
+            fetch: SnapshotFetcher,
+            timeout: float | None = None) -> StoreSnapshot:
+        """
+        Returns the snapshot for the given store, using `fetch` to
+        load or revalidate it if the cached copy is missing or
+        has expired.
+        If a timeout is given, the load runs in a separate thread,
+        and TimeoutError is raised if it takes longer than that.
+        """
+        with self._lock:
+            if (entry := self._entries.get(store_key)) is not None:
+                age = self._clock() - entry.validated_at
+                if age < self.ttl_seconds:
+                    self.hits += 1
+                    return entry.snapshot
+                if age < self.max_staleness_seconds:
+                    self.stale_hits += 1
+                    self._start_refresh(store_key, entry, fetch)
+                    return entry.snapshot
+                self.revalidations += 1
+            else:
+                self.misses += 1
+            flight_key = (store_key, entry.snapshot.etag if entry else None)
+            if is_leader := flight_key not in self._flights:
+                self._flights[flight_key] = _Flight()
+            else:
+                self.coalesced += 1
+            flight = self._flights[flight_key]
+
+        if is_leader and timeout is None:
+            self._run(flight_key, flight, entry, fetch)
+        elif is_leader:
+            self._start_flight(flight_key, flight, entry, fetch)
+        return flight.result(timeout)
+
+    def _run(self, flight_key: FlightKey, flight: _Flight,
+             entry: _CacheEntry | None, fetch: SnapshotFetcher,
+             in_background: bool = False) -> None:
+        """
+        Runs the given load, records its outcome in the flight, and
+        counts it. Waiters are released once the outcome is cached.
+        """
+        store_key = flight_key[0]
+        try:
+            flight.snapshot = \
+                self._fetch(store_key, entry, fetch, in_background)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            flight.error = error
+            if entry is not None:
+                with self._lock:
+                    self.refresh_errors += 1
+        else:
+            if in_background:
+                with self._lock:
+                    self.refreshes += 1
+        finally:
+            with self._lock:
+                del self._flights[flight_key]
+            flight.done.set()
+
+    def _fetch(self, store_key: StoreKey, entry: _CacheEntry | None,
+               fetch: SnapshotFetcher,
+               in_background: bool = False) -> StoreSnapshot:
+        """
+        Loads or revalidates the snapshot of the given store, and
+        caches the result. In the background, the result is only
+        cached if the entry has not been replaced or dropped since.
+        """
+        if (snapshot := fetch(entry.snapshot.etag if entry else None)) \
+                is None:
+            if entry is None:
+                raise RuntimeError(
+                    f'Store {store_key} reported no changes'
+                    ' but nothing is cached')
+            snapshot = entry.snapshot
+
+        with self._lock:
+            if not in_background or self._entries.get(store_key) is entry:
+                self._entries[store_key] = \
+                    _CacheEntry(snapshot, self._clock())
+        return snapshot
+
+    def _start_refresh(self, store_key: StoreKey, entry: _CacheEntry,
+                       fetch: SnapshotFetcher) -> None:
+        """
+        Starts a background refresh of the given entry, unless a
+        load is running or the last refresh started too recently.
+        If the refresh fails, the entry stays in use.
+        Must be called while holding the lock.
+        """
+        now = self._clock()
+        flight_key = (store_key, entry.snapshot.etag)
+        if flight_key in self._flights \
+                or entry.refresh_started_at is not None \
+                and now - entry.refresh_started_at \
+                < self.refresh_interval_seconds:
+            return
+        entry.refresh_started_at = now
+        flight = self._flights[flight_key] = _Flight()
+        self._start_flight(flight_key, flight, entry, fetch, True)
+
+    def _start_flight(self, flight_key: FlightKey, flight: _Flight,
+                      entry: _CacheEntry | None, fetch: SnapshotFetcher,
+                      in_background: bool = False) -> None:
+        """Runs the given load in a new thread."""
+        flight.thread = threading.Thread(
+            target=self._run,
+            args=(flight_key, flight, entry, fetch, in_background),
+            name=f'store-load-{flight_key[0][1]}', daemon=True)
+        flight.thread.start()
+
+    def join_refreshes(self, timeout: float | None = None) -> None:
+        """
+        Waits until the loads that are running in the background
+        have finished, e.g. before checking their outcome in tests.
+        """
+        with self._lock:
+            threads = [flight.thread for flight in self._flights.values()
+                       if flight.thread is not None]
+        for thread in threads:
+            thread.join(timeout)
+
+    def patch(self, store_key: StoreKey, patcher: Patcher) \
+            -> StoreSnapshot:
+        """
+        Applies the given patch to the cached snapshot of the given
+        store, and puts the patched snapshot in its place in one
+        step. Callers get either the old or the patched snapshot,
+        never a mix of both.
+        If the snapshot is replaced while the patch is applied, e.g.
+        by a refresh, the patch is applied again to the new one.
+        Raises KeyError if nothing is cached for the store.
+        """
+        while True:  # pylint: disable=while-used
+            with self._lock:
+                entry = self._entries[store_key]
+            patched = entry.snapshot.patched(patcher)
+            with self._lock:
+                if self._entries.get(store_key) is entry:
+                    self._entries[store_key] = \
+                        _CacheEntry(patched, entry.validated_at)
+                    return patched
+
+    def invalidate(self) -> None:
+        """
+        Drops all cached snapshots so the next caller reloads them
+        from the backing store.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def last_snapshot(self, store_key: StoreKey) -> StoreSnapshot | None:
+        """
+        Returns the cached snapshot of the given store however old
+        it is, or None if there is none.
+        """
+        with self._lock:
+            if (entry := self._entries.get(store_key)) is None:
+                return None
+            return entry.snapshot
+
+    def snapshot_age(self, store_key: StoreKey) -> float | None:
+        """
+        Returns the number of seconds since the cached snapshot of
+        the given store has last been validated, or None if there
+        is none.
+        """
+        with self._lock:
+            if (entry := self._entries.get(store_key)) is None:
+                return None
+            return self._clock() - entry.validated_at
+
+    def stats(self) -> StoreCacheStats:
+        """Returns the current values of the cache counters."""
+        with self._lock:
+            now = self._clock()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'stale_hits': self.stale_hits,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'coalesced': self.coalesced,
+                'oldest_snapshot_age_seconds': max(
+                    (now - entry.validated_at
+                     for entry in self._entries.values()),
+                    default=None),
+            }
@@ -0,0 +1,110 @@
+# pylint: disable=too-few-public-methods
+
+"""Parsed contents of the backing store at a given version."""
+
+from datetime import datetime
+from enum import Enum
+import functools
+import itertools
+
+from .binary_snapshot import LazyEpisodes
+from .episode_eligibility import EpisodeEligibility
+from .episode_patchers.patcher import Patcher
+from .episode_table import EpisodeTable
+from .episode_timeline import EpisodeTimeline
+from .local_types import EventsDict
+from .transition_table import TransitionTable
+
+_unversioned_snapshot_numbers = itertools.count(1)
+
+
+class SnapshotSource(Enum):
+    """Where a snapshot that answers a request has come from."""
+    # The backing store, or the cache while it is fresh enough
+    STORE = 'store'
+    # The last cached snapshot, as the backing store took too long
+    LAST_KNOWN = 'last-known'
+    # The snapshot bundled with the deployment package
+    BUNDLED = 'bundled'
+
+
+class StoreSnapshot:
+    """
+    Parsed contents of the backing store at a given version.
+
+    Everything that depends only on the store contents, like the
+    timeline, is computed once when the snapshot is created. A
+    snapshot is not changed afterwards, so requests can share it;
+    `patched` makes a new one instead.
+    """
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 events_dict: EventsDict,
+                 etag: str | None,
+                 last_modified: datetime | None = None,
+                 transitions: TransitionTable | None = None,
+                 eligibility: EpisodeEligibility | None = None):
+        """
+        Creates a snapshot of the given contents. If the eligibility
+        of the episodes is given, the timeline is built from the
+        eligible episodes it tracks, rather than from a table of all
+        episodes.
+        """
+        self.events_dict = events_dict
+        self.etag = etag
+        self.last_modified = last_modified
+        # Identifies the contents; same as the ETag of the store if
+        # the contents are those of the store
+        self.version = etag if etag is not None and eligibility is None \
+            else f'unversioned-{next(_unversioned_snapshot_numbers)}'
+        if eligibility is None:
+            self.timeline = EpisodeTimeline(self.episode_table.eligible())
+        else:
+            self.eligibility = eligibility
+            self.timeline = EpisodeTimeline(
+                eligibility.eligible_episodes())
+        # Precomputed answers, if the store provides them
+        self.transitions = transitions
+
+    @functools.cached_property
+    def episode_table(self) -> EpisodeTable:
+        """
+        All episodes in this snapshot, sorted by start date.
+        Computed on first access.
+        """
+        episodes = self.events_dict['episodes']
+        return episodes.episode_table() \
+            if isinstance(episodes, LazyEpisodes) \
+            else EpisodeTable.from_episodes(episodes.values())
+
+    @functools.cached_property
+    def eligibility(self) -> EpisodeEligibility:
+        """
+        Eligibility of the episodes in this snapshot, for `patched`.
+        Computed on first access.
+        """
+        return EpisodeEligibility(self.events_dict['episodes'].values())
+
+    def patched(self, patcher: Patcher) -> 'StoreSnapshot':
+        """
+        Returns a new snapshot with the given patch applied to the
+        episodes of this one, which stays as it is.
+
+        The patch updates a copy of the eligibility of this snapshot,
+        so the new timeline is built from the eligible episodes as
+        they are tracked, without a table of all episodes and without
+        looking for the pivot date again.
+        The new snapshot keeps the ETag of this one, so it stays in
+        use until the store changes, but gets a version of its own,
+        as its contents differ from the store. Precomputed answers
+        are dropped.
+        """
+        episodes = self.events_dict['episodes']
+        events_dict = EventsDict({
+            'episodes': episodes.copy()
+            if isinstance(episodes, LazyEpisodes) else dict(episodes),
+        })
+        eligibility = self.eligibility.copy()
+        patcher.apply(events_dict, eligibility)
+        return StoreSnapshot(events_dict, self.etag, self.last_modified,
+                             eligibility=eligibility)
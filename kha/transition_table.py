@@ -0,0 +1,147 @@
+"""Precomputed answers to the question, as a step function of time."""
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable
+from datetime import datetime, tzinfo
+import math
+
+from .episode import Episode
+from .episode_timeline import EpisodeTimeline
+from .local_types import EventsDict, TransitionsDict, Uuid
+from .reference_instant import ReferenceInstant, local_day_boundaries
+from .settings import USER_TIMEZONE
+from .verdict import Verdict
+
+
+class Transition:  # pylint: disable=too-few-public-methods
+    """
+    Point in time from which on the answer to the question is the
+    given verdict, referring to the given episode.
+    An instant of None means since the beginning of time.
+    """
+
+    def __init__(self,
+                 instant: datetime | None,
+                 verdict: Verdict,
+                 uuid: Uuid | None,
+                 episode: Episode | None):
+        self.instant = instant
+        self.verdict = verdict
+        self.uuid = uuid
+        self.episode = episode
+
+
+class TransitionTable:
+    """
+    Sorted list of transitions that covers all of time, so the
+    answer for any point in time is a single binary search away.
+
+    A table is computed from a given events store, whose MD5 digest
+    it remembers, so a reader can tell whether both still match.
+    """
+
+    def __init__(self,
+                 transitions: list[Transition],
+                 events_md5: str,
+                 timezone: tzinfo = USER_TIMEZONE):
+        if not transitions or transitions[0].instant is not None:
+            raise ValueError(
+                'The first transition must start at the beginning'
+                ' of time')
+        self.transitions = transitions
+        self.events_md5 = events_md5
+        self.timezone = timezone
+        self._timestamps = array('q', (
+            math.floor(transition.instant.timestamp())
+            for transition in transitions[1:]
+            if transition.instant is not None
+        ))
+
+    @classmethod
+    def build(cls,
+              events_dict: EventsDict,
+              timeline: EpisodeTimeline,
+              events_md5: str) -> 'TransitionTable':
+        """
+        Computes the transitions for the given store, whose
+        eligible episodes are in the given timeline.
+        """
+        uuids = {
+            id(episode): uuid
+            for uuid, episode in events_dict['episodes'].items()
+        }
+        transitions: list[Transition] = []
+        previous_day_end: datetime | None = None
+        for episode in timeline.episodes:
+            day_start, day_end = local_day_boundaries(
+                episode.date_published.astimezone(timeline.timezone))
+            if previous_day_end is not None \
+                    and day_start < previous_day_end:
+                # Only the first episode of a day is ever the answer
+                continue
+            uuid = uuids[id(episode)]
+            if previous_day_end is None or previous_day_end < day_start:
+                transitions.append(Transition(
+                    previous_day_end, Verdict.NO, uuid, episode))
+            transitions.append(Transition(
+                day_start, Verdict.YES, uuid, episode))
+            previous_day_end = day_end
+        transitions.append(Transition(
+            previous_day_end, Verdict.UNKNOWN, None, None))
+        return cls(transitions, events_md5, timeline.timezone)
+
+    @classmethod
+    def from_json_dict(cls,
+                       transitions_dict: TransitionsDict,
+                       events_dict: EventsDict) -> 'TransitionTable':
+        """
+        Restores a table from its serialization, and resolves the
+        episodes it refers to in the given store.
+        """
+        episodes = events_dict['episodes']
+        return cls(
+            [
+                Transition(
+                    datetime.fromisoformat(instant) if instant else None,
+                    Verdict[verdict],
+                    Uuid(uuid) if uuid else None,
+                    episodes[Uuid(uuid)] if uuid else None,
+                )
+                for instant, verdict, uuid
+                in transitions_dict['transitions']
+            ],
+            events_md5=transitions_dict['eventsMd5'],
+        )
+
+    def to_json_dict(self) -> TransitionsDict:
+        """Returns a serialization structure for this table."""
+        return {
+            'eventsMd5': self.events_md5,
+            'transitions': [
+                (
+                    transition.instant.astimezone(self.timezone)
+                    .isoformat(timespec='seconds')
+                    if transition.instant else None,
+                    transition.verdict.name,
+                    transition.uuid,
+                )
+                for transition in self.transitions
+            ],
+        }
+
+    def lookup(
+        self,
+        after: Callable[..., datetime] = datetime.now,
+    ) -> tuple[Transition, datetime | None]:
+        """
+        Returns the transition that is in effect at a given point
+        in time, and the instant of the transition that follows it,
+        if any.
+        """
+        index = bisect_right(
+            self._timestamps,
+            math.floor(ReferenceInstant.of(after)().timestamp()))
+        valid_until = self.transitions[index + 1].instant \
+            if index + 1 < len(self.transitions) else None
+        return self.transitions[index], valid_until
@@ -0,0 +1,402 @@
+"""Benchmarks that run against local stand-ins
+
+Only the benchmarks against the S3 stand-in need boto3.
+"""
+
+from collections.abc import Callable
+from contextlib import closing
+from datetime import timedelta
+import functools
+import hashlib
+import os
+from pathlib import Path
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from kha import api, html_import
+from kha.binary_snapshot import dump_events
+from kha.episode import Episode
+from kha.reference_instant import ReferenceInstant
+from kha.scraper import scrape_wunschliste
+from kha.settings import EVENTS_BINARY_FILENAME, EVENTS_JSON_FILENAME, \
+    LOCAL_EVENTS_JSON_PATH
+from kha.storage_backends import LocalFileBackend, MemoryBackend, \
+    StorageBackend
+from kha.store_snapshot import StoreSnapshot
+from scripts.local_s3 import LocalS3
+from scripts.synthetic_epg import epg_listing, \
+    item_without_episode_label, unclosed_items
+from scripts.synthetic_store import synthetic_events_json
+
+BENCHMARK_BUCKET = 'kha-store-benchmark'
+
+
+def _use_dummy_credentials() -> None:
+    os.environ.pop('AWS_PROFILE', None)
+    os.environ['AWS_ACCESS_KEY_ID'] = 'benchmark'
+    os.environ['AWS_SECRET_ACCESS_KEY'] = 'benchmark'
+    os.environ['AWS_DEFAULT_REGION'] = 'eu-central-1'
+
+
+def _report(label: str, timings: list[float]) -> None:
+    milliseconds = sorted(timing * 1000 for timing in timings)
+    print(f'{label}:'
+          + f' median {statistics.median(milliseconds):.2f} ms,'
+          + f' p95 {milliseconds[int(len(milliseconds) * .95)]:.2f} ms,'
+          + f' max {milliseconds[-1]:.2f} ms')
+
+
+def _measure(request: Callable[[], object],
+             requests: int) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        request()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def s3_clients(requests: int = 200) -> None:
+    """Compares per-request latency of reading the events store
+    with a new S3 client per request against the shared client
+    from `kha.s3_clients`.
+
+    :param `requests`:
+        Number of requests to measure per variant.
+    """
+    # pylint: disable=import-outside-toplevel
+    import boto3
+    from botocore.config import Config
+
+    from kha.s3_clients import clear_s3_clients, s3_client
+    _use_dummy_credentials()
+    with LocalS3() as local_s3:
+        local_s3.put_object(BENCHMARK_BUCKET, EVENTS_JSON_FILENAME,
+                            LOCAL_EVENTS_JSON_PATH.read_bytes())
+
+        def with_new_client() -> None:
+            boto3.client(
+                's3', endpoint_url=local_s3.endpoint_url,
+                config=Config(s3={'addressing_style': 'path'}),
+            ).get_object(Bucket=BENCHMARK_BUCKET,
+                         Key=EVENTS_JSON_FILENAME)['Body'].read()
+
+        def with_shared_client() -> None:
+            s3_client(endpoint_url=local_s3.endpoint_url).get_object(
+                Bucket=BENCHMARK_BUCKET,
+                Key=EVENTS_JSON_FILENAME)['Body'].read()
+
+        clear_s3_clients()
+        print(f'{requests} requests against {local_s3.endpoint_url}')
+        _report('New client per request',
+                _measure(with_new_client, requests))
+        _report('Shared client',
+                _measure(with_shared_client, requests))
+
+
+def binary_snapshot(episodes: int = 100_000, repeat: int = 5) -> None:
+    """Compares the time it takes to load a synthetic events store
+    from its JSON and from its binary snapshot.
+
+    :param `episodes`:
+        Number of episodes in the synthetic store.
+    :param `repeat`:
+        Number of loads to measure per variant.
+    """
+    events_json = synthetic_events_json(episodes)
+    json_store = _store_of(events_json)
+    binary = dump_events(
+        _fetch_snapshot(json_store).events_dict,
+        hashlib.md5(events_json, usedforsecurity=False).hexdigest())
+    binary_store = _store_of(events_json, binary)
+    print(f'{episodes} episodes:'
+          f' JSON {len(events_json) / 1e6:.1f} MB,'
+          f' binary {len(binary) / 1e6:.1f} MB')
+
+    def from_binary_with_episodes() -> None:
+        snapshot = _fetch_snapshot(binary_store)
+        for _ in snapshot.events_dict['episodes'].values():
+            pass
+
+    json_timings = _measure(lambda: _fetch_snapshot(json_store), repeat)
+    binary_timings = _measure(lambda: _fetch_snapshot(binary_store),
+                              repeat)
+    _report('JSON', json_timings)
+    _report('Binary', binary_timings)
+    _report('Binary, all episodes created',
+            _measure(from_binary_with_episodes, repeat))
+    speedup = statistics.median(json_timings) \
+        / statistics.median(binary_timings)
+    print(f'Speedup: {speedup:.1f}x')
+
+
+def episode_objects(count: int = 100_000, checks: int = 10_000) \
+        -> None:
+    """Measures the memory taken by each Episode of a synthetic
+    events store, and the throughput of `check()` against it.
+
+    :param `count`:
+        Number of episodes in the synthetic store.
+    :param `checks`:
+        Number of checks to measure, at random reference points
+        within the lifetime of the store.
+    """
+    snapshot = _fetch_snapshot(_store_of(synthetic_events_json(count)))
+    first, *_, last = snapshot.timeline.episodes
+    tracemalloc.start()
+    # Copies share their attribute values, so only the Episode
+    # objects themselves are measured
+    copies = [
+        Episode(episode.episode_number, episode.name,
+                episode.date_published, episode.sd_date_published,
+                episode.is_rerun, episode.is_spinoff, episode.timezone)
+        for episode in snapshot.timeline.episodes
+    ]
+    copies_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f'{count} episodes:'
+          f' {copies_size / len(copies):.0f} bytes per Episode object')
+
+    rng = random.Random(0)
+    span = (last.date_published - first.date_published).total_seconds()
+    instants = [
+        first.date_published + timedelta(seconds=rng.uniform(0, span))
+        for _ in range(checks)
+    ]
+    start = time.perf_counter()
+    for instant in instants:
+        api.check(now=lambda instant=instant: instant,
+                  timeline=snapshot.timeline)
+    elapsed = time.perf_counter() - start
+    print(f'check(): {checks / elapsed:,.0f} calls per second')
+
+
+def scaling(sizes: tuple[int, ...] = (1_000, 10_000, 100_000, 1_000_000),
+            repeat: int = 5) -> None:
+    """Measures how the time and peak memory of each stage of
+    answering a request grow with the size of a synthetic store:
+    loading the store, filtering eligible episodes, finding the
+    next episode, checking, and rendering the main page.
+
+    Time is measured without, and peak memory with, allocation
+    tracing, as tracing slows down Python code considerably.
+    The main page is rendered by the app, against the store in
+    memory, without the rendered page cache.
+
+    :param `sizes`:
+        Numbers of episodes in the synthetic stores.
+    :param `repeat`:
+        Number of runs to measure per stage and size.
+    """
+    backend = MemoryBackend()
+    api.set_storage_backend(backend)
+    for size in sizes:
+        events_json = synthetic_events_json(size)
+        backend.put(EVENTS_JSON_FILENAME, events_json)
+        api.store_cache.invalidate()
+        print(f'{size} episodes,'
+              f' {len(events_json) / 1e6:.1f} MB of JSON:')
+        for label, stage in _scaling_stages(
+                backend, api.snapshot_from_store()).items():
+            timings = _measure(stage, repeat)
+            print(f'  {label}:'
+                  f' median {statistics.median(timings) * 1000:.3f} ms,'
+                  f' peak memory {_peak_memory(stage) / 1024:,.0f} KiB')
+    api.set_storage_backend(None)
+    api.store_cache.invalidate()
+
+
+def storage_backends(episodes: int = 10_000, requests: int = 200) \
+        -> None:
+    """Compares the storage backends on a synthetic store: the
+    latency of revalidating the events JSON, of reading it, and of
+    loading a snapshot from it without `store_cache`.
+
+    The S3 backend runs against a local S3 stand-in, and only if
+    boto3 is installed.
+
+    :param `episodes`:
+        Number of episodes in the synthetic store.
+    :param `requests`:
+        Number of requests to measure per backend and operation.
+    """
+    events_json = synthetic_events_json(episodes)
+    print(f'{episodes} episodes, {len(events_json) / 1e6:.1f} MB of JSON')
+    with tempfile.TemporaryDirectory() as directory:
+        backends: dict[str, StorageBackend] = {
+            'Local file': LocalFileBackend(Path(directory)),
+            'Memory': MemoryBackend(),
+        }
+        for backend in backends.values():
+            backend.put(EVENTS_JSON_FILENAME, events_json)
+        for label, backend in backends.items():
+            _report_backend(label, backend, requests)
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            from kha.s3_clients import S3Backend, clear_s3_clients, \
+                s3_client
+        except ImportError:
+            print('S3: skipped, as boto3 is not installed')
+            return
+        _use_dummy_credentials()
+        with LocalS3() as local_s3:
+            local_s3.put_object(BENCHMARK_BUCKET, EVENTS_JSON_FILENAME,
+                                events_json)
+            _report_backend('S3 stand-in', S3Backend(
+                BENCHMARK_BUCKET,
+                s3_client(endpoint_url=local_s3.endpoint_url)), requests)
+        clear_s3_clients()
+
+
+def scraper(sizes_kib: tuple[int, ...] = (16, 64, 256, 1024),
+            repeat: int = 5) -> None:
+    """Measures the time it takes to parse EPG HTML per KiB of
+    input, on listings of several sizes and on malformed inputs
+    that made the previous regular expressions backtrack. The time
+    per KiB stays about the same however large the input grows.
+
+    :param `sizes_kib`:
+        Sizes of the inputs in KiB.
+    :param `repeat`:
+        Number of runs to measure per input and size.
+    """
+    inputs: dict[str, Callable[[int], str]] = {
+        'Listing': epg_listing,
+        'Item without episode label': item_without_episode_label,
+        'Unclosed items': unclosed_items,
+    }
+
+    def parse(html: str) -> None:
+        try:
+            list(scrape_wunschliste(html))
+        except RuntimeError:
+            pass
+
+    for label, make_html in inputs.items():
+        print(f'{label}:')
+        for size_kib in sizes_kib:
+            html = make_html(size_kib * 1024)
+            timings = _measure(functools.partial(parse, html), repeat)
+            print(f'  {size_kib:,} KiB:'
+                  f' median {statistics.median(timings) * 1000:.2f} ms,'
+                  f' {statistics.median(timings) * 1e6 / size_kib:.0f}'
+                  ' µs per KiB')
+
+
+def import_html(files: int = 10_000,
+                workers: tuple[int, ...] | None = None) -> None:
+    """Measures how long `kha import-html` takes for a corpus of
+    synthetic EPG pages with several numbers of worker processes.
+    The time shrinks about in proportion to the number of workers,
+    up to the number of cores.
+
+    :param `files`:
+        Number of EPG pages in the corpus.
+    :param `workers`:
+        Numbers of worker processes to measure, by default 1, 2, 4
+        and so on up to the number of cores.
+    """
+    cores = os.cpu_count() or 1
+    workers = workers or tuple(
+        2 ** power for power in range(cores.bit_length())) \
+        + ((cores,) if cores & (cores - 1) else ())
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = Path(directory) / 'corpus'
+        corpus.mkdir()
+        for index in range(files):
+            (corpus / f'{index:05d}.html').write_text(
+                epg_listing(8 * 1024, first_week=index % 520))
+        baseline = None
+        for count in workers:
+            print(f'{count} workers: ', end='', flush=True)
+            start = time.perf_counter()
+            html_import.import_html(str(corpus),
+                                    out=str(Path(directory) / 'out.json'),
+                                    max_workers=count)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed * count
+            print(f'  {baseline / elapsed / count:.0%} of linear speedup')
+
+
+def _report_backend(label: str, backend: StorageBackend,
+                    requests: int) -> None:
+    def read() -> None:
+        stored = backend.get_existing(EVENTS_JSON_FILENAME)
+        with closing(stored.body):
+            stored.body.read()
+
+    def load() -> None:
+        api.store_cache.invalidate()
+        api.snapshot_from_store(backend)
+
+    _report(f'{label}, revalidate',
+            _measure(lambda: backend.head(EVENTS_JSON_FILENAME), requests))
+    _report(f'{label}, read', _measure(read, requests))
+    _report(f'{label}, load snapshot',
+            _measure(load, max(1, requests // 20)))
+    api.store_cache.invalidate()
+
+
+def _scaling_stages(backend: StorageBackend, snapshot: StoreSnapshot) \
+        -> dict[str, Callable[[], object]]:
+    """Returns each stage of the scaling benchmark by its label.
+    The store is loaded from the backend as on a cache miss.
+    Reference points are halfway through the lifetime of the store,
+    except for the main page, which is rendered for the current time.
+    """
+    # Imported late, as the app sets the process-wide locale
+    import app  # pylint: disable=import-outside-toplevel
+    all_episodes = list(snapshot.events_dict['episodes'].values())
+    first, *_, last = snapshot.timeline.episodes
+    middle = first.date_published \
+        + (last.date_published - first.date_published) / 2
+    reference = ReferenceInstant(lambda: middle)
+
+    def render_main_page() -> None:
+        app.rendered_page_cache.clear()
+        app.app.test_client().get('/')
+
+    return {
+        'Load': lambda: _fetch_snapshot(backend),
+        'filter_eligible_episodes':
+            lambda: api.filter_eligible_episodes(all_episodes),
+        'next_episode': lambda: api.next_episode(
+            after=reference, timeline=snapshot.timeline),
+        'check': lambda: api.check(now=reference,
+                                   timeline=snapshot.timeline),
+        'Render /': render_main_page,
+    }
+
+
+def _store_of(events_json: bytes,
+              binary: bytes | None = None) -> MemoryBackend:
+    """Returns a backend in memory with the given events JSON, and
+    with its binary snapshot if one is given."""
+    backend = MemoryBackend()
+    backend.put(EVENTS_JSON_FILENAME, events_json)
+    if binary is not None:
+        backend.put(EVENTS_BINARY_FILENAME, binary)
+    return backend
+
+
+def _fetch_snapshot(backend: StorageBackend) -> StoreSnapshot:
+    """Loads the store from the backend the way the app does when
+    nothing is cached."""
+    if (snapshot := api._fetch_snapshot(  # pylint: disable=protected-access
+            backend, None)) is None:
+        raise RuntimeError(f'Nothing loaded from store {backend.name}')
+    return snapshot
+
+
+def _peak_memory(stage: Callable[[], object]) -> int:
+    """Returns the peak memory allocated while running the stage."""
+    tracemalloc.start()
+    try:
+        stage()
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peak
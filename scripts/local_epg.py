@@ -0,0 +1,156 @@
+"""Minimal local stand-in for the wunschliste EPG, for tests"""
+
+from collections.abc import Iterable
+from email.message import Message
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from kha.storage_backends import etag_of
+from scripts.local_server import LocalServer
+
+PageKey = tuple[str, frozenset[tuple[str, str]]]
+"""Path and query parameters of a page."""
+
+
+class LocalEpg(LocalServer):  # pylint: disable=too-many-instance-attributes
+    """Serves pages from memory over HTTP, trickling their bodies.
+
+    Each body is sent in pieces of `chunk_size` bytes, with a pause
+    of `chunk_delay_seconds` before each piece, like a slow server
+    does. Pages are added with `put_page`, and made to fail a few
+    times with `fail_page`.
+
+    Sends an ETag and a Last-Modified date with each page, unless
+    `send_validators` is off, and answers conditional requests for
+    unchanged pages with `304 Not Modified`.
+
+    Counts the connections that clients open, and the largest
+    number of requests that it has served at once.
+
+    Use as a context manager, and request pages from `url`.
+    """
+
+    def __init__(self,
+                 chunk_size: int = 1024,
+                 chunk_delay_seconds: float = 0) -> None:
+        self.chunk_size = chunk_size
+        self.chunk_delay_seconds = chunk_delay_seconds
+        self.send_validators = True
+        self.pages: dict[PageKey, bytes] = {}
+        self.last_modified: dict[PageKey, str] = {}
+        self.failures: dict[PageKey, list[HTTPStatus]] = {}
+        self.connection_count = 0
+        self.active_requests = 0
+        self.max_active_requests = 0
+        super().__init__()
+
+    @property
+    def url(self) -> str:
+        """URL of the root path."""
+        return f'{self.origin}/'
+
+    def put_page(self, path: str, body: bytes,
+                 params: dict[str, str] | None = None) -> None:
+        """Serves the given body at the given path and parameters."""
+        key = _page_key(path, (params or {}).items())
+        with self._lock:
+            self.pages[key] = body
+            self.last_modified[key] = formatdate(usegmt=True)
+
+    def fail_page(self, path: str, count: int,
+                  params: dict[str, str] | None = None,
+                  status: HTTPStatus = HTTPStatus.SERVICE_UNAVAILABLE) \
+            -> None:
+        """
+        Answers the next `count` requests for the given page with
+        the given error status.
+        """
+        with self._lock:
+            self.failures[_page_key(path, (params or {}).items())] = \
+                [status] * count
+
+    def _send_page(self, handler: BaseHTTPRequestHandler) -> None:
+        """Sends the requested page, if there is one."""
+        target = urlsplit(handler.path)
+        key = _page_key(target.path, parse_qsl(target.query))
+        with self._lock:
+            body = self.pages.get(key)
+            last_modified = self.last_modified.get(key)
+            failures = self.failures.get(key)
+            status = failures.pop() if failures else None
+        if status is not None:
+            handler.send_error(status)
+            return
+        if body is None:
+            handler.send_error(HTTPStatus.NOT_FOUND)
+            return
+        etag = etag_of(body)
+        if self.send_validators \
+                and _not_modified(handler.headers, etag, last_modified):
+            handler.send_response(HTTPStatus.NOT_MODIFIED)
+            handler.send_header('ETag', etag)
+            handler.end_headers()
+            return
+        handler.send_response(HTTPStatus.OK)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        if self.send_validators:
+            handler.send_header('ETag', etag)
+            handler.send_header('Last-Modified', str(last_modified))
+        handler.end_headers()
+        for start in range(0, len(body), self.chunk_size):
+            time.sleep(self.chunk_delay_seconds)
+            handler.wfile.write(body[start:start + self.chunk_size])
+            handler.wfile.flush()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        local_epg = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Handles a single request."""
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with local_epg._lock:  # pylint: disable=protected-access
+                    local_epg.connection_count += 1
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """Sends the page, if there is one."""
+                with local_epg._lock:  # pylint: disable=protected-access
+                    local_epg.request_count += 1
+                    local_epg.active_requests += 1
+                    local_epg.max_active_requests = max(
+                        local_epg.max_active_requests,
+                        local_epg.active_requests)
+                try:
+                    local_epg._send_page(self)  # pylint: disable=protected-access
+                finally:
+                    with local_epg._lock:  # pylint: disable=protected-access
+                        local_epg.active_requests -= 1
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        return Handler
+
+
+def _not_modified(headers: Message, etag: str,
+                  last_modified: str | None) -> bool:
+    """
+    Checks the validators of a conditional request. `If-None-Match`
+    takes precedence, as in RFC 9110.
+    """
+    if (if_none_match := headers['If-None-Match']) is not None:
+        return if_none_match == etag
+    return (if_modified_since := headers['If-Modified-Since']) is not None \
+        and if_modified_since == last_modified
+
+
+def _page_key(path: str,
+              params: Iterable[tuple[str, str]]) -> PageKey:
+    return path, frozenset(params)
@@ -0,0 +1,105 @@
+"""Minimal local stand-in for S3, for benchmarks and tests"""
+
+from email.utils import formatdate
+import hashlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+import time
+from urllib.parse import unquote, urlsplit
+
+from scripts.local_server import LocalServer
+
+
+class LocalS3(LocalServer):
+    """Serves objects from memory over the S3 REST protocol.
+
+    Supports just enough of the protocol for the read path of kha:
+    path-style `GET` and `HEAD` requests for objects, including
+    `ETag`, `Last-Modified` and `If-None-Match`.
+    Objects are added with `put_object`, not over HTTP.
+    Set `latency_seconds` to delay every response, like a degraded
+    S3 does.
+
+    Use as a context manager, and point an S3 client to
+    `endpoint_url`.
+    """
+
+    def __init__(self) -> None:
+        self.objects: dict[tuple[str, str], tuple[bytes, str]] = {}
+        self.latency_seconds = 0.0
+        super().__init__()
+
+    @property
+    def endpoint_url(self) -> str:
+        """URL to pass as `endpoint_url` to an S3 client."""
+        return self.origin
+
+    def put_object(self, bucket: str, key: str, body: bytes) -> str:
+        """Stores an object and returns its new ETag."""
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        with self._lock:
+            self.objects[(bucket, key)] = (body, etag)
+        return etag
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        local_s3 = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Handles a single S3 request."""
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """Handles GetObject."""
+                self._respond(with_body=True)
+
+            def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+                """Handles HeadObject."""
+                self._respond(with_body=False)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+            def _respond(self, with_body: bool) -> None:
+                with local_s3._lock:  # pylint: disable=protected-access
+                    local_s3.request_count += 1
+                    bucket, _, key = unquote(
+                        urlsplit(self.path).path).lstrip('/') \
+                        .partition('/')
+                    stored = local_s3.objects.get((bucket, key))
+                time.sleep(local_s3.latency_seconds)
+                if stored is None:
+                    self._send_error(HTTPStatus.NOT_FOUND, 'NoSuchKey')
+                    return
+                body, etag = stored
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(HTTPStatus.NOT_MODIFIED)
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified',
+                                     formatdate(usegmt=True))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(HTTPStatus.OK)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified',
+                                 formatdate(usegmt=True))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if with_body:
+                    self.wfile.write(body)
+
+            def _send_error(self, status: HTTPStatus, code: str) -> None:
+                body = (
+                    '<?xml version="1.0" encoding="UTF-8"?>'
+                    + f'<Error><Code>{code}</Code>'
+                    + f'<Message>{status.phrase}</Message></Error>'
+                ).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
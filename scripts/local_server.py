@@ -0,0 +1,44 @@
+"""Base for local stand-ins of HTTP services, for benchmarks and tests"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from types import TracebackType
+from typing import TypeVar
+
+_LocalServerT = TypeVar('_LocalServerT', bound='LocalServer')
+
+
+class LocalServer:
+    """Serves HTTP on a free local port, from a background thread.
+
+    Subclasses provide the handler class. Use as a context manager.
+    """
+
+    def __init__(self) -> None:
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                           self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+
+    @property
+    def origin(self) -> str:
+        """Scheme, host and port of the server."""
+        host, port = self._server.server_address[:2]
+        return f'http://{host!s}:{port}'
+
+    def __enter__(self: _LocalServerT) -> _LocalServerT:
+        self._thread.start()
+        return self
+
+    def __exit__(self,
+                 exc_type: type[BaseException] | None,
+                 exc_value: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        raise NotImplementedError
@@ -1,11 +1,19 @@
 """Script to manage S3 objects"""
 
+import hashlib
+import json
+from pathlib import Path
 import sys
 
-import boto3
 from botocore import exceptions
 
-from kha.settings import EVENTS_JSON_FILENAME
+from kha import api
+from kha.binary_snapshot import dump_events
+from kha.s3_clients import S3Backend, s3_client
+from kha.settings import EVENTS_BINARY_FILENAME, EVENTS_JSON_FILENAME, \
+    TRANSITIONS_JSON_FILENAME
+from kha.sharded_store import upload_shards
+from kha.transition_table import TransitionTable
 
 
 def upload_events(source_json: str,
@@ -13,8 +21,17 @@ def upload_events(source_json: str,
                   profile_name: str) -> None:
     """Uploads an events database to an S3 bucket.
 
+    Along with the events, uploads a binary snapshot of them, which
+    loads faster, and a transition table that is computed from them
+    and cross-validated before the upload. Also keeps the sharded
+    layout of the store up to date, uploading only the shards whose
+    contents have changed.
+
     Note: The target key is always `events.kha.json`, regardless
-    of the file name given in `source_json`.
+    of the file name given in `source_json`. The binary snapshot
+    goes to `events.kha.bin`, the transition table to
+    `transitions.kha.json`, the shards to `events/<year>.kha.json`
+    and their manifest to `events.manifest.json`.
 
     :param `source_json`:
         File name to upload.
@@ -23,14 +40,47 @@ def upload_events(source_json: str,
     :param `profile_name`:
         Name of the AWS profile to use.
     """
-    session = boto3.Session(profile_name=profile_name)
+    events_json = Path(source_json).read_bytes()
+    events_md5 = hashlib.md5(events_json, usedforsecurity=False) \
+        .hexdigest()
+    snapshot = api.snapshot_from_json(events_json)
+    # Verify the serialized form, as that is what readers will see
+    transitions = TransitionTable.from_json_dict(
+        TransitionTable.build(
+            snapshot.events_dict,
+            snapshot.timeline,
+            events_md5=events_md5,
+        ).to_json_dict(),
+        snapshot.events_dict,
+    )
+    if mismatches := api.transition_mismatches(
+            transitions, snapshot.timeline):
+        print('Transition table disagrees with episodes on: '
+              + ', '.join(day.isoformat() for day in mismatches),
+              file=sys.stderr)
+        sys.exit(1)
+
     try:
-        s3_client = session.client('s3')
+        backend = S3Backend(target_bucket,
+                            s3_client(profile_name=profile_name))
     except exceptions.CredentialRetrievalError as error:
         print(error, file=sys.stderr)
         sys.exit(1)
     print(f'Uploading {source_json} to bucket: {target_bucket}')
-    s3_client.upload_file(Filename=source_json,
-                          Bucket=target_bucket,
-                          Key=EVENTS_JSON_FILENAME)
+    # The ETag is the MD5 digest, which readers use to match the
+    # binary snapshot and the transition table to the events
+    backend.put(EVENTS_JSON_FILENAME, events_json)
+    print(f'Uploading {len(transitions.transitions)} transitions'
+          f' to bucket: {target_bucket}')
+    backend.put(TRANSITIONS_JSON_FILENAME,
+                json.dumps(transitions.to_json_dict()).encode())
+    # Readers ask for the transitions only if the binary snapshot
+    # lists them, so it goes up once they are there
+    print(f'Uploading binary snapshot to bucket: {target_bucket}')
+    backend.put(EVENTS_BINARY_FILENAME,
+                dump_events(snapshot.events_dict, events_md5,
+                            with_transitions=True))
+    written, deleted = upload_shards(backend, events_json)
+    print(f'Uploaded {len(written)} changed shards and the manifest,'
+          f' deleted {len(deleted)} shards')
     print('Done')
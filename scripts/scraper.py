@@ -1,9 +1,23 @@
 """Runner script for web scraping"""
 
-from kha import scraper
+from kha import scrape_runner
+from kha.scrape_cache import scrape_cache
 
 
 def run() -> None:
-    """Runs the scraper and prints the results."""
-    for episode in scraper.scrape_wunschliste():
+    """
+    Runs the scraper and prints the episodes. Downloads and parses
+    the EPG page only if it has changed since the last run.
+    """
+    for episode in scrape_cache().scrape():
+        print(repr(episode))
+
+
+def run_all() -> None:
+    """
+    Scrapes all sources in `WUNSCHLISTE_SOURCES` concurrently, and
+    prints their merged episodes. Downloads and parses each source
+    only if it has changed since the last run.
+    """
+    for episode in scrape_runner.scrape_sources(cache=scrape_cache()):
         print(repr(episode))
@@ -0,0 +1,81 @@
+"""Generator for synthetic wunschliste EPG HTML of any size"""
+
+from datetime import datetime, timedelta
+
+from kha.settings import WUNSCHLISTE_IMPLIED_TIMEZONE
+
+FIRST_BROADCAST = datetime(2021, 8, 18, 20, 15,
+                           tzinfo=WUNSCHLISTE_IMPLIED_TIMEZONE)
+FIRST_EPISODE_NUMBER = 569
+WEEKDAYS = ('Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So')
+
+
+def epg_item(index: int,
+             start: datetime,
+             episode_number: int,
+             name: str,
+             is_rerun: bool = False) -> str:
+    """Returns a list item in the markup of the wunschliste EPG."""
+    suffix = ' (Wdh.)' if is_rerun \
+        else '<span class="hinweis">NEU</span>'
+    return (
+        f'<li id="2_{index}" class="lp"'
+        f' onClick="epg_details(\'GD5_{index:08d}\',\'2_{index}\');">'
+        '<label class="la"><span class="w180-80" title="ZDF">'
+        '<strong class="no-smartphone">ZDF</strong>'
+        '<strong class="smartphone">ZDF</strong></span>'
+        f'<span class="w100-70">{epg_date(start)}</span>'
+        f'<span class="w50">{start:%H:%M} h</span></label>'
+        '<span class="ft340-210"><label class="se">'
+        f'<label class="epg_ep" title="Episode">{episode_number}</label>'
+        f'</label><strong>{name}</strong>{suffix}</span></li>'
+        f'<div id="t_2_{index}" class="epg_text"></div>'
+    )
+
+
+def epg_date(start: datetime) -> str:
+    """Returns a date in the markup of the wunschliste EPG."""
+    return (f'{WEEKDAYS[start.weekday()]}, {start:%d.%m.}'
+            f'<label class="no-smartphone">{start:%Y}</label>')
+
+
+def epg_listing(size: int, first_week: int = 0) -> str:
+    """
+    Returns an EPG listing of at least `size` characters, with a
+    new episode every week and its rerun the night after, starting
+    `first_week` weeks after the first broadcast.
+    """
+    items: list[str] = []
+    length = 0
+    while length < size:  # pylint: disable=while-used
+        week, is_rerun = divmod(len(items), 2)
+        week += first_week
+        start = FIRST_BROADCAST + timedelta(weeks=week)
+        if is_rerun:
+            start += timedelta(hours=7, minutes=20)
+        number = FIRST_EPISODE_NUMBER + week
+        items.append(epg_item(len(items), start, number,
+                              f'Folge {number}', bool(is_rerun)))
+        length += len(items[-1])
+    return ''.join(items)
+
+
+def item_without_episode_label(size: int) -> str:
+    """
+    Returns a list item of at least `size` characters with dates
+    and times but no episode label, on which backtracking parsers
+    take polynomial time.
+    """
+    slot = (f'<span>{epg_date(FIRST_BROADCAST)}</span>'
+            f'<span>{FIRST_BROADCAST:%H:%M} h</span>')
+    return f'<li class="lp">{slot * (size // len(slot) + 1)}</li>'
+
+
+def unclosed_items(size: int) -> str:
+    """
+    Returns at least `size` characters of list items that are
+    never closed, which take quadratic time to select by searching
+    for the end of each.
+    """
+    item = '<li class="lp">x'
+    return item * (size // len(item) + 1)
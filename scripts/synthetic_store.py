@@ -0,0 +1,113 @@
+"""Generator for synthetic events stores of any size"""
+
+from datetime import date, datetime, time, timedelta
+import json
+from pathlib import Path
+import random
+from typing import Any
+import uuid
+
+from kha.settings import USER_TIMEZONE
+
+FIRST_BROADCAST = date(1967, 10, 20)
+REGULAR_TIME = time(20, 15)
+# Reruns go out late at night, which now and then is a night when
+# daylight saving time begins or ends
+RERUN_TIMES = (time(0, 30), time(2, 30), time(23, 45))
+# Keeps even a store of a million episodes within datetime.max
+SPAN_DAYS = 730_000
+
+RERUN_SHARE = .2
+SPINOFF_SHARE = .08
+STRING_NUMBER_SHARE = .01
+
+
+def synthetic_events_dict(episodes: int,
+                          seed: int = 0) -> dict[str, Any]:
+    """Returns an events store with the given number of episodes,
+    in the structure of `share/events.kha.schema.json`.
+
+    The store has a realistic mix of regular episodes, reruns of
+    earlier episodes, spinoffs, and string episode numbers. Start
+    dates are in local time, so their UTC offsets change with
+    daylight saving time. The store only depends on the arguments.
+
+    :param `episodes`:
+        Number of episodes in the store.
+    :param `seed`:
+        Seed for the random choices.
+    """
+    rng = random.Random(seed)
+    days_between = min(28, max(1, SPAN_DAYS // max(episodes, 1)))
+    day = FIRST_BROADCAST
+    regular_count = spinoff_count = 0
+    entries: list[tuple[int | str, str, datetime, bool, bool]] = []
+    for _ in range(episodes):
+        day += timedelta(days=rng.randint(1, 2 * days_between - 1))
+        roll = rng.random()
+        if roll < RERUN_SHARE and entries:
+            number, name, _, _, is_spinoff = rng.choice(entries)
+            entries.append((number, name, _local(day, rng.choice(
+                RERUN_TIMES)), True, is_spinoff))
+        elif roll < RERUN_SHARE + SPINOFF_SHARE:
+            spinoff_count += 1
+            entries.append((f'XY-Spezial {spinoff_count}',
+                            f'Spezial {spinoff_count}',
+                            _local(day, REGULAR_TIME), False, True))
+        else:
+            regular_count += 1
+            regular_number: int | str = regular_count \
+                if rng.random() >= STRING_NUMBER_SHARE \
+                else f'{regular_count}a'
+            entries.append((regular_number, f'Folge {regular_number}',
+                            _local(day, REGULAR_TIME), False, False))
+    rng.shuffle(entries)
+    return {'episodes': {
+        str(uuid.UUID(int=rng.getrandbits(128))).upper(): {
+            '@type': 'Episode',
+            'episodeNumber': number,
+            'name': name,
+            'datePublished': date_published.isoformat(),
+            'sdDatePublished': (
+                date_published
+                - timedelta(seconds=rng.randrange(86_400, 60 * 86_400))
+            ).isoformat(),
+            'isRerun': is_rerun,
+            'isSpinoff': is_spinoff,
+        }
+        for number, name, date_published, is_rerun, is_spinoff
+        in entries
+    }}
+
+
+def synthetic_events_json(episodes: int, seed: int = 0) -> bytes:
+    """Returns the serialized form of `synthetic_events_dict`.
+
+    :param `episodes`:
+        Number of episodes in the store.
+    :param `seed`:
+        Seed for the random choices.
+    """
+    return json.dumps(synthetic_events_dict(episodes, seed)).encode()
+
+
+def run(episodes: int = 10_000,
+        out: str = 'synthetic.events.kha.json',
+        seed: int = 0) -> None:
+    """Writes a synthetic events store to a file.
+
+    :param `episodes`:
+        Number of episodes in the store.
+    :param `out`:
+        Path of the file to write.
+    :param `seed`:
+        Seed for the random choices.
+    """
+    Path(out).write_text(
+        json.dumps(synthetic_events_dict(episodes, seed), indent=2)
+        + '\n', encoding='utf-8')
+    print(f'Wrote {episodes} episodes to {out}')
+
+
+def _local(day: date, local_time: time) -> datetime:
+    return datetime.combine(day, local_time, tzinfo=USER_TIMEZONE)
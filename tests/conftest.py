@@ -1,12 +1,22 @@
 # pylint: disable=missing-function-docstring, missing-module-docstring
 
-from collections.abc import Callable
-from datetime import datetime, timezone, tzinfo
+from collections.abc import Callable, Iterator
+from datetime import datetime, timedelta, timezone, tzinfo
+import importlib.util
 from typing import Any
 from zoneinfo import ZoneInfo
 
 import pytest
 
+from kha import api
+import kha.scraper
+from kha.episode import Episode
+from scripts.local_epg import LocalEpg
+
+# Only the S3 tests need boto3
+collect_ignore = [] if importlib.util.find_spec('boto3') \
+    else ['test_s3_clients.py']
+
 
 @pytest.fixture(name='local_timezone')
 def fixture_local_timezone() -> tzinfo:
@@ -60,3 +70,42 @@ def fixture_episode_boilerplate(
         'is_spinoff': False,
         'timezone': local_timezone,
     }
+
+
+@pytest.fixture(name='weekly_episodes')
+def fixture_weekly_episodes(
+    episode_boilerplate: dict[str, Any],
+) -> list[Episode]:
+    first_start = datetime.fromisoformat('2021-01-06T20:15:00+01:00')
+    return [
+        Episode(
+            number,
+            name=f'Folge {number}',
+            **(episode_boilerplate | {
+                'date_published': first_start
+                + timedelta(weeks=number),
+            }),
+        )
+        for number in range(52)
+    ]
+
+
+@pytest.fixture(name='empty_store_cache', autouse=True)
+def fixture_empty_store_cache() -> Iterator[None]:
+    api.store_cache.invalidate()
+    yield
+    api.store_cache.invalidate()
+
+
+@pytest.fixture(name='configured_storage_backend', autouse=True)
+def fixture_configured_storage_backend() -> Iterator[None]:
+    yield
+    api.set_storage_backend(None)
+
+
+@pytest.fixture(name='local_epg')
+def fixture_local_epg(monkeypatch: pytest.MonkeyPatch) \
+        -> Iterator[LocalEpg]:
+    with LocalEpg() as local_epg:
+        monkeypatch.setattr(kha.scraper, 'WUNSCHLISTE_URL', local_epg.url)
+        yield local_epg
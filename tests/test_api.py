@@ -8,6 +8,7 @@ import pytest
 
 from kha import api
 from kha.episode import Episode
+from kha.verdict import Verdict
 
 
 @pytest.fixture(name='episode_566')
@@ -80,3 +81,29 @@ def test_no_upcoming_episodes(episodes: Iterable[Episode],
     episode = api.next_episode(episodes=episodes,
                                after=a_bit_past_midnight)
     assert episode is None
+
+
+def test_validity_before_episode(episodes: Iterable[Episode],
+                                 now: Callable[[], datetime]) -> None:
+    response = api.check(episodes=episodes, now=now)
+    assert response.verdict == Verdict.NO
+    assert response.valid_from == '2021-05-13T00:00:00+02:00'
+    assert response.valid_until == '2021-06-09T00:00:00+02:00'
+
+
+def test_validity_on_episode_day(
+        episodes: Iterable[Episode],
+        while_episode_is_running: Callable[[], datetime]) -> None:
+    response = api.check(episodes=episodes, now=while_episode_is_running)
+    assert response.verdict == Verdict.YES
+    assert response.valid_from == '2021-06-09T00:00:00+02:00'
+    assert response.valid_until == '2021-06-10T00:00:00+02:00'
+
+
+def test_validity_after_last_episode(
+        episodes: Iterable[Episode],
+        a_bit_past_midnight: Callable[[], datetime]) -> None:
+    response = api.check(episodes=episodes, now=a_bit_past_midnight)
+    assert response.verdict == Verdict.UNKNOWN
+    assert response.valid_from == '2021-06-10T00:00:00+02:00'
+    assert response.valid_until is None
@@ -0,0 +1,113 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from datetime import datetime
+import hashlib
+from typing import Any
+
+import pytest
+
+from kha import api, binary_snapshot
+from kha.binary_snapshot import dump_events, load_events
+from kha.episode import Episode
+from kha.local_types import EventsDict, Uuid
+from kha.settings import LOCAL_EVENTS_JSON_PATH
+
+
+def attributes(events_dict: EventsDict) -> dict[Uuid, tuple[Any, ...]]:
+    return {
+        uuid: (
+            episode.episode_number,
+            episode.name,
+            episode.date_published,
+            episode.sd_date_published,
+            episode.is_rerun,
+            episode.is_spinoff,
+            episode.timezone,
+        )
+        for uuid, episode in events_dict['episodes'].items()
+    }
+
+
+def test_round_trip_matches_json() -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    events_md5 = hashlib.md5(events_json).hexdigest()
+    from_json = api.snapshot_from_json(events_json).events_dict
+    from_binary, binary_events_md5 = load_events(
+        dump_events(from_json, events_md5))
+    assert binary_events_md5 == events_md5
+    assert from_binary['episodes'].keys() \
+        == from_json['episodes'].keys()
+    assert attributes(from_binary) == attributes(from_json)
+
+
+def test_round_trip_with_transitions() -> None:
+    events_dict = EventsDict({'episodes': {}})
+    assert not binary_snapshot.lists_transitions(
+        dump_events(events_dict, '0' * 32))
+    assert binary_snapshot.lists_transitions(
+        dump_events(events_dict, '0' * 32, with_transitions=True))
+    with pytest.raises(ValueError, match='Not a binary snapshot'):
+        binary_snapshot.lists_transitions(b'{"episodes": {}}' + bytes(32))
+
+
+def test_round_trip_flags_and_strings(
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    events_dict = EventsDict({'episodes': {
+        Uuid('uuid-1'): Episode(
+            'XY', name='Spezial: Vermisst – Wo ist 🕵️?',
+            **(episode_boilerplate | {'is_spinoff': True})),
+        Uuid('uuid-2'): Episode(
+            567, name='Folge 567',
+            **(episode_boilerplate | {'is_rerun': True})),
+        Uuid('uuid-3'): Episode(
+            568, name='Folge 567', **episode_boilerplate),
+    }})
+    loaded, _ = load_events(dump_events(events_dict, '0' * 32))
+    assert attributes(loaded) == attributes(events_dict)
+
+
+def test_episodes_are_created_on_access(
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    episode = Episode(567, name='Folge 567', **episode_boilerplate)
+    loaded, _ = load_events(dump_events(
+        EventsDict({'episodes': {Uuid('uuid-1'): episode}}), '0' * 32))
+    episodes = loaded['episodes']
+    assert episodes[Uuid('uuid-1')] is episodes[Uuid('uuid-1')]
+    episodes[Uuid('uuid-2')] = episode
+    del episodes[Uuid('uuid-1')]
+    assert list(episodes.items()) == [(Uuid('uuid-2'), episode)]
+
+
+def test_rejects_unsupported_data(
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    data = dump_events(EventsDict({'episodes': {
+        Uuid('uuid-1'): Episode(567, name='Folge 567',
+                                **episode_boilerplate),
+    }}), '0' * 32)
+    with pytest.raises(ValueError, match='Not a binary snapshot'):
+        load_events(b'{"episodes": {}}' + bytes(32))
+    with pytest.raises(ValueError, match='Truncated'):
+        load_events(data[:-1])
+    with pytest.raises(ValueError, match='Truncated'):
+        load_events(data[:3])
+    with pytest.raises(ValueError, match='version 1'):
+        load_events(data.replace(
+            binary_snapshot.MAGIC + b'\2\0',
+            binary_snapshot.MAGIC + b'\1\0', 1))
+
+
+def test_rejects_fractions_of_a_second(
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    with pytest.raises(ValueError, match='fraction'):
+        dump_events(EventsDict({'episodes': {
+            Uuid('uuid-1'): Episode(
+                567, name='Folge 567',
+                **(episode_boilerplate | {
+                    'sd_date_published': datetime.fromisoformat(
+                        '2021-05-30T14:17:35.5+02:00'),
+                })),
+        }}), '0' * 32)
@@ -2,6 +2,8 @@
 
 from collections.abc import Callable
 from datetime import datetime, timezone
+import pickle
+import tracemalloc
 from typing import Any
 
 import pytest
@@ -127,3 +129,77 @@ def test_domain_key(
         == episode_in_local_timezone.domain_key
     assert episode_in_local_timezone.domain_key \
         != rerun_episode.domain_key
+
+
+def test_equality(
+    episode_in_utc: Episode,
+    episode_in_local_timezone: Episode,
+    rerun_episode: Episode,
+) -> None:
+    assert episode_in_utc == episode_in_local_timezone
+    assert episode_in_local_timezone != rerun_episode
+    assert episode_in_utc != episode_in_utc.domain_key
+    assert len({episode_in_utc, episode_in_local_timezone,
+                rerun_episode}) == 2
+
+
+def test_immutable(episode_in_utc: Episode) -> None:
+    with pytest.raises(AttributeError):
+        episode_in_utc.name = 'Folge 568'
+    with pytest.raises(AttributeError):
+        del episode_in_utc.is_rerun
+    with pytest.raises(AttributeError):
+        episode_in_utc.extra = True
+    assert episode_in_utc.name == 'Folge 567'
+    assert not hasattr(episode_in_utc, '__dict__')
+
+
+def test_local_views_are_cached(
+    episode_in_local_timezone: Episode,
+) -> None:
+    assert episode_in_local_timezone.local_date_published() \
+        is episode_in_local_timezone.local_date_published()
+    assert episode_in_local_timezone.local_sd_date_published() \
+        is episode_in_local_timezone.local_sd_date_published()
+    domain_key = episode_in_local_timezone.domain_key
+    assert episode_in_local_timezone.domain_key is domain_key
+
+
+def test_pickle(episode_in_local_timezone: Episode) -> None:
+    copy = pickle.loads(pickle.dumps(episode_in_local_timezone))
+    assert copy == episode_in_local_timezone
+    assert repr(copy) == repr(episode_in_local_timezone)
+
+
+class _SlottedFields:  # pylint: disable=too-few-public-methods
+    """Plain object with the same slots as an Episode."""
+
+    __slots__ = Episode.__slots__
+
+    def __init__(self, *values: Any):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+
+def _traced_size(create: Callable[[], object], count: int) -> int:
+    tracemalloc.start()
+    try:
+        objects = [create() for _ in range(count)]
+    finally:
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    assert len(objects) == count
+    return size
+
+
+def test_memory_per_instance(episode_in_local_timezone: Episode) -> None:
+    episode = episode_in_local_timezone
+    fields = (episode.episode_number, episode.name,
+              episode.date_published, episode.sd_date_published,
+              episode.is_rerun, episode.is_spinoff, episode.timezone)
+    count = 10_000
+    size = _traced_size(lambda: Episode(*fields), count)
+    baseline = _traced_size(
+        lambda: _SlottedFields(*fields, None, None, None), count)
+    # No more than a plain slotted object, give or take noise
+    assert size <= baseline * 1.05
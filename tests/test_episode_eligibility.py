@@ -0,0 +1,182 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+from kha import api, binary_snapshot
+from kha.episode import Episode
+from kha.episode_eligibility import EpisodeEligibility
+from kha.episode_patchers.episode_adder import EpisodeAdder
+from kha.episode_patchers.episode_replacer import EpisodeReplacer
+from kha.local_types import EventsDict, Uuid
+from kha.store_snapshot import StoreSnapshot
+
+
+def make_episode(episode_boilerplate: dict[str, Any],
+                 episode_number: int | str,
+                 iso_date_published: str,
+                 **kwargs: bool) -> Episode:
+    return Episode(
+        episode_number,
+        name=f'Folge {episode_number}',
+        **(episode_boilerplate | {
+            'date_published':
+            datetime.fromisoformat(iso_date_published),
+        } | kwargs),
+    )
+
+
+@pytest.fixture(name='episodes')
+def fixture_episodes(episode_boilerplate: dict[str, Any]) \
+        -> list[Episode]:
+    return [
+        make_episode(episode_boilerplate, 'Vermisst 1',
+                     '2022-04-27T20:15:00+02:00', is_spinoff=True),
+        make_episode(episode_boilerplate, 578,
+                     '2022-05-04T20:15:00+02:00'),
+        make_episode(episode_boilerplate, 578,
+                     '2022-05-05T03:15:00+02:00', is_rerun=True),
+        make_episode(episode_boilerplate, 'Vermisst 2',
+                     '2022-06-29T20:15:00+02:00', is_spinoff=True),
+    ]
+
+
+def numbers(episodes: Iterable[Episode]) -> list[int | str]:
+    return [episode.episode_number for episode in episodes]
+
+
+def test_eligible_episodes(episodes: list[Episode]) -> None:
+    assert numbers(EpisodeEligibility(episodes).eligible_episodes()) \
+        == [578, 'Vermisst 2']
+
+
+def test_pivot_date(episodes: list[Episode]) -> None:
+    eligibility = EpisodeEligibility(episodes)
+    assert eligibility.pivot_date == episodes[1].date_published
+    assert not eligibility.is_eligible(episodes[0])
+    assert eligibility.is_eligible(episodes[1])
+    assert not eligibility.is_eligible(episodes[2])
+    assert eligibility.is_eligible(episodes[3])
+
+
+def test_only_spinoffs(episodes: list[Episode]) -> None:
+    assert numbers(EpisodeEligibility([episodes[3], episodes[0]])
+                   .eligible_episodes()) \
+        == ['Vermisst 1', 'Vermisst 2']
+
+
+def test_filter_consumes_generator_once(episodes: list[Episode]) \
+        -> None:
+    def one_shot() -> Iterator[Episode]:
+        yield from reversed(episodes)
+
+    assert numbers(api.filter_eligible_episodes(one_shot())) \
+        == [578, 'Vermisst 2']
+
+
+def test_adder_moves_pivot(
+    episodes: list[Episode],
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    events_dict = EventsDict({'episodes': {}})
+    eligibility = EpisodeEligibility()
+    for index, episode in enumerate(episodes):
+        EpisodeAdder(Uuid(str(index)), episode) \
+            .apply(events_dict, eligibility)
+    episode_579 = make_episode(episode_boilerplate, 579,
+                               '2022-07-06T20:15:00+02:00')
+    EpisodeAdder(Uuid('579'), episode_579) \
+        .apply(events_dict, eligibility)
+    assert eligibility.pivot_date == episode_579.date_published
+    assert numbers(eligibility.eligible_episodes()) == [578, 579]
+    assert len(events_dict['episodes']) == 5
+
+
+def test_adder_replaces_existing_uuid(
+    episodes: list[Episode],
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    events_dict = EventsDict({'episodes': {
+        Uuid(str(index)): episode
+        for index, episode in enumerate(episodes)
+    }})
+    eligibility = EpisodeEligibility(events_dict['episodes'].values())
+    moved = make_episode(episode_boilerplate, 578,
+                         '2022-04-20T20:15:00+02:00')
+    EpisodeAdder(Uuid('1'), moved).apply(events_dict, eligibility)
+    assert eligibility.pivot_date == moved.date_published
+    eligible = eligibility.eligible_episodes()
+    assert numbers(eligible) == [578, 'Vermisst 1', 'Vermisst 2']
+    assert eligible[0] is moved
+    assert len(events_dict['episodes']) == 4
+
+
+def test_replacer_moves_pivot(
+    episodes: list[Episode],
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    events_dict = EventsDict({'episodes': {
+        Uuid(str(index)): episode
+        for index, episode in enumerate(episodes)
+    }})
+    eligibility = EpisodeEligibility(events_dict['episodes'].values())
+    EpisodeReplacer(Uuid('1'), make_episode(
+        episode_boilerplate, 578, '2022-04-20T20:15:00+02:00',
+    )).apply(events_dict, eligibility)
+    assert numbers(eligibility.eligible_episodes()) \
+        == [578, 'Vermisst 1', 'Vermisst 2']
+
+
+def test_remove_same_object(
+    episodes: list[Episode],
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    twin = make_episode(episode_boilerplate, 578,
+                        '2022-05-04T20:15:00+02:00')
+    assert twin.domain_key == episodes[1].domain_key
+    eligibility = EpisodeEligibility([*episodes, twin])
+    eligibility.remove(twin)
+    assert eligibility.eligible_episodes()[0] is episodes[1]
+    with pytest.raises(ValueError):
+        eligibility.remove(twin)
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_patched_snapshot(
+    episodes: list[Episode],
+    episode_boilerplate: dict[str, Any],
+    binary: bool,
+) -> None:
+    events_dict = EventsDict({'episodes': {
+        Uuid(str(index)): episode
+        for index, episode in enumerate(episodes)
+    }})
+    if binary:
+        events_dict, _ = binary_snapshot.load_events(
+            binary_snapshot.dump_events(events_dict, '0' * 32))
+    original = StoreSnapshot(events_dict, etag='"1"')
+
+    def answer(snapshot: StoreSnapshot) -> int | str | None:
+        episode = snapshot.timeline.current_or_next(
+            lambda: datetime.fromisoformat('2022-06-01T12:00:00+02:00'))
+        return None if episode is None else episode.episode_number
+
+    added = original.patched(EpisodeAdder(Uuid('579'), make_episode(
+        episode_boilerplate, 579, '2022-07-06T20:15:00+02:00')))
+    assert numbers(added.timeline.episodes) == [578, 579]
+    assert answer(added) == 579
+    assert added.etag == '"1"'
+    assert added.version != original.version
+    # The original snapshot stays as it is
+    assert answer(original) == 'Vermisst 2'
+    assert len(original.events_dict['episodes']) == 4
+
+    moved = make_episode(episode_boilerplate, 578,
+                         '2022-04-20T20:15:00+02:00')
+    replaced = added.patched(EpisodeReplacer(Uuid('1'), moved))
+    assert replaced.timeline.episodes[0] is moved
+    assert len(replaced.episode_table) == 5
+    assert numbers(added.timeline.episodes) == [578, 579]
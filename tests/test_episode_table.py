@@ -0,0 +1,139 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from array import array
+from datetime import datetime, timedelta, timezone
+import hashlib
+import random
+from typing import Any
+
+import pytest
+
+from kha import api
+from kha.binary_snapshot import dump_events, load_events
+from kha.episode import Episode
+from kha.episode_eligibility import EpisodeEligibility
+from kha.episode_table import FLAG_RERUN, FLAG_SPINOFF, EpisodeTable
+from kha.local_types import Uuid
+from kha.settings import LOCAL_EVENTS_JSON_PATH
+from kha.store_snapshot import StoreSnapshot
+
+
+@pytest.fixture(name='random_episodes')
+def fixture_random_episodes(
+    episode_boilerplate: dict[str, Any],
+) -> list[Episode]:
+    rng = random.Random(0)
+    first_start = datetime(2021, 1, 6, 19, 15, tzinfo=timezone.utc)
+    return [
+        Episode(number, name=f'Folge {number}', **(episode_boilerplate | {
+            'date_published': first_start
+            + timedelta(days=rng.randrange(365)),
+            'is_rerun': rng.random() < .2,
+            'is_spinoff': rng.random() < .2,
+        }))
+        for number in range(500)
+    ]
+
+
+def test_eligible_matches_eligibility(
+    random_episodes: list[Episode],
+) -> None:
+    for size in (0, 1, 10, 100, 500):
+        episodes = random_episodes[:size]
+        expected = EpisodeEligibility(episodes).eligible_episodes()
+        actual = EpisodeTable.from_episodes(episodes).eligible()
+        assert sorted(id(episode) for episode in actual) \
+            == sorted(id(episode) for episode in expected)
+        assert [episode.date_published for episode in actual] \
+            == [episode.date_published for episode in expected]
+
+
+def test_only_spinoffs(random_episodes: list[Episode]) -> None:
+    spinoffs = [episode for episode in random_episodes
+                if episode.is_spinoff]
+    assert len(EpisodeTable.from_episodes(spinoffs).eligible()) \
+        == len([episode for episode in spinoffs
+                if not episode.is_rerun])
+
+
+def test_behaves_like_a_list(random_episodes: list[Episode]) -> None:
+    episodes = sorted(random_episodes,
+                      key=lambda episode: episode.date_published)
+    table = EpisodeTable.from_episodes(random_episodes)
+    assert len(table) == len(episodes)
+    assert table[0] is episodes[0]
+    assert table[-1] is episodes[-1]
+    assert list(table[10:20]) == episodes[10:20]
+    assert list(table[::2]) == episodes[::2]
+    assert episodes[42] in table
+    assert table.index(episodes[42]) == 42
+    with pytest.raises(IndexError):
+        table[len(episodes)]  # pylint: disable=expression-not-assigned
+
+
+def test_episodes_are_created_on_demand() -> None:
+    table = EpisodeTable(
+        ['XY', 567],
+        ['Spezial', 'Folge 567'],
+        array('q', [1623262500, 1623262600]),
+        array('q', [1622377055, 1622377055]),
+        bytes([FLAG_SPINOFF, FLAG_RERUN]),
+    )
+    episode = list(table)[1]
+    assert table[1] is episode
+    assert table.eligible()[0] is table[0]
+    assert episode.episode_number == 567
+    assert episode.is_rerun
+    assert not episode.is_spinoff
+    assert episode.date_published.isoformat() \
+        == '2021-06-09T18:16:40+00:00'
+
+
+def test_rows_must_be_sorted() -> None:
+    with pytest.raises(ValueError):
+        EpisodeTable([1, 2], ['Folge 1', 'Folge 2'],
+                     array('q', [2, 1]), array('q', [0, 0]),
+                     bytes(2))
+
+
+def test_binary_snapshot_backs_table() -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    from_json = api.snapshot_from_json(events_json)
+    events_dict, _ = load_events(dump_events(
+        from_json.events_dict, hashlib.md5(events_json).hexdigest()))
+    snapshot = StoreSnapshot(events_dict, etag=None)
+    assert [episode.domain_key for episode in snapshot.timeline.episodes] \
+        == [episode.domain_key for episode in from_json.timeline.episodes]
+    last = snapshot.timeline.episodes[-1]
+    assert any(episode is last
+               for episode in events_dict['episodes'].values())
+
+
+def test_unsorted_binary_snapshot() -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    snapshot = api.snapshot_from_json(events_json)
+    binary = bytearray(dump_events(
+        snapshot.events_dict, hashlib.md5(events_json).hexdigest()))
+    # Move the first start date far into the future
+    first_start = int(snapshot.timeline.episodes[0]
+                      .date_published.timestamp()).to_bytes(8, 'little')
+    offset = binary.index(first_start)
+    binary[offset:offset + 8] = (2 ** 40).to_bytes(8, 'little')
+    with pytest.raises(ValueError):
+        load_events(bytes(binary))
+
+
+def test_modified_binary_snapshot(
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    events_dict, _ = load_events(dump_events(
+        api.snapshot_from_json(events_json).events_dict,
+        hashlib.md5(events_json).hexdigest()))
+    episode = Episode(999, name='Folge 999', **(episode_boilerplate | {
+        'date_published': datetime.fromisoformat(
+            '2099-01-01T20:15:00+01:00'),
+    }))
+    events_dict['episodes'][Uuid('uuid-999')] = episode
+    assert StoreSnapshot(events_dict, etag=None) \
+        .timeline.episodes[-1] is episode
@@ -0,0 +1,138 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone, tzinfo
+
+import pytest
+
+from kha import api
+from kha.episode import Episode
+from kha.episode_check_response import EpisodePresentResponse
+from kha.episode_timeline import EpisodeTimeline
+
+
+@pytest.fixture(name='timeline')
+def fixture_timeline(weekly_episodes: list[Episode]) \
+        -> EpisodeTimeline:
+    return api.episode_timeline(reversed(weekly_episodes))
+
+
+def test_episodes_are_sorted(timeline: EpisodeTimeline) -> None:
+    assert [episode.episode_number
+            for episode in timeline.episodes] == list(range(52))
+
+
+def test_current_episode_until_midnight(
+        timeline: EpisodeTimeline) -> None:
+    episode = timeline.current_or_next(
+        lambda: datetime.fromisoformat('2021-01-13T23:59:59+01:00'))
+    assert episode is not None
+    assert episode.episode_number == 1
+
+
+def test_next_episode_after_midnight(
+        timeline: EpisodeTimeline) -> None:
+    episode = timeline.current_or_next(
+        lambda: datetime.fromisoformat('2021-01-14T00:00:00+01:00'))
+    assert episode is not None
+    assert episode.episode_number == 2
+
+
+def test_no_episode_after_last(timeline: EpisodeTimeline) -> None:
+    assert timeline.current_or_next(
+        lambda: datetime.fromisoformat('2022-01-06T00:00:00+01:00')) \
+        is None
+
+
+def test_empty_timeline(now: Callable[[], datetime]) -> None:
+    assert EpisodeTimeline([]).current_or_next(now) is None
+
+
+def test_matches_runs_today_or_later(
+    weekly_episodes: list[Episode],
+    timeline: EpisodeTimeline,
+) -> None:
+    start = datetime.fromisoformat('2021-01-01T00:00:00+00:00')
+    for reference_point in (start + timedelta(hours=7 * step)
+                            for step in range(1300)):
+        expected = min(
+            (episode for episode in weekly_episodes
+             if episode.runs_today_or_later(
+                 now=lambda: reference_point)),  # pylint: disable=cell-var-from-loop
+            key=lambda episode: episode.date_published,
+            default=None,
+        )
+        assert timeline.current_or_next(
+            lambda: reference_point) is expected  # pylint: disable=cell-var-from-loop
+
+
+def test_check_with_timeline(
+    timeline: EpisodeTimeline,
+    local_timezone: tzinfo,
+) -> None:
+    response = api.check(
+        timeline=timeline,
+        now=lambda: datetime(2021, 1, 13, 12, tzinfo=local_timezone),
+    )
+    assert isinstance(response, EpisodePresentResponse)
+    assert response.episode_number == 1
+
+
+def _utc_episode(episode_number: int, date_published: str) -> Episode:
+    return Episode(
+        episode_number,
+        name=f'Folge {episode_number}',
+        date_published=datetime.fromisoformat(date_published),
+        sd_date_published=datetime.fromisoformat(
+            '2021-01-01T00:00:00+00:00'),
+        is_rerun=False,
+        is_spinoff=False,
+        timezone=timezone.utc,
+    )
+
+
+def test_utc_episodes_near_midnight() -> None:
+    # Starts on the day before in UTC, but on the same day in Berlin
+    before_midnight = _utc_episode(1, '2021-01-13T23:30:00+00:00')
+    next_week = _utc_episode(2, '2021-01-20T23:30:00+00:00')
+    reference_point = datetime.fromisoformat('2021-01-14T00:30:00+00:00')
+    assert not before_midnight.runs_today_or_later(
+        now=lambda: reference_point)
+
+    assert api.next_episode([before_midnight, next_week],
+                            after=lambda: reference_point) is next_week
+    timeline = api.episode_timeline([before_midnight, next_week])
+    assert timeline.timezone == timezone.utc
+    assert timeline.answer_validity(lambda: reference_point) == (
+        datetime.fromisoformat('2021-01-14T00:00:00+00:00'),
+        datetime.fromisoformat('2021-01-20T00:00:00+00:00'),
+    )
+
+
+def test_episodes_in_different_timezones(
+    weekly_episodes: list[Episode],
+    local_timezone: tzinfo,
+) -> None:
+    # Starts on the day before in UTC, but on the same day in Berlin
+    utc_episode = _utc_episode(52, '2022-01-05T23:30:00+00:00')
+    without_timezone = Episode(
+        53, name='Folge 53',
+        date_published=datetime.fromisoformat('2022-01-12T19:15:00+00:00'),
+        sd_date_published=utc_episode.sd_date_published,
+        is_rerun=False,
+        is_spinoff=False,
+        timezone=None,
+    )
+    episodes = [*weekly_episodes, utc_episode, without_timezone]
+    timeline = api.episode_timeline(episodes)
+    assert timeline.timezone == local_timezone
+    assert api.next_episode(
+        episodes,
+        after=lambda: datetime.fromisoformat(
+            '2022-01-06T00:45:00+00:00')) is utc_episode
+    assert api.next_episode(
+        episodes,
+        after=lambda: datetime.fromisoformat(
+            '2022-01-07T00:45:00+00:00')) is without_timezone
+    assert EpisodeTimeline(weekly_episodes, timezone.utc).timezone \
+        == timezone.utc
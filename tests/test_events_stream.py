@@ -0,0 +1,117 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from datetime import date
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from kha import api
+from kha.events_stream import episode_from_dict, episode_to_dict, \
+    not_rerun, published_on_or_after, stream_episodes
+from kha.settings import LOCAL_EVENTS_JSON_PATH
+from scripts.synthetic_store import synthetic_events_json
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+def test_same_as_json(chunk_size: int) -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    streamed = list(stream_episodes(io.BytesIO(events_json),
+                                    chunk_size=chunk_size))
+    loaded = api.snapshot_from_json(events_json).events_dict['episodes']
+    assert [uuid for uuid, _ in streamed] == list(loaded)
+    assert [repr(episode) for _, episode in streamed] \
+        == [repr(episode) for episode in loaded.values()]
+
+
+def test_multibyte_characters_across_chunks() -> None:
+    events_json = synthetic_events_json(20).replace(
+        b'Folge', 'Sendung über'.encode())
+    names = [episode.name for _, episode
+             in stream_episodes(io.BytesIO(events_json), chunk_size=1)]
+    assert len(names) == 20
+    assert any(name.startswith('Sendung über') for name in names)
+
+
+def test_skips_other_properties() -> None:
+    events_dict = json.loads(synthetic_events_json(3))
+    events_json = json.dumps({
+        '$schema': '../share/events.kha.schema.json',
+        'episodes': events_dict['episodes'],
+        'other': [1, 2.5, {'x': None}],
+    }, indent=2).encode()
+    assert [uuid for uuid, _
+            in stream_episodes(io.BytesIO(events_json), chunk_size=5)] \
+        == list(events_dict['episodes'])
+    assert not list(stream_episodes(io.BytesIO(b' {} ')))
+
+
+def test_predicates() -> None:
+    events_json = synthetic_events_json(500)
+    episodes = api.snapshot_from_json(events_json) \
+        .events_dict['episodes']
+    assert [uuid for uuid, _ in stream_episodes(
+        io.BytesIO(events_json), not_rerun)] \
+        == [uuid for uuid, episode in episodes.items()
+            if not episode.is_rerun]
+
+    day = date(1990, 1, 1)
+    assert [uuid for uuid, _ in stream_episodes(
+        io.BytesIO(events_json), published_on_or_after(day))] \
+        == [uuid for uuid, episode in episodes.items()
+            if episode.local_date_published().date() >= day]
+
+
+@pytest.mark.parametrize('events_json', [
+    b'',
+    b'[]',
+    b'{"episodes": {"A": {"@type": "Episode"',
+    b'{"episodes": {}} {}',
+    b'{"episodes": {"A" {}}}',
+    b'{"episodes": {1: {}}}',
+])
+def test_invalid(events_json: bytes) -> None:
+    with pytest.raises(ValueError):
+        list(stream_episodes(io.BytesIO(events_json)))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3])
+def test_values_cut_off_between_chunks(chunk_size: int) -> None:
+    assert not list(stream_episodes(io.BytesIO(
+        b'{"other": [true, false, null, -1.5e3, "\\u00e4\\"", {}],'
+        b' "episodes": {}}'), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('malformed', [b'nul}', b'"\x01"', b'"\\uXYZW"'])
+def test_invalid_without_reading_on(malformed: bytes) -> None:
+    body = io.BytesIO(b'{"other": {"a": ' + malformed + b' ' * 2 ** 20)
+    with pytest.raises(ValueError):
+        list(stream_episodes(body, chunk_size=16))
+    assert body.tell() < 64
+
+
+def test_unknown_type() -> None:
+    with pytest.raises(RuntimeError):
+        list(stream_episodes(io.BytesIO(
+            b'{"episodes": {"A": {"@type": "Movie"}}}')))
+
+
+def test_round_trip() -> None:
+    for _, episode in stream_episodes(
+            io.BytesIO(synthetic_events_json(100))):
+        assert repr(episode_from_dict(episode_to_dict(episode))) \
+            == repr(episode)
+
+
+def test_memory_stays_bounded() -> None:
+    body = io.BytesIO(synthetic_events_json(20_000))
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in stream_episodes(body))
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert count == 20_000
+    assert len(body.getbuffer()) > 4 * 2 ** 20
+    assert peak < 2 ** 20
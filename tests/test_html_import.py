@@ -0,0 +1,111 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+import os
+from pathlib import Path
+
+import pytest
+
+from kha import api, html_import
+from kha.scrape_runner import merge_episodes
+from kha.scraper import scrape_wunschliste
+from scripts.synthetic_epg import epg_listing
+
+FIXTURES_PATH = Path(__file__).parent / 'fixtures' / 'wunschliste'
+
+
+@pytest.fixture(name='archive')
+def fixture_archive(tmp_path: Path) -> list[str]:
+    """Two directories of EPG pages, with episodes in common."""
+    first, second = tmp_path / 'first', tmp_path / 'second' / '2021'
+    second.mkdir(parents=True)
+    first.mkdir()
+    for week in range(0, 20, 2):
+        path = first / f'{week:02d}.html'
+        path.write_text(epg_listing(2048, first_week=week))
+        os.utime(path, (1_600_000_000 + week, 1_600_000_000 + week))
+    (second / 'ZDF.html').write_text(
+        (FIXTURES_PATH / '2021-08-17.html').read_text())
+    (second / 'notes.txt').write_text('<li>not a page</li>')
+    return [str(first), str(tmp_path / 'second')]
+
+
+def test_import(archive: list[str], tmp_path: Path,
+                capsys: pytest.CaptureFixture[str]) -> None:
+    out = tmp_path / 'events.kha.json'
+    html_import.import_html(*archive, out=str(out),
+                            max_workers=2)
+    paths = sorted(html_import.html_files(archive))
+    assert len(paths) == 11
+    expected = merge_episodes(
+        scrape_wunschliste(path.read_text()) for path in paths)
+
+    episodes = api.snapshot_from_json(out.read_bytes()) \
+        .events_dict['episodes'].values()
+    assert [(episode.domain_key, episode.date_published)
+            for episode in episodes] \
+        == [(episode.domain_key, episode.date_published)
+            for episode in expected]
+    assert len({episode.domain_key for episode in episodes}) \
+        == len(episodes)
+    printed = capsys.readouterr().out
+    assert '11 files (0 skipped)' in printed
+    assert f'({len(episodes)} unique)' in printed
+    assert 'files/s' in printed
+    assert 'episodes/s' in printed
+
+
+def test_same_output_for_any_number_of_workers(archive: list[str],
+                                               tmp_path: Path) -> None:
+    outputs = []
+    for workers in (1, 3):
+        out = tmp_path / f'{workers}.json'
+        html_import.import_html(*archive, out=str(out),
+                                max_workers=workers)
+        outputs.append(out.read_bytes())
+    assert outputs[0] == outputs[1]
+
+
+def test_date_published_from_file(archive: list[str]) -> None:
+    episodes, error = html_import.parse_file(Path(archive[0], '04.html'))
+    assert error is None
+    assert {episode.sd_date_published.timestamp()
+            for episode in episodes} == {1_600_000_004}
+
+
+def test_skip_unparseable_files(archive: list[str], tmp_path: Path,
+                                capsys: pytest.CaptureFixture[str]) -> None:
+    broken = Path(archive[0], 'broken.html')
+    broken.write_text(
+        (FIXTURES_PATH / 'pathological-no-episode-label.html')
+        .read_text(encoding='utf-8'), encoding='utf-8')
+    out = tmp_path / 'events.kha.json'
+    html_import.import_html(*archive, out=str(out),
+                            max_workers=2)
+    captured = capsys.readouterr()
+    assert 'Skipped' in captured.err
+    assert 'broken.html' in captured.err
+    assert '12 files (1 skipped)' in captured.out
+    assert api.snapshot_from_json(out.read_bytes()) \
+        .events_dict['episodes']
+
+
+def test_skip_malformed_episode_numbers(archive: list[str], tmp_path: Path,
+                                        capsys: pytest.CaptureFixture[str]) \
+        -> None:
+    malformed = Path(archive[0], 'malformed.html')
+    malformed.write_text(epg_listing(4).replace(
+        'title="Episode">569<', 'title="Episode">4x5<', 1),
+        encoding='utf-8')
+    assert html_import.parse_file(malformed)[1] is not None
+    out = tmp_path / 'events.kha.json'
+    html_import.import_html(*archive, out=str(out),
+                            max_workers=2)
+    captured = capsys.readouterr()
+    assert 'malformed.html' in captured.err
+    assert '12 files (1 skipped)' in captured.out
+
+
+def test_missing_directory(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        html_import.import_html(str(tmp_path / 'missing'),
+                                out=str(tmp_path / 'events.kha.json'))
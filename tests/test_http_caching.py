@@ -0,0 +1,212 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import flask
+from flask.testing import FlaskClient
+import pytest
+
+from kha import api, settings
+from kha.http_caching import CacheValidators, validators_for
+from kha.local_types import EventsDict
+from kha.reference_instant import ReferenceInstant
+from kha.rendered_page_cache import RenderedPageCache
+from kha.settings import EVENTS_JSON_FILENAME, LOCAL_EVENTS_JSON_PATH
+from kha.storage_backends import MemoryBackend
+from kha.store_snapshot import SnapshotSource, StoreSnapshot
+from kha.verdict import Verdict
+
+
+@pytest.fixture(name='validators')
+def fixture_validators(
+    while_episode_is_running: Callable[[], datetime],
+) -> CacheValidators:
+    return validators_for(
+        ('"v1"', while_episode_is_running().date(), Verdict.YES,
+         (567, '2021-06-09T20:15:00+02:00')),
+        StoreSnapshot(EventsDict({'episodes': {}}), etag='"v1"'),
+        ReferenceInstant(while_episode_is_running),
+    )
+
+
+@pytest.fixture(name='client')
+def fixture_client(
+    validators: CacheValidators,
+    while_episode_is_running: Callable[[], datetime],
+) -> FlaskClient:
+    app = flask.Flask(__name__)
+
+    @app.route('/')
+    def main() -> flask.Response:
+        now = while_episode_is_running()
+        if validators.not_modified(flask.request):
+            return validators.apply(
+                flask.Response(status=HTTPStatus.NOT_MODIFIED), now)
+        return validators.apply(flask.Response('page'), now)
+
+    return app.test_client()
+
+
+def test_validators(validators: CacheValidators) -> None:
+    assert validators.last_modified \
+        == datetime(2021, 6, 8, 22, tzinfo=timezone.utc)
+    assert validators.expires_at \
+        == datetime(2021, 6, 9, 22, tzinfo=timezone.utc)
+
+
+def test_store_change_moves_last_modified(
+    while_episode_is_running: Callable[[], datetime],
+) -> None:
+    validators = validators_for(
+        ('"v2"', while_episode_is_running().date(), Verdict.YES, None),
+        StoreSnapshot(
+            EventsDict({'episodes': {}}), etag='"v2"',
+            last_modified=datetime(2021, 6, 9, 12, 34, 56, 789,
+                                   tzinfo=timezone.utc)),
+        ReferenceInstant(while_episode_is_running),
+    )
+    assert validators.last_modified \
+        == datetime(2021, 6, 9, 12, 34, 56, tzinfo=timezone.utc)
+
+
+def test_headers(client: FlaskClient) -> None:
+    response = client.get('/')
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['Cache-Control'] \
+        == 'public, max-age=10800'
+    assert response.headers['Expires'] \
+        == 'Wed, 09 Jun 2021 22:00:00 GMT'
+    assert response.headers['Last-Modified'] \
+        == 'Tue, 08 Jun 2021 22:00:00 GMT'
+
+
+def test_if_none_match(client: FlaskClient) -> None:
+    etag = client.get('/').headers['ETag']
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.data
+    assert client.get('/', headers={'If-None-Match': '"other"'}) \
+        .status_code == HTTPStatus.OK
+
+
+def test_if_modified_since(client: FlaskClient) -> None:
+    assert client.get('/', headers={
+        'If-Modified-Since': 'Wed, 09 Jun 2021 06:00:00 GMT',
+    }).status_code == HTTPStatus.NOT_MODIFIED
+    assert client.get('/', headers={
+        'If-Modified-Since': 'Mon, 07 Jun 2021 06:00:00 GMT',
+    }).status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize('source', [SnapshotSource.LAST_KNOWN,
+                                    SnapshotSource.BUNDLED])
+def test_fallback_only_by_etag(
+    while_episode_is_running: Callable[[], datetime],
+    source: SnapshotSource,
+) -> None:
+    validators = validators_for(
+        ('"v1"', while_episode_is_running().date(), Verdict.YES, None),
+        StoreSnapshot(EventsDict({'episodes': {}}), etag='"v1"'),
+        ReferenceInstant(while_episode_is_running),
+        source=source,
+    )
+    assert validators.last_modified is None
+    app = flask.Flask(__name__)
+    with app.test_request_context('/', headers={
+        'If-Modified-Since': 'Thu, 10 Jun 2021 06:00:00 GMT',
+    }):
+        assert not validators.not_modified(flask.request)
+        response = validators.apply(flask.Response('page'),
+                                    while_episode_is_running())
+    assert 'Last-Modified' not in response.headers
+    assert response.headers['ETag'] == f'"{validators.etag}"'
+
+
+@pytest.fixture(name='app_module')
+def fixture_app_module(monkeypatch: pytest.MonkeyPatch,
+                       tmp_path: Path) -> ModuleType:
+    # The user locale need not be installed for the tests
+    monkeypatch.setattr(settings, 'USER_LOCALE', 'C')
+    import app  # pylint: disable=import-outside-toplevel
+    monkeypatch.setattr(app, 'rendered_page_cache', RenderedPageCache())
+    monkeypatch.setattr(api, 'BUNDLED_STORE_PATH', tmp_path)
+    return app
+
+
+@pytest.fixture(name='store')
+def fixture_store() -> MemoryBackend:
+    store = MemoryBackend()
+    store.put(EVENTS_JSON_FILENAME, LOCAL_EVENTS_JSON_PATH.read_bytes())
+    api.set_storage_backend(store)
+    return store
+
+
+@pytest.fixture(name='app_client')
+def fixture_app_client(app_module: ModuleType) -> FlaskClient:
+    app: flask.Flask = app_module.app
+    return app.test_client()
+
+
+def test_app_not_modified(app_client: FlaskClient,
+                          store: MemoryBackend) -> None:
+    first = app_client.get('/')
+    assert first.status_code == HTTPStatus.OK
+    assert first.headers['X-Kha-Snapshot-Source'] \
+        == SnapshotSource.STORE.value
+    assert 'Last-Modified' in first.headers
+    response = app_client.get(
+        '/', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.data
+    assert response.headers['X-Kha-Snapshot-Source'] \
+        == SnapshotSource.STORE.value
+
+    store.put(EVENTS_JSON_FILENAME,
+              LOCAL_EVENTS_JSON_PATH.read_bytes() + b'\n')
+    api.store_cache.invalidate()
+    assert app_client.get(
+        '/', headers={'If-None-Match': first.headers['ETag']},
+    ).status_code == HTTPStatus.OK
+
+
+def test_app_head_without_rendering(
+    app_module: ModuleType,
+    app_client: FlaskClient,
+    store: MemoryBackend,  # pylint: disable=unused-argument
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def render_page(*args: Any) -> None:
+        raise AssertionError(f'Rendered {args}')
+
+    monkeypatch.setattr(app_module, 'render_page', render_page)
+    response = app_client.head('/')
+    assert response.status_code == HTTPStatus.OK
+    assert not response.data
+    assert 'Content-Length' not in response.headers
+    assert response.headers['ETag']
+    assert response.headers['X-Kha-Snapshot-Source'] \
+        == SnapshotSource.STORE.value
+
+
+def test_app_fallback_expires_soon(app_client: FlaskClient,
+                                   tmp_path: Path) -> None:
+    api.set_storage_backend(MemoryBackend())
+    (tmp_path / EVENTS_JSON_FILENAME).write_bytes(
+        LOCAL_EVENTS_JSON_PATH.read_bytes())
+    response = app_client.get('/')
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['X-Kha-Snapshot-Source'] \
+        == SnapshotSource.BUNDLED.value
+    assert 'Last-Modified' not in response.headers
+    assert response.cache_control.max_age is not None
+    assert response.cache_control.max_age \
+        <= settings.STORE_CACHE_TTL_SECONDS
+    assert response.expires is not None
+    assert response.expires <= datetime.now(timezone.utc) \
+        + timedelta(seconds=settings.STORE_CACHE_TTL_SECONDS)
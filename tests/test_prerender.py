@@ -0,0 +1,114 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from kha import api, prerender
+from kha.episode import Episode
+from kha.local_types import EventsDict, Uuid
+from kha.store_snapshot import StoreSnapshot
+
+
+@pytest.fixture(name='use_store')
+def fixture_use_store(monkeypatch: pytest.MonkeyPatch) \
+        -> Callable[[list[Episode]], None]:
+    # The user locale need not be installed for the tests
+    monkeypatch.setattr(prerender, 'USER_LOCALE', 'C')
+
+    def use_store(episodes: list[Episode]) -> None:
+        snapshot = StoreSnapshot(
+            EventsDict({'episodes': {
+                Uuid(f'uuid-{episode.episode_number}'): episode
+                for episode in episodes
+            }}),
+            etag=f'"v{len(episodes)}"',
+        )
+        monkeypatch.setattr(api, 'snapshot_from_store',
+                            lambda backend=None: snapshot)
+    return use_store
+
+
+def episode_in(days: int,
+               now: Callable[[], datetime],
+               episode_boilerplate: dict[str, Any]) -> Episode:
+    return Episode(
+        567 + days,
+        name=f'Folge {567 + days}',
+        **(episode_boilerplate | {
+            'date_published': now().replace(hour=20, minute=15)
+            + timedelta(days=days),
+        }),
+    )
+
+
+def test_prerender(
+    tmp_path: Path,
+    use_store: Callable[[list[Episode]], None],
+    now: Callable[[], datetime],
+    episode_boilerplate: dict[str, Any],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    use_store([episode_in(3, now, episode_boilerplate)])
+    prerender.prerender(days=5, out=str(tmp_path), max_workers=2,
+                        now=now)
+    assert '5 rendered, 5 written' in capsys.readouterr().out
+
+    manifest = json.loads(
+        (tmp_path / prerender.MANIFEST_FILENAME).read_text())
+    assert manifest['storeVersion'] == '"v1"'
+    assert list(manifest['days']) == [
+        '2021-05-30', '2021-05-31', '2021-06-01', '2021-06-02',
+        '2021-06-03',
+    ]
+    assert [day['verdict'] for day in manifest['days'].values()] \
+        == ['NO', 'NO', 'NO', 'YES', 'UNKNOWN']
+    page = (tmp_path / '2021-06-02.html').read_text()
+    assert 'Ja.' in page
+    assert 'Folge 570' in page
+
+
+def test_rerun_skips_unchanged_days(
+    tmp_path: Path,
+    use_store: Callable[[list[Episode]], None],
+    now: Callable[[], datetime],
+    episode_boilerplate: dict[str, Any],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    use_store([episode_in(3, now, episode_boilerplate)])
+    prerender.prerender(days=5, out=str(tmp_path), now=now)
+    first_pages = {path.name: path.read_text()
+                   for path in tmp_path.glob('*.html')}
+
+    prerender.prerender(days=5, out=str(tmp_path), now=now)
+    assert '0 rendered, 0 written' \
+        in capsys.readouterr().out.splitlines()[-1]
+
+    # A new episode on the last day changes only that day
+    use_store([episode_in(3, now, episode_boilerplate),
+               episode_in(4, now, episode_boilerplate)])
+    prerender.prerender(days=5, out=str(tmp_path), now=now)
+    assert '1 rendered, 1 written' \
+        in capsys.readouterr().out.splitlines()[-1]
+    assert {path.name: path.read_text()
+            for path in tmp_path.glob('*.html')
+            if path.name != '2021-06-03.html'} \
+        == {name: page for name, page in first_pages.items()
+            if name != '2021-06-03.html'}
+
+
+def test_same_day_renders_the_same_page(
+    tmp_path: Path,
+    use_store: Callable[[list[Episode]], None],
+    now: Callable[[], datetime],
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    use_store([episode_in(3, now, episode_boilerplate)])
+    prerender.prerender(days=2, out=str(tmp_path / 'a'), now=now)
+    prerender.prerender(days=2, out=str(tmp_path / 'b'), now=now)
+    assert (tmp_path / 'a' / '2021-05-31.html').read_text() \
+        == (tmp_path / 'b' / '2021-05-31.html').read_text()
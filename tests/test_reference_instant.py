@@ -0,0 +1,78 @@
+# pylint: disable=magic-value-comparison, missing-class-docstring, missing-function-docstring, missing-module-docstring, too-few-public-methods
+
+from collections.abc import Callable
+from datetime import datetime, tzinfo
+from typing import Any
+
+import pytest
+
+from kha import api
+from kha.episode import Episode
+from kha.episode_check_response import EpisodePresentResponse
+from kha.reference_instant import ReferenceInstant
+from kha.verdict import Verdict
+
+
+class CountingClock:
+    def __init__(self, now: Callable[[], datetime]):
+        self.now = now
+        self.calls = 0
+
+    def __call__(self) -> datetime:
+        self.calls += 1
+        return self.now()
+
+
+@pytest.fixture(name='episodes')
+def fixture_episodes(
+    episode_boilerplate: dict[str, Any],
+) -> list[Episode]:
+    return [Episode(567, name='Folge 567', **episode_boilerplate)]
+
+
+def test_day_boundaries(now: Callable[[], datetime],
+                        local_timezone: tzinfo) -> None:
+    reference = ReferenceInstant(now)
+    assert reference.start_of_current_day(local_timezone) \
+        .isoformat(timespec='seconds') == '2021-05-29T22:00:00+00:00'
+    assert reference.start_of_next_day(local_timezone) \
+        .isoformat(timespec='seconds') == '2021-05-30T22:00:00+00:00'
+
+
+def test_day_boundaries_on_dst_change(local_timezone: tzinfo) -> None:
+    reference = ReferenceInstant(
+        lambda: datetime.fromisoformat('2021-03-28T12:00:00+02:00'))
+    assert reference.start_of_current_day(local_timezone) \
+        .isoformat(timespec='seconds') == '2021-03-27T23:00:00+00:00'
+    assert reference.start_of_next_day(local_timezone) \
+        .isoformat(timespec='seconds') == '2021-03-28T22:00:00+00:00'
+
+
+def test_of_keeps_reference_instant(now: Callable[[], datetime]) -> None:
+    reference = ReferenceInstant(now)
+    assert ReferenceInstant.of(reference) is reference
+    assert ReferenceInstant.of(now)() == now()
+
+
+def test_check_resolves_now_once(
+    episodes: list[Episode],
+    right_before_the_episode_starts: Callable[[], datetime],
+) -> None:
+    clock = CountingClock(right_before_the_episode_starts)
+    response = api.check(episodes=episodes, now=clock)
+    assert clock.calls == 1
+    assert isinstance(response, EpisodePresentResponse)
+    assert response.verdict == Verdict.YES
+    assert response.runs_today
+    assert response.reference_date == response.sd_date_published \
+        == '2021-06-09T20:14:44+02:00'
+
+
+def test_check_uses_reference_point_for_verdict(
+    episodes: list[Episode],
+    now: Callable[[], datetime],
+) -> None:
+    response = api.check(episodes=episodes, now=now)
+    assert isinstance(response, EpisodePresentResponse)
+    assert response.verdict == Verdict.NO
+    assert not response.runs_today
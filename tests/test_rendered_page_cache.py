@@ -0,0 +1,133 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+import flask
+import pytest
+
+from kha import api
+from kha.episode import Episode
+from kha.episode_check_response import EpisodeUnknownResponse
+from kha.episode_timeline import EpisodeTimeline
+from kha.format import formatter_for, page_expires_at, page_key, \
+    render_page
+from kha.local_types import IsoDatetimeStr
+from kha.reference_instant import ReferenceInstant
+from kha.rendered_page_cache import RenderedPage, RenderedPageCache
+
+
+@pytest.fixture(name='request_context', autouse=True)
+def fixture_request_context() -> Iterator[None]:
+    app = flask.Flask('kha')
+    app.add_url_rule('/site.webmanifest', 'webmanifest')
+    with app.test_request_context('/'):
+        yield
+
+
+@pytest.fixture(name='timeline')
+def fixture_timeline(episode_boilerplate: dict[str, Any]) \
+        -> EpisodeTimeline:
+    return api.episode_timeline([
+        Episode(567, name='Folge 567', **episode_boilerplate),
+    ])
+
+
+def render(timeline: EpisodeTimeline,
+           now: Callable[[], datetime]) -> tuple[Any, RenderedPage]:
+    reference = ReferenceInstant(now)
+    response = api.check(now=reference, timeline=timeline)
+    return (page_key(response, '"v1"', reference),
+            render_page(formatter_for(response), reference))
+
+
+def test_same_key_within_a_day(
+    timeline: EpisodeTimeline,
+    right_before_the_episode_starts: Callable[[], datetime],
+    while_episode_is_running: Callable[[], datetime],
+    a_bit_past_midnight: Callable[[], datetime],
+) -> None:
+    key_before, _ = render(timeline, right_before_the_episode_starts)
+    key_during, _ = render(timeline, while_episode_is_running)
+    key_after, _ = render(timeline, a_bit_past_midnight)
+    assert key_before == key_during
+    assert key_after != key_during
+
+
+def test_expires_at_midnight(
+    timeline: EpisodeTimeline,
+    while_episode_is_running: Callable[[], datetime],
+) -> None:
+    key, page = render(timeline, while_episode_is_running)
+    assert page.expires_at.isoformat() == '2021-06-09T22:00:00+00:00'
+    cache = RenderedPageCache()
+    cache.put(key, page, while_episode_is_running())
+    assert cache.get(key, datetime(2021, 6, 9, 21, 59, 59,
+                                   tzinfo=timezone.utc)) is page
+    assert cache.get(key, datetime(2021, 6, 9, 22,
+                                   tzinfo=timezone.utc)) is None
+
+
+def test_reaction_is_escaped(
+    timeline: EpisodeTimeline,
+    now: Callable[[], datetime],
+) -> None:
+    _, page = render(timeline, now)
+    assert '<p class="bubble them">Tom &amp; Jerry</p>' \
+        in page.filled_in('Tom & Jerry', '2021-05-30T14:17:35+02:00')
+
+
+def test_matches_uncached_render(
+    timeline: EpisodeTimeline,
+    now: Callable[[], datetime],
+) -> None:
+    _, page = render(timeline, now)
+    formatter = formatter_for(api.check(now=now, timeline=timeline))
+    html = page.filled_in('thx', formatter.iso_sd_date_published)
+    assert html == flask.render_template(
+        'main.template.html',
+        **(formatter.to_context() | {'reaction': 'thx'}),
+    )
+
+
+def test_request_time_filled_in(
+    timeline: EpisodeTimeline,
+    right_before_the_episode_starts: Callable[[], datetime],
+    while_episode_is_running: Callable[[], datetime],
+) -> None:
+    key, page = render(timeline, right_before_the_episode_starts)
+    later_key, _ = render(timeline, while_episode_is_running)
+    assert key == later_key
+    later = formatter_for(api.check(now=while_episode_is_running,
+                                    timeline=timeline))
+    html = page.filled_in('thx', later.iso_sd_date_published)
+    assert html == flask.render_template(
+        'main.template.html',
+        **(later.to_context() | {'reaction': 'thx'}),
+    )
+    assert html.count('2021-06-09T21:00:00+02:00') == 2
+    assert '2021-06-09T20:14:44+02:00' not in html
+
+
+@pytest.mark.parametrize('valid_until, expected', [
+    (None, '2021-06-09T22:00:00+00:00'),
+    ('2021-06-09T20:15:00+02:00', '2021-06-09T18:15:00+00:00'),
+    ('2021-06-10T20:15:00+02:00', '2021-06-09T22:00:00+00:00'),
+])
+def test_expires_when_response_does(
+    while_episode_is_running: Callable[[], datetime],
+    valid_until: str | None,
+    expected: str,
+) -> None:
+    response = EpisodeUnknownResponse(
+        sd_date_published=IsoDatetimeStr('2021-06-09T12:00:00+02:00'),
+        valid_from=None,
+        valid_until=None if valid_until is None
+        else IsoDatetimeStr(valid_until),
+    )
+    reference = ReferenceInstant(while_episode_is_running)
+    expires_at = page_expires_at(response, reference)
+    assert expires_at == datetime.fromisoformat(expected)
+    assert render_page(formatter_for(response), reference, expires_at) \
+        .expires_at == expires_at
@@ -0,0 +1,194 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import threading
+import time
+
+import pytest
+
+from kha import api
+from kha.binary_snapshot import LazyEpisodes, dump_events
+from kha.events_stream import not_rerun
+from kha.s3_clients import S3Backend, clear_s3_clients, s3_client
+from kha.settings import EVENTS_BINARY_FILENAME, \
+    EVENTS_JSON_FILENAME, LOCAL_EVENTS_JSON_PATH, \
+    S3_CONNECT_TIMEOUT_SECONDS, S3_MAX_ATTEMPTS, S3_READ_TIMEOUT_SECONDS, \
+    TRANSITIONS_JSON_FILENAME
+from kha.store_snapshot import SnapshotSource
+from kha.transition_table import TransitionTable
+from scripts.local_s3 import LocalS3
+
+
+@pytest.fixture(name='local_s3')
+def fixture_local_s3(monkeypatch: pytest.MonkeyPatch) \
+        -> Iterator[LocalS3]:
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-central-1')
+    monkeypatch.setenv('KHA_DATA_S3_BUCKET', 'kha-store-test')
+    clear_s3_clients()
+    with LocalS3() as local_s3:
+        local_s3.put_object('kha-store-test', EVENTS_JSON_FILENAME,
+                            LOCAL_EVENTS_JSON_PATH.read_bytes())
+        yield local_s3
+    clear_s3_clients()
+
+
+@pytest.fixture(name='backend')
+def fixture_backend(local_s3: LocalS3) -> S3Backend:
+    return S3Backend('kha-store-test',
+                     s3_client(endpoint_url=local_s3.endpoint_url))
+
+
+def test_client_is_shared(local_s3: LocalS3) -> None:
+    assert s3_client(endpoint_url=local_s3.endpoint_url) \
+        is s3_client(endpoint_url=local_s3.endpoint_url)
+    assert s3_client(endpoint_url=local_s3.endpoint_url) \
+        is not s3_client(endpoint_url=local_s3.endpoint_url + '/')
+
+
+def test_client_fails_fast(local_s3: LocalS3) -> None:
+    config = vars(s3_client(endpoint_url=local_s3.endpoint_url)
+                  .meta.config)
+    assert config['connect_timeout'] == S3_CONNECT_TIMEOUT_SECONDS
+    assert config['read_timeout'] == S3_READ_TIMEOUT_SECONDS
+    assert config['retries'] == {'total_max_attempts': S3_MAX_ATTEMPTS,
+                                 'mode': 'standard'}
+
+
+def test_read_path_against_local_s3(
+        local_s3: LocalS3,
+        backend: S3Backend,
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api.store_cache, 'ttl_seconds', 0)
+    first = api.snapshot_from_store(backend)
+    second = api.snapshot_from_store(backend)
+    api.store_cache.join_refreshes()
+    assert second is first
+    # Events JSON after checking for a binary snapshot and before
+    # checking for transitions, then one revalidation in the
+    # background
+    assert local_s3.request_count == 4
+    assert first.etag == local_s3.objects[
+        ('kha-store-test', EVENTS_JSON_FILENAME)][1]
+
+
+def test_transitions_against_local_s3(local_s3: LocalS3,
+                                      backend: S3Backend) -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    snapshot = api.snapshot_from_json(events_json)
+    transitions = TransitionTable.build(
+        snapshot.events_dict, snapshot.timeline,
+        events_md5=hashlib.md5(events_json).hexdigest())
+    local_s3.put_object('kha-store-test', TRANSITIONS_JSON_FILENAME,
+                        json.dumps(transitions.to_json_dict()).encode())
+    loaded = api.snapshot_from_store(backend).transitions
+    assert loaded is not None
+    assert len(loaded.transitions) == len(transitions.transitions)
+
+    local_s3.put_object('kha-store-test', EVENTS_JSON_FILENAME,
+                        events_json + b'\n')
+    api.store_cache.invalidate()
+    assert api.snapshot_from_store(backend).transitions is None
+
+
+def test_prefers_matching_binary_snapshot(local_s3: LocalS3,
+                                          backend: S3Backend) -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    local_s3.put_object('kha-store-test', EVENTS_BINARY_FILENAME,
+                        dump_events(
+                            api.snapshot_from_json(events_json)
+                            .events_dict,
+                            hashlib.md5(events_json).hexdigest()))
+    snapshot = api.snapshot_from_store(backend)
+    assert isinstance(snapshot.events_dict['episodes'], LazyEpisodes)
+    assert snapshot.etag == local_s3.objects[
+        ('kha-store-test', EVENTS_JSON_FILENAME)][1]
+
+    # The binary snapshot is stale once the events JSON changes
+    local_s3.put_object('kha-store-test', EVENTS_JSON_FILENAME,
+                        events_json + b'\n')
+    api.store_cache.invalidate()
+    assert isinstance(
+        api.snapshot_from_store(backend).events_dict['episodes'], dict)
+
+
+def test_cold_load_from_binary_snapshot(local_s3: LocalS3,
+                                        backend: S3Backend) -> None:
+    events_json = LOCAL_EVENTS_JSON_PATH.read_bytes()
+    events_dict = api.snapshot_from_json(events_json).events_dict
+    events_md5 = hashlib.md5(events_json).hexdigest()
+    local_s3.put_object('kha-store-test', EVENTS_BINARY_FILENAME,
+                        dump_events(events_dict, events_md5))
+    snapshot = api.snapshot_from_store(backend)
+    assert isinstance(snapshot.events_dict['episodes'], LazyEpisodes)
+    assert snapshot.last_modified is not None
+    # The binary snapshot, then the events JSON unless it matches
+    assert local_s3.request_count == 2
+
+    # Only a binary snapshot that lists transitions asks for them
+    local_s3.put_object('kha-store-test', EVENTS_BINARY_FILENAME,
+                        dump_events(events_dict, events_md5,
+                                    with_transitions=True))
+    api.store_cache.invalidate()
+    api.snapshot_from_store(backend)
+    assert local_s3.request_count == 2 + 3
+
+
+def test_stream_episodes_against_local_s3(backend: S3Backend) -> None:
+    streamed = dict(api.stream_episodes_from_store(
+        not_rerun, backend=backend))
+    loaded = api.snapshot_from_json(LOCAL_EVENTS_JSON_PATH.read_bytes()) \
+        .events_dict['episodes']
+    assert streamed.keys() == {uuid for uuid, episode in loaded.items()
+                               if not episode.is_rerun}
+
+
+def test_missing_objects_against_local_s3(local_s3: LocalS3,
+                                          backend: S3Backend) -> None:
+    assert backend.head(TRANSITIONS_JSON_FILENAME) is None
+    assert backend.get(TRANSITIONS_JSON_FILENAME) is None
+    head = backend.head(EVENTS_JSON_FILENAME)
+    assert head is not None
+    assert head.etag == local_s3.objects[
+        ('kha-store-test', EVENTS_JSON_FILENAME)][1]
+
+
+def test_burst_of_cold_requests_against_local_s3(
+        local_s3: LocalS3, backend: S3Backend) -> None:
+    callers = 64
+    barrier = threading.Barrier(callers)
+    coalesced = api.store_cache.stats()['coalesced']
+
+    def request() -> object:
+        barrier.wait()
+        return api.snapshot_from_store(backend)
+
+    with ThreadPoolExecutor(callers) as executor:
+        snapshots = list(executor.map(lambda _: request(), range(callers)))
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    # One load: events JSON after checking for a binary snapshot
+    # and before checking for transitions
+    assert local_s3.request_count == 3
+    assert api.store_cache.stats()['coalesced'] > coalesced
+
+
+def test_slow_store_falls_back_within_deadline(
+        local_s3: LocalS3,
+        backend: S3Backend,
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api.store_cache, 'ttl_seconds', 0)
+    monkeypatch.setattr(api.store_cache, 'max_staleness_seconds', 0)
+    first, source = api.bounded_snapshot_from_store(backend, 5)
+    assert source == SnapshotSource.STORE
+
+    local_s3.latency_seconds = 0.2
+    started = time.monotonic()
+    second, source = api.bounded_snapshot_from_store(backend, 0.05)
+    assert time.monotonic() - started < 0.2
+    assert (second, source) == (first, SnapshotSource.LAST_KNOWN)
+    api.store_cache.join_refreshes()
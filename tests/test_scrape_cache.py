@@ -0,0 +1,123 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+import kha.scraper
+from kha.episode import Episode
+from kha.scrape_cache import ScrapeCache
+from kha.scrape_runner import ScrapeSource, scrape_sources
+from kha.settings import WUNSCHLISTE_QUERY_PARAMETERS
+from kha.storage_backends import LocalFileBackend
+from scripts.local_epg import LocalEpg
+from scripts.synthetic_epg import epg_listing
+
+
+def new_run(path: Path) -> ScrapeCache:
+    """Returns the cache as a later run of the scraper sees it."""
+    return ScrapeCache(LocalFileBackend(path))
+
+
+@pytest.fixture(name='parsed_items')
+def fixture_parsed_items(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Records every list item that is parsed."""
+    parsed_items: list[str] = []
+    parse_item = kha.scraper.parse_item
+
+    def recording_parse_item(item_html: str,
+                             sd_date_published: datetime | None = None) \
+            -> Episode | None:
+        parsed_items.append(item_html)
+        return parse_item(item_html, sd_date_published)
+
+    monkeypatch.setattr(kha.scraper, 'parse_item', recording_parse_item)
+    return parsed_items
+
+
+def broadcasts(episodes: list[Episode]) -> list[str]:
+    return [repr(episode) for episode in episodes]
+
+
+def test_not_modified(local_epg: LocalEpg, tmp_path: Path,
+                      parsed_items: list[str]) -> None:
+    html = epg_listing(8 * 1024)
+    local_epg.put_page('/', html.encode(), WUNSCHLISTE_QUERY_PARAMETERS)
+    first = new_run(tmp_path).scrape()
+    assert len(first) == len(list(kha.scraper.list_items(html)))
+    parsed_count = len(parsed_items)
+
+    cache = new_run(tmp_path)
+    assert broadcasts(cache.scrape()) == broadcasts(first)
+    assert cache.stats() == {'not_modified': 1, 'unchanged': 0, 'parsed': 0}
+    assert len(parsed_items) == parsed_count
+    assert local_epg.request_count == 2
+
+
+def test_changed_page(local_epg: LocalEpg, tmp_path: Path) -> None:
+    local_epg.put_page('/', epg_listing(1024).encode(),
+                       WUNSCHLISTE_QUERY_PARAMETERS)
+    first = new_run(tmp_path).scrape()
+    html = epg_listing(1024, first_week=10)
+    local_epg.put_page('/', html.encode(), WUNSCHLISTE_QUERY_PARAMETERS)
+
+    cache = new_run(tmp_path)
+    changed = cache.scrape()
+    assert cache.stats() == {'not_modified': 0, 'unchanged': 0, 'parsed': 1}
+    assert broadcasts(changed) != broadcasts(first)
+    assert [episode.domain_key for episode in changed] \
+        == [episode.domain_key
+            for episode in kha.scraper.scrape_wunschliste(html)]
+    assert broadcasts(cache.scrape()) == broadcasts(changed)
+    assert cache.stats()['not_modified'] == 1
+
+
+def test_unchanged_body_without_validators(
+    local_epg: LocalEpg,
+    tmp_path: Path,
+    parsed_items: list[str],
+) -> None:
+    local_epg.send_validators = False
+    local_epg.put_page('/', epg_listing(1024).encode(),
+                       WUNSCHLISTE_QUERY_PARAMETERS)
+    first = new_run(tmp_path).scrape()
+    parsed_count = len(parsed_items)
+
+    cache = new_run(tmp_path)
+    assert broadcasts(cache.scrape()) == broadcasts(first)
+    assert cache.stats() == {'not_modified': 0, 'unchanged': 1, 'parsed': 0}
+    assert len(parsed_items) == parsed_count
+
+
+def test_lost_episodes_refetched(local_epg: LocalEpg,
+                                 tmp_path: Path) -> None:
+    local_epg.put_page('/', epg_listing(1024).encode(),
+                       WUNSCHLISTE_QUERY_PARAMETERS)
+    new_run(tmp_path).scrape()
+    for path in (tmp_path / 'episodes').iterdir():
+        path.unlink()
+
+    cache = new_run(tmp_path)
+    assert cache.scrape()
+    assert cache.stats() == {'not_modified': 0, 'unchanged': 0, 'parsed': 1}
+
+
+def test_sources_with_cache(local_epg: LocalEpg, tmp_path: Path) -> None:
+    sources = [ScrapeSource(name, {'station': name})
+               for name in ('zdf', 'zdfneo', '3sat')]
+    for number, source in enumerate(sources):
+        local_epg.put_page('/', epg_listing(1024, first_week=number * 10)
+                           .encode(), source.params)
+    # The same listing on another page is not parsed again
+    local_epg.put_page('/', epg_listing(1024).encode(), {'station': 'tivi'})
+    sources.append(ScrapeSource('tivi', {'station': 'tivi'}))
+
+    cache = new_run(tmp_path)
+    first = scrape_sources(sources, cache=cache, max_workers=1)
+    assert cache.stats() == {'not_modified': 0, 'unchanged': 1, 'parsed': 3}
+
+    cache = new_run(tmp_path)
+    assert broadcasts(scrape_sources(sources, cache=cache)) \
+        == broadcasts(first)
+    assert cache.stats() == {'not_modified': 4, 'unchanged': 0, 'parsed': 0}
@@ -0,0 +1,119 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+
+import pytest
+import requests
+
+from kha.episode import Episode
+from kha.scrape_runner import ScrapeSource, merge_episodes, scrape_sources
+from kha.scraper import create_scrape_session, scrape_wunschliste
+from scripts.local_epg import LocalEpg
+from scripts.synthetic_epg import epg_listing
+
+
+@pytest.fixture(name='session')
+def fixture_session() -> Iterator[requests.Session]:
+    with create_scrape_session(backoff_seconds=0) as session:
+        yield session
+
+
+def put_sources(local_epg: LocalEpg,
+                pages: dict[str, str]) -> list[ScrapeSource]:
+    """Serves each page at its own query parameters."""
+    sources = []
+    for name, html in pages.items():
+        source = ScrapeSource(name, {'s': '1187', 'station': name})
+        local_epg.put_page('/', html.encode(), source.params)
+        sources.append(source)
+    return sources
+
+
+def broadcasts(episodes: list[Episode]) \
+        -> list[tuple[tuple[int | str, bool, bool], datetime]]:
+    return [(episode.domain_key, episode.date_published)
+            for episode in episodes]
+
+
+def test_merge_deterministically(local_epg: LocalEpg,
+                                 session: requests.Session) -> None:
+    # The largest page comes first, so it finishes last
+    pages = {
+        'zdf': epg_listing(16 * 1024),
+        'zdfneo': epg_listing(4 * 1024, first_week=4),
+        '3sat': epg_listing(1024, first_week=40),
+    }
+    sources = put_sources(local_epg, pages)
+    local_epg.chunk_delay_seconds = .005
+    expected = merge_episodes(
+        scrape_wunschliste(html) for html in pages.values())
+
+    merged = scrape_sources(sources, session)
+    assert broadcasts(merged) == broadcasts(expected)
+    assert broadcasts(scrape_sources(reversed(sources), session)) \
+        == broadcasts(expected)
+    assert len({episode.domain_key for episode in merged}) == len(merged)
+    assert [episode.date_published for episode in merged] \
+        == sorted(episode.date_published for episode in merged)
+
+
+def test_merge_keeps_earliest_broadcast(
+    episode_boilerplate: dict[str, Any],
+) -> None:
+    first = Episode(569, name='Folge 569', **episode_boilerplate)
+    later = Episode(569, name='Folge 569 (ZDFneo)', **(
+        episode_boilerplate | {
+            'date_published': datetime.fromisoformat(
+                '2021-06-16T20:15:00+02:00'),
+        }))
+    same_time = Episode(569, name='Folge 569 (3sat)', **episode_boilerplate)
+    for episode_lists in ([[later], [first, same_time]],
+                          [[later, first], [same_time]]):
+        assert [episode.name for episode
+                in merge_episodes(episode_lists)] == ['Folge 569']
+
+
+def test_connections_capped_and_kept_alive(
+    local_epg: LocalEpg,
+    session: requests.Session,
+) -> None:
+    sources = put_sources(local_epg, {
+        f'page-{page}': epg_listing(4 * 1024, first_week=page * 10)
+        for page in range(8)
+    })
+    local_epg.chunk_delay_seconds = .005
+    assert len(scrape_sources(sources, session, max_workers=8)) \
+        == len(sources) * len(list(scrape_wunschliste(epg_listing(4096))))
+    assert local_epg.request_count == len(sources)
+    assert local_epg.max_active_requests == 2
+    assert local_epg.connection_count == 2
+
+
+def test_retry_with_backoff(local_epg: LocalEpg,
+                            session: requests.Session) -> None:
+    sources = put_sources(local_epg, {'zdf': epg_listing(1024)})
+    local_epg.fail_page('/', 2, sources[0].params)
+    assert scrape_sources(sources, session)
+    assert local_epg.request_count == 3
+
+
+def test_give_up_after_max_attempts(local_epg: LocalEpg,
+                                    session: requests.Session) -> None:
+    sources = put_sources(local_epg, {
+        'zdf': epg_listing(1024),
+        'zdfneo': epg_listing(1024),
+    })
+    local_epg.fail_page('/', 3, sources[1].params)
+    with pytest.raises(RuntimeError, match="Unable to scrape.*'zdfneo'"):
+        scrape_sources(sources, session)
+    assert local_epg.request_count == 1 + 3
+
+
+def test_missing_page_not_retried(local_epg: LocalEpg,
+                                  session: requests.Session) -> None:
+    with pytest.raises(RuntimeError, match='Unable to scrape'):
+        scrape_sources([ScrapeSource('zdf', {'station': 'missing'})],
+                       session)
+    assert local_epg.request_count == 1
@@ -1,8 +1,23 @@
-# pylint: disable=missing-function-docstring, missing-module-docstring
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring, protected-access
+
+from collections.abc import Callable, Iterable
+import json
+from pathlib import Path
+import time
+from typing import Any
 
 import pytest
 
 import kha.scraper
+from kha.episode import Episode
+from kha.settings import WUNSCHLISTE_IMPLIED_TIMEZONE, \
+    WUNSCHLISTE_QUERY_PARAMETERS
+from scripts.local_epg import LocalEpg
+from scripts.synthetic_epg import epg_listing, \
+    item_without_episode_label, unclosed_items
+
+FIXTURES_PATH = Path(__file__).parent / 'fixtures' / 'wunschliste'
+
 
 @pytest.fixture(name='episode_569_html')
 def fixture_episode_569_html() -> str:
@@ -17,3 +32,111 @@ def test_scrape_episode_569(episode_569_html: str) -> None:
         (569, False, False),
         (569, True, False),
     ]
+
+
+@pytest.mark.parametrize(
+    'html_path', sorted(FIXTURES_PATH.glob('*.html')),
+    ids=lambda path: path.stem)
+def test_fixture_corpus(html_path: Path) -> None:
+    """
+    Each fixture comes with the result of the regular expressions
+    that the parser has replaced.
+    """
+    expected: dict[str, Any] = json.loads(
+        html_path.with_suffix('.json').read_text())
+    html = html_path.read_text()
+    if 'error' in expected:
+        with pytest.raises(RuntimeError, match=expected['error']):
+            list(kha.scraper.scrape_wunschliste(html))
+        return
+    assert [
+        {
+            'episode_number': episode.episode_number,
+            'name': episode.name,
+            'date_published': episode.date_published
+            .astimezone(WUNSCHLISTE_IMPLIED_TIMEZONE).isoformat(),
+            'is_rerun': episode.is_rerun,
+            'is_spinoff': episode.is_spinoff,
+        }
+        for episode in kha.scraper.scrape_wunschliste(html)
+    ] == expected['episodes']
+
+
+def test_list_items() -> None:
+    assert list(kha.scraper.list_items(
+        '<ul><li>a</li> <li class="x">b<li>c</li><li>d</ul>'
+    )) == ['<li>a</li>', '<li class="x">b<li>c</li>']
+
+
+@pytest.mark.parametrize('make_html', [
+    epg_listing,
+    item_without_episode_label,
+    unclosed_items,
+])
+def test_linear_time(make_html: Callable[[int], str]) -> None:
+    html = make_html(1024 * 1024)
+    start = time.perf_counter()
+    try:
+        list(kha.scraper.scrape_wunschliste(html))
+    except RuntimeError:
+        pass
+    # Backtracking took seconds for a few kilobytes of these
+    assert time.perf_counter() - start < 5
+
+
+def pieces(html: str, size: int) -> list[str]:
+    return [html[start:start + size] for start in range(0, len(html), size)]
+
+
+@pytest.mark.parametrize(
+    'html_path', sorted(FIXTURES_PATH.glob('*.html')),
+    ids=lambda path: path.stem)
+def test_stream_items(html_path: Path) -> None:
+    html = html_path.read_text()
+    for size in (1, 4, 5, 333, len(html)):
+        assert list(kha.scraper.stream_items(pieces(html, size))) \
+            == list(kha.scraper.list_items(html))
+
+
+def test_stream_items_in_bounded_memory() -> None:
+    html = epg_listing(64 * 1024)
+    longest = max(len(item) for item in kha.scraper.list_items(html))
+    extractor = kha.scraper.ListItemExtractor()
+    pending = []
+    for piece in pieces(html, 100):
+        extractor.feed(piece)
+        pending.append(len(extractor._pending))
+    assert max(pending) < longest
+
+
+def test_stream_item_too_long() -> None:
+    with pytest.raises(RuntimeError, match='longer than 1000'):
+        list(kha.scraper.stream_items(
+            pieces(unclosed_items(2000), 100), max_item_length=1000))
+
+
+def first_and_all(episodes: Iterable[Episode]) \
+        -> tuple[float, list[Episode]]:
+    """Returns the time to the first episode, and all episodes."""
+    start = time.perf_counter()
+    iterator = iter(episodes)
+    first = next(iterator)
+    elapsed = time.perf_counter() - start
+    return elapsed, [first, *iterator]
+
+
+def test_time_to_first_episode(local_epg: LocalEpg) -> None:
+    html = epg_listing(32 * 1024)
+    local_epg.put_page('/', html.encode(), WUNSCHLISTE_QUERY_PARAMETERS)
+    local_epg.chunk_size = 1024
+    local_epg.chunk_delay_seconds = .02
+    download_seconds = len(html) / 1024 * .02
+
+    streamed_seconds, streamed = first_and_all(
+        kha.scraper.scrape_wunschliste(stream=True))
+    buffered_seconds, buffered = first_and_all(
+        kha.scraper.scrape_wunschliste())
+    assert streamed == buffered
+    assert len(streamed) == len(list(kha.scraper.list_items(html)))
+    assert buffered_seconds >= download_seconds
+    assert streamed_seconds < download_seconds / 4
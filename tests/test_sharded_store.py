@@ -0,0 +1,199 @@
+# pylint: disable=magic-value-comparison, missing-class-docstring, missing-function-docstring, missing-module-docstring, protected-access
+
+from datetime import datetime, timedelta
+import json
+from typing import Any
+
+import pytest
+
+from kha import api
+from kha.reference_instant import ReferenceInstant
+from kha.settings import EVENTS_JSON_FILENAME, EVENTS_MANIFEST_FILENAME, \
+    SHARDED_STORE_LAYOUT, USER_TIMEZONE
+from kha.sharded_store import fetch_manifest, shards_to_load, \
+    split_events, upload_shards
+from kha.storage_backends import MemoryBackend, etag_of
+from kha.store_snapshot import StoreSnapshot
+from scripts.synthetic_store import synthetic_events_json
+
+
+class RecordingBackend(MemoryBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.puts: list[str] = []
+
+    def put(self, key: str, body: bytes) -> None:
+        super().put(key, body)
+        self.puts.append(key)
+
+    def body_of(self, key: str) -> bytes:
+        return self.get_existing(key).body.read()
+
+
+@pytest.fixture(name='events_json', scope='module')
+def fixture_events_json() -> bytes:
+    return synthetic_events_json(1_000)
+
+
+@pytest.fixture(name='backend')
+def fixture_backend() -> RecordingBackend:
+    return RecordingBackend()
+
+
+def sharded_snapshot_at(backend: RecordingBackend,
+                        now: datetime) -> StoreSnapshot:
+    snapshot = api._fetch_sharded_snapshot(backend, None, now=lambda: now)
+    assert snapshot is not None
+    return snapshot
+
+
+def test_split_by_year(events_json: bytes) -> None:
+    shard_bodies, manifest = split_events(events_json)
+    years = [shard['year'] for shard in manifest['shards']]
+    assert years == sorted(set(years))
+    assert list(shard_bodies) \
+        == [f'events/{year}.kha.json' for year in years]
+    episodes: dict[str, Any] = {}
+    for shard in manifest['shards']:
+        body = shard_bodies[shard['key']]
+        assert shard['etag'] == etag_of(body)
+        records = json.loads(body)['episodes']
+        starts = [datetime.fromisoformat(record['datePublished'])
+                  for record in records.values()]
+        assert starts == sorted(starts)
+        assert {start.astimezone(USER_TIMEZONE).year
+                for start in starts} == {shard['year']}
+        assert shard['firstDatePublished'] \
+            == next(iter(records.values()))['datePublished']
+        episodes |= records
+    assert episodes == json.loads(events_json)['episodes']
+
+
+def test_unchanged_years_keep_their_contents(events_json: bytes) -> None:
+    events_dict = json.loads(events_json)
+    first_uuid, first_record = min(
+        events_dict['episodes'].items(),
+        key=lambda item: item[1]['datePublished'])
+    first_record['name'] = 'Umbenannt'
+    shard_bodies, manifest = split_events(events_json)
+    changed_bodies, changed_manifest = \
+        split_events(json.dumps(events_dict).encode())
+    assert [key for key, body in shard_bodies.items()
+            if body != changed_bodies[key]] \
+        == [manifest['shards'][0]['key']]
+    assert first_uuid in changed_bodies[
+        changed_manifest['shards'][0]['key']].decode()
+
+
+def test_shards_to_load(events_json: bytes) -> None:
+    _, manifest = split_events(events_json)
+    shards = manifest['shards']
+    middle = shards[len(shards) // 2]
+    reference = ReferenceInstant(lambda: datetime.fromisoformat(
+        middle['firstDatePublished']) + timedelta(days=1))
+    selected = shards_to_load(manifest, reference)
+    later = [shard for shard in shards if shard['year'] >= middle['year']]
+    assert selected[-len(later):] == later
+    # The previous year holds the last eligible episode before
+    assert selected[:-len(later)] == [shards[len(shards) // 2 - 1]]
+
+
+def test_same_answers_as_whole_store(
+    backend: RecordingBackend,
+    events_json: bytes,
+) -> None:
+    upload_shards(backend, events_json)
+    whole = api.snapshot_from_json(events_json)
+    first_day = datetime(2000, 3, 20, 12, tzinfo=USER_TIMEZONE)
+    sharded = sharded_snapshot_at(backend, first_day)
+    assert len(sharded.events_dict['episodes']) \
+        < len(whole.events_dict['episodes'])
+    for days in range(0, 3_000, 7):
+        now = ReferenceInstant(
+            lambda days=days: first_day + timedelta(days=days))
+        assert api.check(now=now, timeline=sharded.timeline).__dict__ \
+            == api.check(now=now, timeline=whole.timeline).__dict__
+
+
+def test_spinoffs_after_the_last_regular_episode(
+    backend: RecordingBackend,
+) -> None:
+    events_dict = json.loads(synthetic_events_json(1_000))
+    records = sorted(events_dict['episodes'].values(),
+                     key=lambda record: record['datePublished'])
+    # Only spinoffs in the last ten years of the store
+    last_year = datetime.fromisoformat(
+        records[-1]['datePublished']).year
+    for record in records:
+        if datetime.fromisoformat(record['datePublished']).year \
+                > last_year - 10:
+            record['isSpinoff'] = True
+    events_json = json.dumps(events_dict).encode()
+    upload_shards(backend, events_json)
+    now = ReferenceInstant(lambda: datetime(
+        last_year - 2, 1, 1, tzinfo=USER_TIMEZONE))
+    sharded = sharded_snapshot_at(backend, now())
+    whole = api.snapshot_from_json(events_json)
+    assert api.check(now=now, timeline=sharded.timeline).__dict__ \
+        == api.check(now=now, timeline=whole.timeline).__dict__
+
+
+def test_upload_only_changed_shards(
+    backend: RecordingBackend,
+    events_json: bytes,
+) -> None:
+    written, deleted = upload_shards(backend, events_json)
+    manifest = fetch_manifest(backend)
+    assert manifest is not None
+    assert written == [shard['key'] for shard in manifest['shards']]
+    assert not deleted
+    assert upload_shards(backend, events_json) == ([], [])
+
+    events_dict = json.loads(events_json)
+    last_uuid = max(events_dict['episodes'],
+                    key=lambda uuid: events_dict['episodes'][uuid]
+                    ['datePublished'])
+    year = events_dict['episodes'][last_uuid]['datePublished'][:4]
+    # Moves the last episode into a new year
+    events_dict['episodes'][last_uuid]['datePublished'] = \
+        '9000-01-01T20:15:00+01:00'
+    written, deleted = upload_shards(
+        backend, json.dumps(events_dict).encode())
+    assert 'events/9000.kha.json' in written
+    assert len(written) <= 2
+    if f'events/{year}.kha.json' not in written:
+        assert deleted == [f'events/{year}.kha.json']
+    assert backend.puts[-1] == EVENTS_MANIFEST_FILENAME
+    for key in deleted:
+        assert backend.head(key) is None
+
+
+def test_shard_must_match_manifest(
+    backend: RecordingBackend,
+    events_json: bytes,
+) -> None:
+    upload_shards(backend, events_json)
+    _, manifest = split_events(events_json)
+    last_key = manifest['shards'][-1]['key']
+    backend.put(last_key, backend.body_of(last_key) + b'\n')
+    with pytest.raises(RuntimeError):
+        sharded_snapshot_at(backend, datetime.now(USER_TIMEZONE))
+
+
+def test_migrate_and_read(
+    backend: RecordingBackend,
+    monkeypatch: pytest.MonkeyPatch,
+    events_json: bytes,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    backend.put(EVENTS_JSON_FILENAME, events_json)
+    api.migrate_to_shards(backend)
+    _, manifest = split_events(events_json)
+    shard_count = len(manifest['shards'])
+    assert capsys.readouterr().out.startswith(
+        f'{shard_count} shards written, 0 deleted.')
+    monkeypatch.setattr(api, 'STORE_LAYOUT', SHARDED_STORE_LAYOUT)
+    snapshot = api.snapshot_from_store(backend)
+    assert snapshot.etag \
+        == etag_of(backend.body_of(EVENTS_MANIFEST_FILENAME))
+    assert api.snapshot_from_store(backend) is snapshot
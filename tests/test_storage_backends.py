@@ -0,0 +1,155 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+import hashlib
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from kha import api, storage_backends
+from kha.settings import EVENTS_JSON_FILENAME, LOCAL_EVENTS_JSON_PATH, \
+    LOCAL_STORAGE_BACKEND, PROJECT_ROOT
+from kha.storage_backends import LocalFileBackend, MemoryBackend, \
+    StorageBackend, etag_of
+
+
+@pytest.fixture(name='local_backend')
+def fixture_local_backend(tmp_path: Path) -> LocalFileBackend:
+    backend = LocalFileBackend(tmp_path)
+    backend.put(EVENTS_JSON_FILENAME, LOCAL_EVENTS_JSON_PATH.read_bytes())
+    return backend
+
+
+@pytest.fixture(name='hashed', autouse=True)
+def fixture_hashed(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Records the size of every body that is hashed for its ETag."""
+    hashed: list[int] = []
+
+    def recording_etag_of(body: bytes) -> str:
+        hashed.append(len(body))
+        return etag_of(body)
+
+    monkeypatch.setattr(storage_backends, 'etag_of', recording_etag_of)
+    return hashed
+
+
+@pytest.fixture(name='backend', params=['local', 'memory'])
+def fixture_backend(request: pytest.FixtureRequest,
+                    tmp_path: Path) -> StorageBackend:
+    if request.param == 'local':
+        return LocalFileBackend(tmp_path)
+    return MemoryBackend()
+
+
+def test_round_trip(backend: StorageBackend) -> None:
+    body = b'{"episodes": {}}\n'
+    assert backend.head('events/2021.kha.json') is None
+    assert backend.get('events/2021.kha.json') is None
+    backend.put('events/2021.kha.json', body)
+    head = backend.head('events/2021.kha.json')
+    assert head is not None
+    assert head.etag == f'"{hashlib.md5(body).hexdigest()}"'
+    assert head.last_modified is not None
+    stored = backend.get_existing('events/2021.kha.json')
+    assert stored.etag == head.etag
+    assert stored.body.read(5) == b'{"epi'
+    assert stored.body.read() == b'sodes": {}}\n'
+    assert stored.body.read() == b''
+    backend.delete('events/2021.kha.json')
+    backend.delete('events/2021.kha.json')
+    assert backend.head('events/2021.kha.json') is None
+    with pytest.raises(RuntimeError):
+        backend.get_existing('events/2021.kha.json')
+
+
+def test_empty_file(local_backend: LocalFileBackend) -> None:
+    local_backend.put('empty.json', b'')
+    assert local_backend.get_existing('empty.json').body.read() == b''
+
+
+def test_local_file_mapped_once(local_backend: LocalFileBackend,
+                                hashed: list[int]) -> None:
+    first = local_backend.head(EVENTS_JSON_FILENAME)
+    for _ in range(3):
+        assert local_backend.head(EVENTS_JSON_FILENAME) is first
+        local_backend.get_existing(EVENTS_JSON_FILENAME).body.read()
+    assert len(hashed) == 1
+
+
+def replace_file(path: Path, body: bytes) -> None:
+    """Replaces the file as a whole, like `mv` does."""
+    temporary = path.with_name(f'.{path.name}.new')
+    temporary.write_bytes(body)
+    os.replace(temporary, path)
+
+
+def test_local_file_reloaded_on_change(
+    local_backend: LocalFileBackend,
+    hashed: list[int],
+) -> None:
+    reader = local_backend.get_existing(EVENTS_JSON_FILENAME)
+    path = local_backend.root / EVENTS_JSON_FILENAME
+    replace_file(path, b'{"episodes": {}}')
+    changed = local_backend.get_existing(EVENTS_JSON_FILENAME)
+    assert changed.etag == etag_of(b'{"episodes": {}}')
+    assert changed.body.read() == b'{"episodes": {}}'
+    # Same size, later modification time
+    stat = path.stat()
+    replace_file(path, b'{"episodes": []}')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert local_backend.get_existing(EVENTS_JSON_FILENAME).etag \
+        == etag_of(b'{"episodes": []}')
+    assert len(hashed) == 3
+    # Readers of a replaced file keep reading its previous contents
+    assert reader.body.read() == LOCAL_EVENTS_JSON_PATH.read_bytes()
+
+
+def test_snapshot_from_local_file(local_backend: LocalFileBackend) -> None:
+    snapshot = api.snapshot_from_store(local_backend)
+    assert snapshot.etag \
+        == etag_of(LOCAL_EVENTS_JSON_PATH.read_bytes())
+    assert snapshot.events_dict['episodes'].keys() \
+        == api.snapshot_from_json(LOCAL_EVENTS_JSON_PATH.read_bytes()) \
+        .events_dict['episodes'].keys()
+
+
+def test_configured_backend(monkeypatch: pytest.MonkeyPatch,
+                            tmp_path: Path) -> None:
+    monkeypatch.setattr(api, 'STORAGE_BACKEND', LOCAL_STORAGE_BACKEND)
+    monkeypatch.setattr(api, 'LOCAL_STORE_PATH', tmp_path)
+    api.set_storage_backend(None)
+    backend = api.storage_backend()
+    assert isinstance(backend, LocalFileBackend)
+    assert backend.root == tmp_path
+    assert api.storage_backend() is backend
+
+    monkeypatch.setattr(api, 'STORAGE_BACKEND', 'ftp')
+    api.set_storage_backend(None)
+    with pytest.raises(ValueError):
+        api.storage_backend()
+
+    memory = MemoryBackend()
+    api.set_storage_backend(memory)
+    assert api.storage_backend() is memory
+
+
+def test_runs_without_boto3() -> None:
+    script = '\n'.join((
+        'import sys',
+        "sys.modules['boto3'] = sys.modules['botocore'] = None",
+        "sys.modules['mypy_boto3_s3'] = None",
+        'from kha import api',
+        'print(len(api.all_episodes_from_store()))',
+    ))
+    completed = subprocess.run(
+        [sys.executable, '-c', script],
+        capture_output=True, check=True, cwd=PROJECT_ROOT,
+        env=os.environ | {'KHA_STORAGE_BACKEND': 'local',
+                          'KHA_LOCAL_STORE_PATH':
+                          str(LOCAL_EVENTS_JSON_PATH.parent)},
+    )
+    assert int(completed.stdout) == len(
+        api.snapshot_from_json(LOCAL_EVENTS_JSON_PATH.read_bytes())
+        .events_dict['episodes'])
@@ -0,0 +1,526 @@
+# pylint: disable=magic-value-comparison, missing-class-docstring, missing-function-docstring, missing-module-docstring, too-few-public-methods
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import json
+import logging
+from pathlib import Path
+import threading
+
+import pytest
+
+from kha import api, binary_snapshot
+from kha.episode import Episode
+from kha.episode_patchers.episode_adder import EpisodeAdder
+from kha.local_types import EventsDict, Uuid
+from kha.settings import EVENTS_BINARY_FILENAME, EVENTS_JSON_FILENAME, \
+    LOCAL_EVENTS_JSON_PATH, TRANSITIONS_JSON_FILENAME
+from kha.storage_backends import MemoryBackend, ObjectVersion, \
+    StoredObject, etag_of
+from kha.store_cache import StoreCache
+from kha.store_snapshot import SnapshotSource, StoreSnapshot
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def __call__(self) -> float:
+        return self.seconds
+
+
+class RecordingBackend(MemoryBackend):
+    """Records the requests for objects that exist."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[tuple[str, str]] = []
+
+    def head(self, key: str) -> ObjectVersion | None:
+        if (version := super().head(key)) is not None:
+            self.requests.append(('head', key))
+        return version
+
+    def get(self, key: str) -> StoredObject | None:
+        if (stored := super().get(key)) is not None:
+            self.requests.append(('get', key))
+        return stored
+
+
+class BlockingBackend(RecordingBackend):
+    """Holds up requests while `released` is not set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.released = threading.Event()
+        self.released.set()
+
+    def head(self, key: str) -> ObjectVersion | None:
+        self.released.wait()
+        return super().head(key)
+
+    def get(self, key: str) -> StoredObject | None:
+        self.released.wait()
+        return super().get(key)
+
+
+@pytest.fixture(name='clock')
+def fixture_clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture(name='cache')
+def fixture_cache(clock: FakeClock) -> StoreCache:
+    return StoreCache(ttl_seconds=60, clock=clock)
+
+
+@pytest.fixture(name='backend')
+def fixture_backend() -> BlockingBackend:
+    backend = BlockingBackend()
+    backend.put(EVENTS_JSON_FILENAME, json.dumps({
+        'episodes': {
+            'A9EDED35-CDFE-4E45-9D75-2BE3B68499F6': {
+                '@type': 'Episode',
+                'episodeNumber': 567,
+                'name': 'Folge 567',
+                'datePublished': '2021-06-09T20:15:00+02:00',
+                'sdDatePublished': '2021-05-30T12:19:06+02:00',
+                'isRerun': False,
+                'isSpinoff': False,
+            },
+        },
+    }).encode())
+    return backend
+
+
+def snapshot(etag: str) -> StoreSnapshot:
+    return StoreSnapshot(EventsDict({'episodes': {}}), etag=etag)
+
+
+def test_hit_within_ttl(cache: StoreCache, clock: FakeClock) -> None:
+    fetched: list[str | None] = []
+
+    def fetch(etag: str | None) -> StoreSnapshot:
+        fetched.append(etag)
+        return snapshot('"v1"')
+
+    first = cache.get(('bucket', 'key'), fetch)
+    clock.seconds = 59
+    assert cache.get(('bucket', 'key'), fetch) is first
+    assert fetched == [None]
+    assert cache.stats() == {
+        'hits': 1, 'misses': 1, 'revalidations': 0, 'stale_hits': 0,
+        'refreshes': 0, 'refresh_errors': 0, 'coalesced': 0,
+        'oldest_snapshot_age_seconds': 59,
+    }
+
+
+def test_revalidate_unchanged(cache: StoreCache,
+                              clock: FakeClock) -> None:
+    first = cache.get(('bucket', 'key'),
+                      lambda etag: snapshot('"v1"'))
+    clock.seconds = 61
+    fetched: list[str | None] = []
+
+    def fetch(etag: str | None) -> None:
+        fetched.append(etag)
+
+    assert cache.get(('bucket', 'key'), fetch) is first
+    assert fetched == ['"v1"']
+    clock.seconds = 100
+    assert cache.get(('bucket', 'key'), fetch) is first
+    assert cache.stats() == {
+        'hits': 1, 'misses': 1, 'revalidations': 1, 'stale_hits': 0,
+        'refreshes': 0, 'refresh_errors': 0, 'coalesced': 0,
+        'oldest_snapshot_age_seconds': 39,
+    }
+
+
+def test_revalidate_changed(cache: StoreCache,
+                            clock: FakeClock) -> None:
+    cache.get(('bucket', 'key'), lambda etag: snapshot('"v1"'))
+    clock.seconds = 61
+    assert cache.get(('bucket', 'key'),
+                     lambda etag: snapshot('"v2"')).etag == '"v2"'
+
+
+@pytest.fixture(name='swr_cache')
+def fixture_swr_cache(clock: FakeClock) -> StoreCache:
+    return StoreCache(ttl_seconds=60, clock=clock,
+                      max_staleness_seconds=600,
+                      refresh_interval_seconds=10)
+
+
+def test_serve_stale_while_refreshing(swr_cache: StoreCache,
+                                      clock: FakeClock) -> None:
+    first = swr_cache.get(('bucket', 'key'), lambda etag: snapshot('"v1"'))
+    clock.seconds = 61
+    release = threading.Event()
+    fetched: list[str | None] = []
+
+    def slow_fetch(etag: str | None) -> StoreSnapshot:
+        fetched.append(etag)
+        release.wait(5)
+        return snapshot('"v2"')
+
+    # Only one refresh runs, however many callers see a stale copy
+    for _ in range(10):
+        assert swr_cache.get(('bucket', 'key'), slow_fetch) is first
+    release.set()
+    swr_cache.join_refreshes()
+    assert fetched == ['"v1"']
+    assert swr_cache.get(('bucket', 'key'), slow_fetch).etag == '"v2"'
+    assert swr_cache.stats() == {
+        'hits': 1, 'misses': 1, 'revalidations': 0, 'stale_hits': 10,
+        'refreshes': 1, 'refresh_errors': 0, 'coalesced': 0,
+        'oldest_snapshot_age_seconds': 0,
+    }
+
+
+def test_keep_snapshot_if_refresh_fails(swr_cache: StoreCache,
+                                        clock: FakeClock) -> None:
+    first = swr_cache.get(('bucket', 'key'), lambda etag: snapshot('"v1"'))
+    attempts: list[float] = []
+
+    def failing_fetch(etag: str | None) -> StoreSnapshot:
+        attempts.append(clock.seconds)
+        raise ValueError(f'Malformed store after {etag}')
+
+    for seconds in (61, 65, 71, 100):
+        clock.seconds = seconds
+        assert swr_cache.get(('bucket', 'key'), failing_fetch) is first
+        swr_cache.join_refreshes()
+    # Retried no sooner than the refresh interval
+    assert attempts == [61, 71, 100]
+    assert swr_cache.stats()['refresh_errors'] == 3
+    assert swr_cache.snapshot_age(('bucket', 'key')) == 100
+
+
+def test_refresh_in_caller_when_too_stale(swr_cache: StoreCache,
+                                          clock: FakeClock) -> None:
+    swr_cache.get(('bucket', 'key'), lambda etag: snapshot('"v1"'))
+    clock.seconds = 600
+
+    def failing_fetch(etag: str | None) -> StoreSnapshot:
+        raise ValueError(f'Malformed store after {etag}')
+
+    with pytest.raises(ValueError):
+        swr_cache.get(('bucket', 'key'), failing_fetch)
+    assert swr_cache.get(('bucket', 'key'),
+                         lambda etag: snapshot('"v2"')).etag == '"v2"'
+    assert swr_cache.stats()['revalidations'] == 2
+    assert swr_cache.stats()['refresh_errors'] == 1
+
+
+def test_invalidate_during_refresh(swr_cache: StoreCache,
+                                   clock: FakeClock) -> None:
+    swr_cache.get(('bucket', 'key'), lambda etag: snapshot('"v1"'))
+    clock.seconds = 61
+    release = threading.Event()
+
+    def slow_fetch(etag: str | None) -> StoreSnapshot:
+        release.wait(5)
+        return snapshot(f'"after {etag}"')
+
+    swr_cache.get(('bucket', 'key'), slow_fetch)
+    swr_cache.invalidate()
+    release.set()
+    swr_cache.join_refreshes()
+    assert swr_cache.snapshot_age(('bucket', 'key')) is None
+
+
+def test_malformed_store_keeps_snapshot(
+    backend: RecordingBackend,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(api.store_cache, 'ttl_seconds', 0)
+    monkeypatch.setattr(api.store_cache, 'refresh_interval_seconds', 0)
+    first = api.snapshot_from_store(backend)
+    errors = api.store_cache.stats()['refresh_errors']
+    backend.put(EVENTS_JSON_FILENAME, b'{"episodes": {')
+    assert api.snapshot_from_store(backend) is first
+    api.store_cache.join_refreshes()
+    assert api.snapshot_from_store(backend) is first
+    api.store_cache.join_refreshes()
+    assert api.store_cache.stats()['refresh_errors'] == errors + 2
+
+
+def concurrently(call: Callable[[], StoreSnapshot],
+                 callers: int) -> list[StoreSnapshot | Exception]:
+    """Runs the call from many threads at once."""
+    barrier = threading.Barrier(callers)
+
+    def call_after_barrier() -> StoreSnapshot | Exception:
+        barrier.wait()
+        try:
+            return call()
+        except ValueError as error:
+            return error
+
+    with ThreadPoolExecutor(callers) as executor:
+        futures = [executor.submit(call_after_barrier)
+                   for _ in range(callers)]
+        return [future.result() for future in futures]
+
+
+def fetch_once_all_wait(cache: StoreCache, callers: int,
+                        fetched: list[str | None],
+                        fails: bool = False) -> Callable[
+                            [str | None], StoreSnapshot]:
+    """
+    Returns a fetcher that blocks until all other callers wait
+    for it, unless they have already been served.
+    """
+    def fetch(etag: str | None) -> StoreSnapshot:
+        fetched.append(etag)
+        for _ in range(500):
+            if cache.stats()['coalesced'] >= callers - 1:
+                break
+            threading.Event().wait(.01)
+        if fails:
+            raise ValueError('Malformed store')
+        return snapshot(f'"v{len(fetched)}"')
+    return fetch
+
+
+def test_concurrent_misses_share_one_load(cache: StoreCache) -> None:
+    fetched: list[str | None] = []
+    fetch = fetch_once_all_wait(cache, 16, fetched)
+    results = concurrently(lambda: cache.get(('bucket', 'key'), fetch), 16)
+    assert fetched == [None]
+    assert all(result is results[0] for result in results)
+    assert cache.stats()['misses'] == 16
+    assert cache.stats()['coalesced'] == 15
+
+
+def test_error_reaches_all_waiters(cache: StoreCache) -> None:
+    fetched: list[str | None] = []
+    fetch = fetch_once_all_wait(cache, 16, fetched, fails=True)
+    results = concurrently(lambda: cache.get(('bucket', 'key'), fetch), 16)
+    assert fetched == [None]
+    assert all(isinstance(result, ValueError) for result in results)
+    # Errors are not cached
+    assert cache.get(('bucket', 'key'),
+                     lambda etag: snapshot('"v2"')).etag == '"v2"'
+
+
+def test_too_stale_caller_joins_refresh(swr_cache: StoreCache,
+                                        clock: FakeClock) -> None:
+    first = swr_cache.get(('bucket', 'key'), lambda etag: snapshot('"v1"'))
+    clock.seconds = 61
+    release = threading.Event()
+    fetched: list[str | None] = []
+
+    def slow_fetch(etag: str | None) -> StoreSnapshot:
+        fetched.append(etag)
+        release.wait(5)
+        return snapshot('"v2"')
+
+    assert swr_cache.get(('bucket', 'key'), slow_fetch) is first
+    clock.seconds = 700
+    threading.Timer(.05, release.set).start()
+    assert swr_cache.get(('bucket', 'key'), slow_fetch).etag == '"v2"'
+    assert fetched == ['"v1"']
+    assert swr_cache.stats()['coalesced'] == 1
+
+
+def test_stop_waiting_after_timeout(cache: StoreCache) -> None:
+    release = threading.Event()
+
+    def slow_fetch(etag: str | None) -> StoreSnapshot:
+        release.wait(5)
+        return snapshot(f'"after {etag}"')
+
+    with pytest.raises(TimeoutError):
+        cache.get(('bucket', 'key'), slow_fetch, timeout=0.01)
+    assert cache.last_snapshot(('bucket', 'key')) is None
+    release.set()
+    cache.join_refreshes()
+    # The load has gone on, and later callers get its result
+    assert cache.get(('bucket', 'key'), slow_fetch, timeout=0.01).etag \
+        == '"after None"'
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_patch_while_reading(cache: StoreCache,
+                             weekly_episodes: list[Episode]) -> None:
+    store_key = ('bucket', 'key')
+    cache.get(store_key, lambda etag: StoreSnapshot(EventsDict({
+        'episodes': {Uuid(str(episode.episode_number)): episode
+                     for episode in weekly_episodes},
+    }), etag='"v1"'))
+    last = weekly_episodes[-1]
+    patchers = [
+        EpisodeAdder(Uuid(str(number)), Episode(
+            number, name=f'Folge {number}',
+            date_published=last.date_published
+            + timedelta(weeks=number - len(weekly_episodes) + 1),
+            sd_date_published=last.sd_date_published,
+            timezone=last.timezone))
+        for number in range(52, 152)
+    ]
+    patched = threading.Event()
+    seen: dict[str, int] = {}
+
+    def read() -> None:
+        while not patched.is_set():  # pylint: disable=while-used
+            current = cache.get(store_key, lambda etag: None)
+            # Timeline and episodes always belong to the same version
+            assert len(current.timeline) \
+                == len(current.events_dict['episodes'])
+            assert seen.setdefault(current.version,
+                                   len(current.timeline)) \
+                == len(current.timeline)
+
+    with ThreadPoolExecutor(4) as executor:
+        readers = [executor.submit(read) for _ in range(4)]
+        for patcher in patchers:
+            cache.patch(store_key, patcher)
+        patched.set()
+        for reader in readers:
+            reader.result()
+
+    final = cache.get(store_key, lambda etag: None)
+    assert len(final.timeline) == 152
+    assert final.etag == '"v1"'
+    assert len(seen) > 1
+
+
+def test_patch_store_snapshot(backend: RecordingBackend,
+                              weekly_episodes: list[Episode]) -> None:
+    api.store_cache.invalidate()
+    episode = weekly_episodes[0]
+    patched = api.patch_store_snapshot(
+        EpisodeAdder(Uuid('B'), episode), backend)
+    assert api.snapshot_from_store(backend) is patched
+    assert patched.timeline.current_or_next(
+        lambda: episode.date_published) is episode
+
+
+def test_invalidate(cache: StoreCache) -> None:
+    cache.get(('bucket', 'key'), lambda etag: snapshot('"v1"'))
+    cache.invalidate()
+    fetched: list[str | None] = []
+
+    def fetch(etag: str | None) -> StoreSnapshot:
+        fetched.append(etag)
+        return snapshot('"v2"')
+
+    assert cache.get(('bucket', 'key'), fetch).etag == '"v2"'
+    assert fetched == [None]
+
+
+def test_revalidate_with_head_request(
+    backend: RecordingBackend,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(api.store_cache, 'ttl_seconds', 0)
+    first = api.snapshot_from_store(backend)
+    assert api.snapshot_from_store(backend) is first
+    api.store_cache.join_refreshes()
+    assert [operation for operation, _ in backend.requests] \
+        == ['get', 'head']
+    assert [episode.episode_number for episode
+            in first.events_dict['episodes'].values()] == [567]
+
+
+def test_reload_after_invalidate(backend: RecordingBackend) -> None:
+    api.all_episodes_from_store(backend)
+    api.all_episodes_from_store(backend)
+    api.store_cache.invalidate()
+    api.all_episodes_from_store(backend)
+    assert [operation for operation, _ in backend.requests] \
+        == ['get'] * 2
+
+
+@pytest.mark.parametrize('with_transitions', [False, True])
+def test_cold_load_from_binary_snapshot(backend: RecordingBackend,
+                                        with_transitions: bool) -> None:
+    events = backend.get_existing(EVENTS_JSON_FILENAME)
+    events_md5 = api._md5_of(events.etag)  # pylint: disable=protected-access
+    assert events_md5 is not None
+    backend.put(EVENTS_BINARY_FILENAME, binary_snapshot.dump_events(
+        api.snapshot_from_json(events.body.read()).events_dict,
+        events_md5, with_transitions))
+    # Made from other events, so only the requests tell it was read
+    backend.put(TRANSITIONS_JSON_FILENAME,
+                json.dumps({'eventsMd5': '0' * 32}).encode())
+    backend.requests.clear()
+    loaded = api.snapshot_from_store(backend)
+    assert loaded.etag == events.etag
+    assert isinstance(loaded.events_dict['episodes'],
+                      binary_snapshot.LazyEpisodes)
+    assert backend.requests == [
+        ('get', EVENTS_BINARY_FILENAME),
+        ('get', EVENTS_JSON_FILENAME),
+        *[('get', TRANSITIONS_JSON_FILENAME)] * with_transitions,
+    ]
+
+    backend.put(EVENTS_JSON_FILENAME, b'{"episodes": {}}')
+    api.store_cache.invalidate()
+    backend.requests.clear()
+    assert not api.snapshot_from_store(backend).events_dict['episodes']
+    # The stale binary snapshot is read, then the events JSON, and
+    # the transitions for it
+    assert backend.requests == [('get', EVENTS_BINARY_FILENAME),
+                                ('get', EVENTS_JSON_FILENAME),
+                                ('get', TRANSITIONS_JSON_FILENAME)]
+
+
+def served_from(backend: MemoryBackend, deadline_seconds: float) \
+        -> tuple[StoreSnapshot, SnapshotSource, dict[str, int]]:
+    """Returns the snapshot, its source, and how the counts grew."""
+    before = api.snapshot_source_counts()
+    served, source = \
+        api.bounded_snapshot_from_store(backend, deadline_seconds)
+    after = api.snapshot_source_counts()
+    return served, source, {
+        key: after[key] - before[key] for key in after
+        if after[key] != before[key]
+    }
+
+
+def test_fall_back_to_last_known(
+    backend: BlockingBackend,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monkeypatch.setattr(api.store_cache, 'ttl_seconds', 0)
+    monkeypatch.setattr(api.store_cache, 'max_staleness_seconds', 0)
+    first, source, counted = served_from(backend, 1)
+    assert (source, counted) == (SnapshotSource.STORE, {'store': 1})
+    assert not caplog.records
+
+    backend.released.clear()
+    second, source, counted = served_from(backend, 0.01)
+    assert second is first
+    assert (source, counted) \
+        == (SnapshotSource.LAST_KNOWN, {'last-known': 1})
+    assert caplog.records[0].levelno == logging.WARNING
+    assert 'last-known' in caplog.text
+    backend.released.set()
+    api.store_cache.join_refreshes()
+
+
+def test_fall_back_to_bundled(
+    backend: BlockingBackend,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(api, 'BUNDLED_STORE_PATH', tmp_path)
+    # No fallback, so the error of the load is raised
+    with pytest.raises(RuntimeError):
+        served_from(MemoryBackend(), 1)
+
+    (tmp_path / EVENTS_JSON_FILENAME).write_bytes(
+        LOCAL_EVENTS_JSON_PATH.read_bytes())
+    backend.released.clear()
+    bundled, source, counted = served_from(backend, 0.01)
+    assert bundled.etag == etag_of(LOCAL_EVENTS_JSON_PATH.read_bytes())
+    assert (source, counted) == (SnapshotSource.BUNDLED, {'bundled': 1})
+    backend.released.set()
+    api.store_cache.join_refreshes()
+    # Once the store has loaded, it is served again
+    assert served_from(backend, 0.01)[1] == SnapshotSource.STORE
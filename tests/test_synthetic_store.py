@@ -0,0 +1,74 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from datetime import datetime
+import hashlib
+import json
+from typing import Any
+
+import pytest
+
+from kha import api
+from kha.binary_snapshot import dump_events
+from kha.settings import PACKAGE_ROOT
+from scripts.synthetic_store import (
+    synthetic_events_dict,
+    synthetic_events_json,
+)
+
+SCHEMA_PATH = PACKAGE_ROOT.parent / 'share' / 'events.kha.schema.json'
+
+JSON_TYPES: dict[str, type | tuple[type, ...]] = {
+    'boolean': bool,
+    'integer': int,
+    'string': str,
+}
+
+
+@pytest.fixture(name='events_dict', scope='module')
+def fixture_events_dict() -> dict[str, Any]:
+    return synthetic_events_dict(2_000)
+
+
+def test_matches_schema(events_dict: dict[str, Any]) -> None:
+    schema = json.loads(SCHEMA_PATH.read_text())
+    properties = schema['definitions']['episode']['properties']
+    assert set(events_dict) == set(schema['required'])
+    for episode in events_dict['episodes'].values():
+        assert set(schema['definitions']['episode']['required']) \
+            <= set(episode)
+        for name, value in episode.items():
+            types = properties[name]['type']
+            assert isinstance(value, tuple(
+                JSON_TYPES[json_type] for json_type
+                in (types if isinstance(types, list) else [types])))
+            if name == '@type':
+                assert value == properties[name]['const']
+            if properties[name].get('format') == 'date-time':
+                assert datetime.fromisoformat(episode[name]).tzinfo \
+                    is not None
+
+
+def test_realistic_mix(events_dict: dict[str, Any]) -> None:
+    episodes = list(events_dict['episodes'].values())
+    assert len(episodes) == 2_000
+    assert 200 < sum(episode['isRerun'] for episode in episodes) < 600
+    assert 50 < sum(episode['isSpinoff'] for episode in episodes) < 300
+    assert any(isinstance(episode['episodeNumber'], str)
+               and not episode['isSpinoff'] for episode in episodes)
+    assert {episode['datePublished'][-6:] for episode in episodes} \
+        == {'+01:00', '+02:00'}
+
+
+def test_loads_as_store() -> None:
+    events_json = synthetic_events_json(1_000)
+    snapshot = api.snapshot_from_json(events_json)
+    assert len(snapshot.events_dict['episodes']) == 1_000
+    assert 0 < len(snapshot.timeline.episodes) < 1_000
+    dump_events(snapshot.events_dict,
+                hashlib.md5(events_json).hexdigest())
+
+
+def test_deterministic() -> None:
+    assert synthetic_events_json(100) == synthetic_events_json(100)
+    assert synthetic_events_json(100) \
+        != synthetic_events_json(100, seed=1)
@@ -0,0 +1,145 @@
+# pylint: disable=magic-value-comparison, missing-function-docstring, missing-module-docstring
+
+from datetime import datetime, timedelta, timezone
+import json
+from typing import Any
+
+import pytest
+
+from kha import api
+from kha.episode import Episode
+from kha.episode_timeline import EpisodeTimeline
+from kha.local_types import EventsDict, Uuid
+from kha.transition_table import Transition, TransitionTable
+from kha.verdict import Verdict
+
+
+@pytest.fixture(name='events_dict')
+def fixture_events_dict(
+    episode_boilerplate: dict[str, Any],
+    weekly_episodes: list[Episode],
+) -> EventsDict:
+    first_start = weekly_episodes[0].date_published
+    episodes = weekly_episodes + [
+        # Rerun, never the answer
+        Episode(
+            3,
+            name='Folge 3',
+            **(episode_boilerplate | {
+                'date_published': first_start + timedelta(days=4),
+                'is_rerun': True,
+            }),
+        ),
+        # Second episode on the same day as episode 10
+        Episode(
+            100,
+            name='Folge 100',
+            **(episode_boilerplate | {
+                'date_published': first_start
+                + timedelta(weeks=10, hours=2),
+            }),
+        ),
+        # Episode on the day right after episode 20
+        Episode(
+            101,
+            name='Folge 101',
+            **(episode_boilerplate | {
+                'date_published': first_start
+                + timedelta(weeks=20, days=1),
+            }),
+        ),
+    ]
+    return EventsDict({'episodes': {
+        Uuid(f'uuid-{index}'): episode
+        for index, episode in enumerate(episodes)
+    }})
+
+
+@pytest.fixture(name='timeline')
+def fixture_timeline(events_dict: EventsDict) -> EpisodeTimeline:
+    return api.episode_timeline(events_dict['episodes'].values())
+
+
+@pytest.fixture(name='transitions')
+def fixture_transitions(
+    events_dict: EventsDict,
+    timeline: EpisodeTimeline,
+) -> TransitionTable:
+    return TransitionTable.build(events_dict, timeline, 'md5')
+
+
+def test_build(transitions: TransitionTable) -> None:
+    # Two transitions per episode day, except for the day right
+    # after another; one extra for the end
+    assert len(transitions.transitions) == 2 * 53 - 1 + 1
+    first, second = transitions.transitions[:2]
+    assert first.instant is None
+    assert first.verdict == Verdict.NO
+    assert second.instant \
+        == datetime.fromisoformat('2021-01-06T00:00:00+01:00')
+    assert second.verdict == Verdict.YES
+    assert transitions.transitions[-1].verdict == Verdict.UNKNOWN
+
+
+def test_json_round_trip(
+    events_dict: EventsDict,
+    transitions: TransitionTable,
+) -> None:
+    restored = TransitionTable.from_json_dict(
+        json.loads(json.dumps(transitions.to_json_dict())),
+        events_dict)
+    assert restored.events_md5 == 'md5'
+    assert [
+        (transition.instant, transition.verdict, transition.episode)
+        for transition in restored.transitions
+    ] == [
+        (transition.instant, transition.verdict, transition.episode)
+        for transition in transitions.transitions
+    ]
+
+
+def test_check_matches_timeline(
+    timeline: EpisodeTimeline,
+    transitions: TransitionTable,
+) -> None:
+    start = datetime.fromisoformat('2021-01-01T00:00:00+00:00')
+    for reference_point in (start + timedelta(hours=7 * step)
+                            for step in range(1300)):
+        now = lambda: reference_point  # pylint: disable=cell-var-from-loop, unnecessary-lambda-assignment
+        assert api.check(now=now, transitions=transitions).__dict__ \
+            == api.check(now=now, timeline=timeline).__dict__
+
+
+def test_no_mismatches(
+    timeline: EpisodeTimeline,
+    transitions: TransitionTable,
+) -> None:
+    assert not api.transition_mismatches(transitions, timeline)
+
+
+def test_mismatch_is_detected(
+    timeline: EpisodeTimeline,
+    transitions: TransitionTable,
+) -> None:
+    del transitions.transitions[3]
+    tampered = TransitionTable(transitions.transitions, 'md5')
+    assert api.transition_mismatches(tampered, timeline) == [
+        datetime.fromisoformat('2021-01-13T00:00:00+01:00').date(),
+    ]
+
+
+def test_empty_store() -> None:
+    transitions = TransitionTable.build(
+        EventsDict({'episodes': {}}), EpisodeTimeline([]), 'md5')
+    transition, valid_until = transitions.lookup(
+        lambda: datetime(2021, 6, 9, tzinfo=timezone.utc))
+    assert transition.verdict == Verdict.UNKNOWN
+    assert valid_until is None
+
+
+def test_must_cover_all_of_time() -> None:
+    with pytest.raises(ValueError):
+        TransitionTable(
+            [Transition(datetime(2021, 6, 9, tzinfo=timezone.utc),
+                        Verdict.UNKNOWN, None, None)],
+            'md5')